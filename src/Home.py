@@ -1,11 +1,11 @@
 import streamlit as st
 from qa_sys import KnowledgeQA
+from chat_view import get_history, render_chat, stream_reply
+
+GREETING = "您好！我是芝士问答助手。我可以帮您查询专家信息、研究领域、论文等。请问有什么我可以帮您的？"
 
 # 初始化session_state
-if "messages" not in st.session_state:
-    st.session_state.messages = [
-        {"role": "assistant", "content": "您好！我是芝士问答助手。我可以帮您查询专家信息、研究领域、论文等。请问有什么我可以帮您的？"}
-    ]
+chat_history = get_history(GREETING, assistant_name="芝士助手", key="home_chat")
 if "qa_system" not in st.session_state:
     st.session_state.qa_system = KnowledgeQA(
         uri="bolt://localhost:7687",
@@ -14,6 +14,16 @@ if "qa_system" not in st.session_state:
     )
 if "user_input" not in st.session_state:
     st.session_state.user_input = ""
+if "home_pending_question" not in st.session_state:
+    st.session_state.home_pending_question = ""
+
+def handle_input():
+    """处理用户输入，回答在页面主体中流式生成"""
+    if st.session_state.user_input:
+        question = st.session_state.user_input
+        chat_history.append("user", question)
+        st.session_state.home_pending_question = question
+        st.session_state.user_input = ""
 
 def main():
     st.set_page_config(
@@ -22,6 +32,15 @@ def main():
         layout="wide"
     )
 
+    # 启动时连接数据库并校验查询目录（每个进程只校验一次），语句有误时在这里提示，而不是等到第一次提问
+    try:
+        st.session_state.qa_system.connect()
+    except ValueError as e:
+        st.error(f"查询目录校验失败，请检查 src/queries.py：\n{e}")
+        st.stop()
+    except Exception as e:
+        st.warning(f"暂时无法连接数据库，提问时会重新连接：{e}")
+
     # 主标题
     st.title("🧀 芝士问答")
     
@@ -70,28 +89,16 @@ def main():
         """)
         
         if st.button("🔄 新对话", use_container_width=True):
-            st.session_state.messages = [
-                {"role": "assistant", "content": "您好！我是芝士问答助手。我可以帮您查询专家信息、研究领域、论文等。请问有什么我可以帮您的？"}
-            ]
+            chat_history.reset()
             st.experimental_rerun()
 
     # 主聊天界面
-    for message in st.session_state.messages:
-        with st.container():
-            if message["role"] == "user":
-                st.markdown(f"""
-                <div class="chat-message user">
-                    <div style="color: #8E8EA0">你</div>
-                    <div class="content">{message["content"]}</div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div class="chat-message assistant">
-                    <div style="color: #8E8EA0">芝士助手</div>
-                    <div class="content">{message["content"]}</div>
-                </div>
-                """, unsafe_allow_html=True)
+    render_chat(chat_history)
+    question = st.session_state.home_pending_question
+    if question:
+        st.session_state.home_pending_question = ""
+        answer = stream_reply(chat_history, st.session_state.qa_system.answer_stream(question))
+        chat_history.append("assistant", answer)
 
     # 输入框
     st.text_input(
@@ -0,0 +1,401 @@
+"""KnowledgeQA 问答性能基准
+
+把 data/demo-time.json（可按倍数合成放大）导入本地Neo4j，回放由 README 和侧边栏示例构成的问题集，
+按意图统计 p50/p95/p99 延迟，并测量并发下的QPS，用 PROFILE 记录关键查询的 dbHits。
+结果按提交保存，可与基线对比作为性能回归门禁：
+
+    python src/benchmark.py --scale 10
+    python src/benchmark.py --scale 10 --no-load --compare bench_results/<基线提交>-x10.json
+    python src/benchmark.py --import-only     # 只测冷启动导入耗时，不需要数据库
+    python src/benchmark.py --db-hits-scales 1 10   # 只检查关键查询的 dbHits 不随数据规模增长
+"""
+import argparse
+import copy
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+import queries
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+
+# 每个会话是一组连续提问，(意图, 问题)；追问依赖同一会话中上一轮的上下文
+QUESTION_SESSIONS: List[List[Tuple[str, str]]] = [
+    [("expert_by_interest", "谁研究了自然语言生成领域？"),
+     ("expert_follow_up", "他的研究领域是什么？"),
+     ("expert_follow_up", "他的h指数是多少？"),
+     ("expert_follow_up", "他发表了什么论文？")],
+    [("expert_by_interest", "谁研究Natural Language Generation？"),
+     ("experts_follow_up", "他们之间有合作吗？"),
+     ("experts_follow_up", "他们是什么时候开始合作的？"),
+     ("experts_follow_up", "他们一共合作了多少次？")],
+    [("top_experts_in_field", "自然语言处理领域最强的专家有哪些？"),
+     ("field_follow_up", "这个领域的论文有哪些？"),
+     ("field_follow_up", "这个领域还有其他专家吗？"),
+     ("more_info", "还有吗？")],
+    [("top_experts_in_field", "机器学习方向的专家？")],
+    [("top_experts_in_field", "NLP领域排名前的专家？")],
+    [("expert_interests", "Kees Van Deemter的研究领域是什么？")],
+    [("expert_h_index", "Albert Gatt的h指数是多少？")],
+    [("expert_h_index", "Robert Dale的h指数是多少？")],
+    [("expert_publications", "Ehud Reiter发表了什么论文？")],
+    [("field_publications", "自然语言生成领域的论文有哪些？")],
+    [("field_publications", "Natural Language Generation领域的相关论文有哪些？")],
+    [("recent_field_publications", "自然语言处理最近的研究论文？")],
+    [("recent_field_publications", "NLP最近的研究论文？")],
+    [("field_publications", "自然语言方向的论文有哪些？")],
+    [("publication_authors", "General and reference这篇论文的作者是谁？")],
+    [("publication_year", "General and reference这篇论文发表在哪一年？")],
+    [("cooperation", "Ehud Reiter和Robert Dale有什么合作关系吗？")],
+    [("cooperation", "Ehud Reiter和Robert Dale有合作吗？")],
+    [("cooperation", "Ehud Reiter和Robert Dale合作发表了哪些论文？")],
+]
+
+
+# 页面冷启动时导入的模块，以及导入它们时不应被顺带加载的重型依赖
+IMPORT_MODULES = ["qa_sys", "chat_view"]
+HEAVY_MODULES = ["py2neo", "jieba", "numpy", "networkx", "plotly", "pandas", "scipy"]
+
+
+# 用 PROFILE 检查 dbHits 的查询：(名称, 查询, 参数)，与问答实际执行的查询和参数一致；
+# 选数据集中最热门的领域，其规模随放大倍数增长，而这些查询读取的排名长度不变
+PROFILED_QUERIES = [
+    ("field_publications", queries.RANKED_FIELD_PUBLICATIONS,
+     {"names": ["Natural Language Generation"], "dated": False, "limit": 10}),
+    ("recent_field_publications", queries.RANKED_FIELD_PUBLICATIONS,
+     {"names": ["Natural Language Generation"], "dated": True, "limit": 5}),
+    ("expert_by_interest", queries.RANKED_EXPERTS_BY_INTEREST.render(i=queries.RANKED_EXPERTS_BY_INTEREST.slots["i"][0]),
+     {"i_names": ["Natural Language Generation"], "limit": queries.RANKING_SIZE}),
+]
+
+# 数据放大后 dbHits 允许的增幅：上面的查询只读定长排名，dbHits 应与数据规模无关
+DB_HITS_TOLERANCE = 0.25
+
+
+def scale_dataset(data: Dict[str, Any], scale: int) -> Dict[str, Any]:
+    """把主题数据复制 scale 份，副本的id、姓名、标题带上编号后缀，研究领域名称保持不变
+
+    这样热门领域会随倍数变大，而按姓名/标题的查询仍能命中原始数据。
+    """
+    scaled = copy.deepcopy(data)
+    for k in range(1, scale):
+        suffix = f" #{k}"
+        for expert in data['experts']:
+            clone = dict(expert, id=f"{expert['id']}-{k}", name=expert['name'] + suffix)
+            scaled['experts'].append(clone)
+        for pub in data['publications']:
+            authors = [{"id": f"{a['id']}-{k}" if a['id'] else "", "name": a['name'] + suffix}
+                       for a in pub['authors']]
+            scaled['publications'].append(dict(pub, id=f"{pub['id']}-{k}",
+                                               title=pub['title'] + suffix, authors=authors))
+    return scaled
+
+
+def load_dataset(config: Dict[str, str], data_file: str, scale: int):
+    """清空数据库并导入（放大后的）数据集
+
+    更大规模的数据可以用 gen_synthetic.py 生成后通过 --data 指定，或先导入再加 --no-load。
+    """
+    from import_to_neo4j import Neo4jImporter
+
+    with open(data_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if scale > 1:
+        data = scale_dataset(data, scale)
+
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+        tmp_path = f.name
+    try:
+        started = time.perf_counter()
+        Neo4jImporter(**config).import_data(tmp_path)
+        print(f"导入 {len(data['experts'])} 位专家、{len(data['publications'])} 篇论文，"
+              f"耗时 {time.perf_counter() - started:.1f}s")
+    finally:
+        os.unlink(tmp_path)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """最近秩百分位数"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_sessions(qa, sessions: List[List[Tuple[str, str]]], latencies: Dict[str, List[float]],
+                 lock: threading.Lock):
+    """依次回放若干会话，把每轮延迟(毫秒)记到对应意图下"""
+    from qa_sys import DialogContext
+
+    for session in sessions:
+        qa.context = DialogContext()
+        for intent, question in session:
+            started = time.perf_counter()
+            qa.answer(question)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.setdefault(intent, []).append(elapsed)
+
+
+def benchmark_latency(config: Dict[str, str], rounds: int) -> Dict[str, Dict[str, float]]:
+    """单线程回放问题集，统计每个意图的延迟分布"""
+    from qa_sys import KnowledgeQA
+
+    qa = KnowledgeQA(**config)
+    latencies: Dict[str, List[float]] = {}
+    lock = threading.Lock()
+    run_sessions(qa, QUESTION_SESSIONS, {}, lock)  # 预热：建立连接、填充查询计划缓存
+    for _ in range(rounds):
+        run_sessions(qa, QUESTION_SESSIONS, latencies, lock)
+
+    return {
+        intent: {
+            "count": len(samples),
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+        }
+        for intent, samples in sorted(latencies.items())
+    }
+
+
+def benchmark_throughput(config: Dict[str, str], concurrency: int, rounds: int) -> Dict[str, float]:
+    """每个线程一个 KnowledgeQA 实例（对话上下文不共享），测量并发QPS"""
+    from qa_sys import KnowledgeQA
+
+    systems = [KnowledgeQA(**config) for _ in range(concurrency)]
+    latencies: Dict[str, List[float]] = {}
+    lock = threading.Lock()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(run_sessions, qa, QUESTION_SESSIONS * rounds, latencies, lock)
+                   for qa in systems]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    all_samples = [s for samples in latencies.values() for s in samples]
+    return {
+        "concurrency": concurrency,
+        "questions": len(all_samples),
+        "seconds": elapsed,
+        "qps": len(all_samples) / elapsed if elapsed else 0.0,
+        "p95": percentile(all_samples, 95),
+    }
+
+
+def benchmark_db_hits(config: Dict[str, str]) -> Dict[str, int]:
+    """PROFILE 各查询，返回总 dbHits"""
+    from py2neo import Graph
+
+    graph = Graph(config["uri"], auth=(config["user"], config["password"]))
+    return {name: queries.profile_db_hits(graph, query, **params) for name, query, params in PROFILED_QUERIES}
+
+
+def _cumulative_import_us(importtime_log: str, module: str) -> int:
+    """从 -X importtime 的输出中取出 module 的累计导入耗时(微秒)"""
+    for line in importtime_log.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+    return 0
+
+
+def benchmark_import_time(repeats: int = 5) -> Dict[str, Dict[str, Any]]:
+    """每次在新进程中用 -X importtime 导入模块，取累计耗时(毫秒)的中位数，并记录顺带加载的重型依赖"""
+    result = {}
+    for module in IMPORT_MODULES:
+        code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        samples = []
+        for _ in range(repeats):
+            proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                  cwd=SRC_DIR, capture_output=True, text=True)
+            if proc.returncode:
+                raise RuntimeError(f"导入 {module} 失败: {proc.stderr.strip().splitlines()[-1]}")
+            samples.append(_cumulative_import_us(proc.stderr, module) / 1000)
+        result[module] = {
+            "median": statistics.median(samples),
+            "heavy": [m for m in proc.stdout.strip().split(",") if m],
+        }
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> bool:
+    """打印与基线的对比，p95 或导入耗时退化超过 threshold 比例视为回归，返回是否通过"""
+    print(f"\n与基线 {baseline.get('commit')} (x{baseline.get('scale')}) 对比:")
+    passed = compare_import_time(current, baseline, threshold)
+    if "latency" not in current:
+        return passed
+    passed = compare_db_hits(current, baseline) and passed
+    print(f"{'意图':<28}{'基线p95':>10}{'当前p95':>10}{'变化':>9}")
+    for intent, stats in current["latency"].items():
+        base = baseline.get("latency", {}).get(intent)
+        if not base or not base["p95"]:
+            print(f"{intent:<28}{'-':>10}{stats['p95']:>10.1f}{'新增':>9}")
+            continue
+        change = stats["p95"] / base["p95"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  <- 回归"
+            passed = False
+        print(f"{intent:<28}{base['p95']:>10.1f}{stats['p95']:>10.1f}{change:>+9.1%}{flag}")
+
+    base_qps = baseline.get("throughput", {}).get("qps")
+    if base_qps:
+        change = current["throughput"]["qps"] / base_qps - 1
+        print(f"QPS: {base_qps:.1f} -> {current['throughput']['qps']:.1f} ({change:+.1%})")
+        if change < -threshold:
+            passed = False
+    return passed
+
+
+def compare_import_time(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> bool:
+    passed = True
+    for module, stats in current.get("import_time", {}).items():
+        if stats.get("heavy"):
+            print(f"导入 {module} 时顺带加载了 {', '.join(stats['heavy'])}  <- 回归")
+            passed = False
+        base = baseline.get("import_time", {}).get(module)
+        if not base or not base["median"]:
+            continue
+        change = stats["median"] / base["median"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  <- 回归"
+            passed = False
+        print(f"导入 {module}: {base['median']:.1f}ms -> {stats['median']:.1f}ms ({change:+.1%}){flag}")
+    return passed
+
+
+def db_hits_bounded(base: Dict[str, int], current: Dict[str, int],
+                    tolerance: float = DB_HITS_TOLERANCE) -> Dict[str, bool]:
+    """比较两组原始 dbHits（通常来自不同放大倍数），每个查询的增幅不超过 tolerance 时为 True"""
+    return {name: hits <= base[name] * (1 + tolerance)
+            for name, hits in current.items() if base.get(name)}
+
+
+def compare_db_hits(current: Dict[str, Any], baseline: Dict[str, Any]) -> bool:
+    """直接比较原始 dbHits，不按放大倍数归一化：可以与较小倍数的基线比较，
+    增幅超过 DB_HITS_TOLERANCE 即说明查询读取量随数据规模增长，视为回归"""
+    base_hits = baseline.get("db_hits", {})
+    current_hits = current.get("db_hits", {})
+    passed = True
+    for name, ok in db_hits_bounded(base_hits, current_hits).items():
+        change = current_hits[name] / base_hits[name] - 1
+        passed = passed and ok
+        print(f"dbHits {name} (x{baseline['scale']} -> x{current['scale']}): "
+              f"{base_hits[name]} -> {current_hits[name]} ({change:+.1%}){'' if ok else '  <- 回归'}")
+    return passed
+
+
+def benchmark_db_hits_scaling(config: Dict[str, str], data_file: str,
+                              scales: List[int]) -> Dict[int, Dict[str, int]]:
+    """依次导入各放大倍数的数据并 PROFILE，返回 倍数 -> dbHits"""
+    results = {}
+    for scale in scales:
+        load_dataset(config, data_file, scale)
+        results[scale] = benchmark_db_hits(config)
+    return results
+
+
+def print_import_report(import_time: Dict[str, Dict[str, Any]]):
+    print(f"\n{'模块':<28}{'导入(ms)':>10}  顺带加载的重型依赖")
+    for module, stats in import_time.items():
+        print(f"{module:<28}{stats['median']:>10.1f}  {', '.join(stats['heavy']) or '-'}")
+
+
+def print_report(result: Dict[str, Any]):
+    print_import_report(result["import_time"])
+    print(f"\n提交 {result['commit']}，数据放大 x{result['scale']}")
+    print(f"{'意图':<28}{'次数':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for intent, stats in result["latency"].items():
+        print(f"{intent:<28}{stats['count']:>6}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+    for name, hits in result["db_hits"].items():
+        print(f"PROFILE {name}: {hits} dbHits")
+    tp = result["throughput"]
+    print(f"并发 {tp['concurrency']}: {tp['questions']} 个问题 / {tp['seconds']:.1f}s = "
+          f"{tp['qps']:.1f} QPS, p95 {tp['p95']:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='KnowledgeQA 性能基准')
+    parser.add_argument('--data', default=os.path.join(ROOT_DIR, 'data', 'demo-time.json'))
+    parser.add_argument('--scale', type=int, default=1, choices=[1, 10, 100, 1000], help='数据合成放大倍数')
+    parser.add_argument('--no-load', action='store_true', help='跳过导入，直接使用库中现有数据')
+    parser.add_argument('--rounds', type=int, default=5, help='问题集回放轮数')
+    parser.add_argument('--concurrency', type=int, default=8, help='吞吐测试的并发数')
+    parser.add_argument('--output-dir', default=os.path.join(ROOT_DIR, 'bench_results'))
+    parser.add_argument('--compare', help='基线结果JSON，对比并在回归时以非零状态退出')
+    parser.add_argument('--threshold', type=float, default=0.10, help='允许的p95退化比例')
+    parser.add_argument('--import-only', action='store_true', help='只测量模块冷启动导入耗时')
+    parser.add_argument('--db-hits-scales', type=int, nargs='+', metavar='SCALE',
+                        help='只检查 dbHits：依次导入这些放大倍数的数据，dbHits 增幅超过容差时以非零状态退出')
+    parser.add_argument('--uri', default='bolt://localhost:7687')
+    parser.add_argument('--user', default='neo4j')
+    parser.add_argument('--password', default='123456')
+    args = parser.parse_args()
+
+    if args.db_hits_scales:
+        config = {"uri": args.uri, "user": args.user, "password": args.password}
+        hits = benchmark_db_hits_scaling(config, args.data, sorted(args.db_hits_scales))
+        scales = sorted(hits)
+        passed = True
+        for scale in scales[1:]:
+            passed = compare_db_hits({"scale": scale, "db_hits": hits[scale]},
+                                     {"scale": scales[0], "db_hits": hits[scales[0]]}) and passed
+        sys.exit(0 if passed else 1)
+
+    result = {
+        "commit": git_commit(),
+        "scale": args.scale,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "import_time": benchmark_import_time(),
+    }
+    if args.import_only:
+        print_import_report(result["import_time"])
+        name = f"{result['commit']}-import.json"
+    else:
+        config = {"uri": args.uri, "user": args.user, "password": args.password}
+        if not args.no_load:
+            load_dataset(config, args.data, args.scale)
+        result["db_hits"] = benchmark_db_hits(config)
+        result["latency"] = benchmark_latency(config, args.rounds)
+        result["throughput"] = benchmark_throughput(config, args.concurrency, max(1, args.rounds // 2))
+        print_report(result)
+        name = f"{result['commit']}-x{args.scale}.json"
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output = os.path.join(args.output_dir, name)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if not compare(result, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""聊天记录的紧凑存储与增量渲染
+
+Streamlit 每次交互都会重跑整个脚本。原先每条消息各输出一个 st.markdown，
+对话越长每轮渲染越慢。这里：
+- 每条消息追加时只生成一次HTML片段并缓存，之后的重跑不再重新格式化旧消息
+- 页面只显示最近的一个窗口（默认20条），更早的消息通过“加载更早的消息”分页展开
+- 窗口内所有消息拼成一个 st.markdown 块输出，拼接结果按 (版本, 窗口大小) 缓存
+- 记录以 (角色, 内容, 附加信息) 元组保存，超过上限的最早消息被丢弃
+- 新回答可以边生成边显示，结束后再追加到记录中
+"""
+import html
+import time
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+import streamlit as st
+
+# (角色, 内容, 附加信息)，附加信息如 trace、耗时页脚，没有时为 None
+Message = Tuple[str, str, Optional[Dict[str, Any]]]
+
+CHAT_STYLE = """
+<style>
+    .chat-window .chat-footer {
+        display: none;
+        color: #8E8EA0;
+        font-size: 0.8rem;
+        margin-top: 0.5rem;
+    }
+    .chat-window.debug .chat-footer {
+        display: block;
+    }
+    .chat-window .content {
+        white-space: pre-wrap;
+    }
+</style>
+"""
+
+
+class ChatHistory:
+    """保存在 session_state 中的聊天记录
+
+    Args:
+        greeting: 新对话时助手的第一句话
+        assistant_name: 助手消息上显示的名称
+        max_messages: 保留的最大消息数
+        key: 在 session_state 中的键，不同页面的对话互不影响
+    """
+
+    def __init__(self, greeting: str, assistant_name: str = "助手", max_messages: int = 500,
+                 key: str = "chat"):
+        self.key = key
+        self.greeting = greeting
+        self.assistant_name = assistant_name
+        self.messages: Deque[Message] = deque(maxlen=max_messages)
+        self._fragments: Deque[str] = deque(maxlen=max_messages)
+        self._rendered: Tuple[Tuple[int, int], str] = ((-1, 0), "")
+        self.version = 0
+        self.reset()
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def reset(self):
+        """开始新对话"""
+        self.messages.clear()
+        self._fragments.clear()
+        self.append("assistant", self.greeting)
+
+    def append(self, role: str, content: str, meta: Optional[Dict[str, Any]] = None):
+        self.messages.append((role, content, meta or None))
+        self._fragments.append(self.format_message(role, content, meta))
+        self.version += 1
+
+    def last_meta(self, key: str) -> Any:
+        """最近一条带有 key 的消息附加信息"""
+        for _, _, meta in reversed(self.messages):
+            if meta and meta.get(key) is not None:
+                return meta[key]
+        return None
+
+    def format_message(self, role: str, content: str, meta: Optional[Dict[str, Any]]) -> str:
+        name = "你" if role == "user" else self.assistant_name
+        footer = (meta or {}).get("timing")
+        footer_html = f'<div class="chat-footer">{html.escape(footer)}</div>' if footer else ""
+        return (f'<div class="chat-message {role}">'
+                f'<div style="color: #8E8EA0">{name}</div>'
+                f'<div class="content">{html.escape(content)}</div>'
+                f'{footer_html}</div>')
+
+    def render(self, count: int) -> str:
+        """最近 count 条消息拼成的HTML"""
+        key = (self.version, count)
+        if self._rendered[0] != key:
+            # 从尾部取，耗时只与窗口大小有关
+            fragments = list(islice(reversed(self._fragments), count))
+            self._rendered = (key, "".join(reversed(fragments)))
+        return self._rendered[1]
+
+
+def get_history(greeting: str, assistant_name: str = "助手", key: str = "chat") -> ChatHistory:
+    """取出（首次访问时创建）当前会话的聊天记录"""
+    if key not in st.session_state:
+        st.session_state[key] = ChatHistory(greeting, assistant_name, key=key)
+    return st.session_state[key]
+
+
+def render_chat(history: ChatHistory, page_size: int = 20, debug: bool = False):
+    """渲染聊天窗口：只显示最近的消息，更早的按页加载"""
+    visible_key = f"{history.key}_visible"
+    # 新对话或消息被截断后，窗口不超过实际消息数
+    visible = max(page_size, min(st.session_state.get(visible_key, page_size), len(history)))
+
+    hidden = len(history) - visible
+    if hidden > 0:
+        if st.button(f"⬆ 加载更早的消息（还有 {hidden} 条）", key=f"{history.key}_load_earlier"):
+            visible += page_size
+    st.session_state[visible_key] = visible
+
+    st.markdown(CHAT_STYLE, unsafe_allow_html=True)
+    css_class = "chat-window debug" if debug else "chat-window"
+    st.markdown(f'<div class="{css_class}">{history.render(visible)}</div>', unsafe_allow_html=True)
+
+
+def stream_reply(history: ChatHistory, chunks: Iterable[str], interval: float = 0.05) -> str:
+    """在聊天窗口下方边接收边显示助手的回答，返回完整回答
+
+    每隔 interval 秒最多刷新一次，避免逐行刷新时前端消息过多。
+    """
+    placeholder = st.empty()
+    parts = []
+    last_update = 0.0
+    for chunk in chunks:
+        parts.append(chunk)
+        now = time.monotonic()
+        if now - last_update >= interval:
+            last_update = now
+            fragment = history.format_message("assistant", "".join(parts) + " ▌", None)
+            placeholder.markdown(f'<div class="chat-window">{fragment}</div>', unsafe_allow_html=True)
+    content = "".join(parts)
+    fragment = history.format_message("assistant", content, None)
+    placeholder.markdown(f'<div class="chat-window">{fragment}</div>', unsafe_allow_html=True)
+    return content
@@ -0,0 +1,139 @@
+"""合著关系图与最短合作链
+
+“X和Y之间怎么联系上”要找两位专家之间最短的合著链。在 Cypher 中用变长路径
+(e1)-[:AUTHORED*..12]-(e2) 查找时，相隔四到六步的专家要展开的路径数随步数指数增长，往往超时。
+这里把专家之间的合著关系读入内存，专家id映射为整数下标，邻接表为整数集合，
+从两端同时做广度优先搜索，每轮扩展较小的一侧，访问的节点数大致是单向搜索的平方根。
+
+合著图按图版本在进程内共享，首次查询合作链时从图中读取一次。
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+# 合作链的最大步数，超过后视为联系不上
+MAX_HOPS = 6
+
+
+class CoauthorGraph:
+    """专家合著关系的无向图"""
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._neighbors: List[Set[int]] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _node(self, expert_id: str) -> int:
+        node = self._index.get(expert_id)
+        if node is None:
+            node = self._index[expert_id] = len(self._ids)
+            self._ids.append(expert_id)
+            self._neighbors.append(set())
+        return node
+
+    def add_authors(self, authors: Sequence[str]):
+        """同一篇论文的作者两两之间连边"""
+        nodes = [self._node(str(a)) for a in authors if a is not None]
+        for i, a in enumerate(nodes):
+            for b in nodes[i + 1:]:
+                if a != b:
+                    self._neighbors[a].add(b)
+                    self._neighbors[b].add(a)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "CoauthorGraph":
+        """rows 每行为一篇论文，authors 为作者id列表"""
+        graph = cls()
+        for row in rows:
+            graph.add_authors(row["authors"])
+        return graph
+
+    def shortest_path(self, sources: Iterable[str], targets: Iterable[str],
+                      max_hops: int = MAX_HOPS) -> Optional[List[str]]:
+        """sources 中任一专家到 targets 中任一专家的最短合著链（专家id列表，含两端），找不到时返回 None
+
+        同名专家有多个id时，两端都可以传入多个id。
+        """
+        source_nodes = {self._index[s] for s in sources if s in self._index}
+        target_nodes = {self._index[t] for t in targets if t in self._index}
+        if not source_nodes or not target_nodes:
+            return None
+        common = source_nodes & target_nodes
+        if common:
+            return [self._ids[min(common)]]
+
+        # 两侧各自的 节点 -> (前驱, 距离)，以及当前层
+        forward: Dict[int, Tuple[Optional[int], int]] = {n: (None, 0) for n in source_nodes}
+        backward: Dict[int, Tuple[Optional[int], int]] = {n: (None, 0) for n in target_nodes}
+        forward_level, backward_level = list(source_nodes), list(target_nodes)
+        forward_depth = backward_depth = 0
+
+        while forward_level and backward_level and forward_depth + backward_depth < max_hops:
+            expand_forward = len(forward_level) <= len(backward_level)
+            if expand_forward:
+                level, seen, other, depth = forward_level, forward, backward, forward_depth
+            else:
+                level, seen, other, depth = backward_level, backward, forward, backward_depth
+
+            best: Optional[Tuple[int, int, int]] = None  # (总步数, 本侧节点, 对侧节点)
+            next_level = []
+            for node in level:
+                for neighbor in self._neighbors[node]:
+                    if neighbor in other:
+                        hops = depth + 1 + other[neighbor][1]
+                        if best is None or hops < best[0]:
+                            best = (hops, node, neighbor)
+                    if neighbor not in seen:
+                        seen[neighbor] = (node, depth + 1)
+                        next_level.append(neighbor)
+
+            if best is not None:
+                if best[0] > max_hops:
+                    return None
+                _, node, neighbor = best
+                if expand_forward:
+                    return self._join(forward, node, backward, neighbor)
+                return self._join(forward, neighbor, backward, node)
+
+            if expand_forward:
+                forward_level, forward_depth = next_level, depth + 1
+            else:
+                backward_level, backward_depth = next_level, depth + 1
+        return None
+
+    def _join(self, forward: Dict[int, Tuple[Optional[int], int]], meet_forward: int,
+              backward: Dict[int, Tuple[Optional[int], int]], meet_backward: int) -> List[str]:
+        """由两侧的前驱拼出完整路径：源 -> meet_forward -> meet_backward -> 目标"""
+        head = []
+        node: Optional[int] = meet_forward
+        while node is not None:
+            head.append(node)
+            node = forward[node][0]
+        tail = []
+        node = meet_backward
+        while node is not None:
+            tail.append(node)
+            node = backward[node][0]
+        return [self._ids[n] for n in reversed(head)] + [self._ids[n] for n in tail]
+
+
+_graphs: Dict[Hashable, Tuple[Any, CoauthorGraph]] = {}
+_graphs_lock = threading.Lock()
+
+
+def shared_graph(source: Hashable, version: Any,
+                 loader: Callable[[], Iterable[Dict[str, Any]]]) -> CoauthorGraph:
+    """同一数据源在进程内共用一个合著图，图版本变化后重建
+
+    Args:
+        source: 数据源标识，如数据库地址
+        version: 当前图版本
+        loader: 返回论文行，每行含 authors（作者id列表）
+    """
+    with _graphs_lock:
+        cached = _graphs.get(source)
+        if cached is None or cached[0] != version:
+            cached = _graphs[source] = (version, CoauthorGraph.from_rows(loader()))
+        return cached[1]
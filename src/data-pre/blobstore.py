@@ -0,0 +1,90 @@
+import gzip
+import hashlib
+import io
+import os
+import threading
+from typing import IO, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstandard 是可选依赖，没有时使用gzip
+    zstandard = None
+
+
+class BlobStore:
+    """内容寻址的压缩网页存储
+
+    每个网页按源码的 sha256 存为 <root>/<前两位>/<sha256>.zst（或 .gz），
+    CSV 中只保存这个键。相同的网页只存一份，下游可以按键单独读取或流式解压某一页。
+
+    Args:
+        root: 存储目录
+        codec: "zstd" 或 "gzip"，默认有 zstandard 时用 zstd
+    """
+    EXTENSIONS = {"zstd": ".zst", "gzip": ".gz"}
+
+    def __init__(self, root: str = "raw_pages", codec: Optional[str] = None):
+        if codec is None:
+            codec = "zstd" if zstandard is not None else "gzip"
+        if codec not in self.EXTENSIONS:
+            raise ValueError(f"不支持的压缩格式: {codec}")
+        if codec == "zstd" and zstandard is None:
+            raise ImportError("使用zstd压缩需要先 pip install zstandard")
+        self.root = root
+        self.codec = codec
+
+    @staticmethod
+    def key(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, codec: str) -> str:
+        return os.path.join(self.root, key[:2], key + self.EXTENSIONS[codec])
+
+    def _find(self, key: str) -> Optional[tuple]:
+        for codec in self.EXTENSIONS:
+            path = self._path(key, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) is not None
+
+    def put(self, content: str) -> str:
+        """保存网页源码，返回内容键；已存在时直接返回"""
+        key = self.key(content)
+        if key in self:
+            return key
+
+        data = content.encode("utf-8")
+        if self.codec == "zstd":
+            data = zstandard.ZstdCompressor(level=10).compress(data)
+        else:
+            data = gzip.compress(data, compresslevel=6)
+
+        path = self._path(key, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 多个工作线程可能同时写同一个键，临时文件按进程和线程区分
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return key
+
+    def open(self, key: str) -> IO[str]:
+        """以文本流方式打开某个网页，按需解压"""
+        found = self._find(key)
+        if found is None:
+            raise KeyError(key)
+        path, codec = found
+        if codec == "gzip":
+            return gzip.open(path, "rt", encoding="utf-8")
+        if zstandard is None:
+            raise ImportError("读取zstd压缩的网页需要先 pip install zstandard")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+
+    def get(self, key: str) -> str:
+        """读取完整网页源码"""
+        with self.open(key) as f:
+            return f.read()
@@ -0,0 +1,481 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, asdict
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from blobstore import BlobStore
+
+BASE_URL = "https://scholar.google.com.hk/scholar?start={}&q={}&hl=zh-CN&as_sdt=0,5"
+
+# 各模式输出的CSV表头，与原先三个脚本保持一致
+HEADERS = {
+    "link": ["Page", "Result", "Title", "Link", "Abstract", "Keywords", "Authors"],
+    "raw": ["Page", "Result", "Title", "Link", "Blob"],
+}
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SearchResult:
+    """搜索结果页中的一条结果"""
+    page: int
+    index: int
+    title: str = ""
+    link: str = ""
+    abstract: str = ""
+    keywords: str = ""
+    authors: str = ""
+
+
+class ResultPageParser(HTMLParser):
+    """解析搜索结果页，提取 div.gs_ri 下的标题、链接、简介和作者信息
+
+    与selenium的CSS选择器等价，但直接作用于页面源码，
+    因此既能解析浏览器拿到的 page_source，也能解析本地静态HTML替身。
+    """
+    VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+                 "link", "meta", "source", "track", "wbr"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.results: List[Dict[str, str]] = []
+        self._stack: List[tuple] = []
+        self._current: Optional[Dict[str, str]] = None
+        self._result_depth: Optional[int] = None
+        self._capture: Optional[str] = None
+        self._capture_depth: Optional[int] = None
+        self._buffer: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID_TAGS:
+            if tag == "br" and self._capture is not None:
+                self._buffer.append(" ")
+            return
+        attrs = dict(attrs)
+        classes = set((attrs.get("class") or "").split())
+        depth = len(self._stack)
+        self._stack.append((tag, classes))
+
+        if tag == "div" and "gs_ri" in classes and self._current is None:
+            self._current = {"title": "", "link": "", "abstract": "", "meta": ""}
+            self._result_depth = depth
+            return
+        if self._current is None or self._capture is not None:
+            return
+
+        in_title = any(t == "h3" and "gs_rt" in c for t, c in self._stack[:-1])
+        if tag == "a" and in_title and not self._current["link"]:
+            self._current["link"] = attrs.get("href") or ""
+            self._start_capture("title", depth)
+        elif tag == "div" and "gs_rs" in classes:
+            self._start_capture("abstract", depth)
+        elif tag == "div" and "gs_a" in classes:
+            self._start_capture("meta", depth)
+
+    def handle_endtag(self, tag):
+        if tag in self.VOID_TAGS:
+            return
+        # 容忍不闭合的标签：弹出到最近一个同名标签为止
+        for pos in range(len(self._stack) - 1, -1, -1):
+            if self._stack[pos][0] == tag:
+                del self._stack[pos:]
+                break
+        else:
+            return
+
+        depth = len(self._stack)
+        if self._capture is not None and depth <= self._capture_depth:
+            self._current[self._capture] = " ".join("".join(self._buffer).split())
+            self._capture = None
+            self._capture_depth = None
+        if self._current is not None and depth <= self._result_depth:
+            self.results.append(self._current)
+            self._current = None
+            self._result_depth = None
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._buffer.append(data)
+
+    def _start_capture(self, name: str, depth: int):
+        self._capture = name
+        self._capture_depth = depth
+        self._buffer = []
+
+
+def parse_result_page(html: str, page: int) -> List[SearchResult]:
+    """把搜索结果页源码解析为 SearchResult 列表"""
+    parser = ResultPageParser()
+    parser.feed(html)
+    parser.close()
+
+    results = []
+    for index, item in enumerate(parser.results, start=1):
+        meta = item["meta"]
+        results.append(SearchResult(
+            page=page,
+            index=index,
+            title=item["title"],
+            link=item["link"],
+            abstract=item["abstract"],
+            keywords=meta.split(" - ")[-1] if meta else "",
+            authors=meta.split(" - ")[0] if meta else "",
+        ))
+    return results
+
+
+class ChromeFetcher:
+    """一个无头Chrome实例，每个工作线程独占一个"""
+
+    def __init__(self, driver_path: str = "/usr/local/bin/chromedriver"):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        self.driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+
+    def fetch(self, url: str) -> str:
+        self.driver.get(url)
+        return self.driver.page_source
+
+    def close(self):
+        self.driver.quit()
+
+
+class UrllibFetcher:
+    """不启动浏览器，直接用urllib抓取
+
+    用于对接本地静态HTML替身（file:// 或 python -m http.server），方便离线调试整条流水线。
+    """
+
+    def __init__(self, timeout: float = 30):
+        self.timeout = timeout
+
+    def fetch(self, url: str) -> str:
+        with urllib.request.urlopen(url, timeout=self.timeout) as resp:
+            charset = resp.headers.get_content_charset() or "utf-8"
+            return resp.read().decode(charset, errors="replace")
+
+    def close(self):
+        pass
+
+
+class BrowserPool:
+    """浏览器工作池：每个线程懒创建一个抓取器，结束时统一关闭"""
+
+    def __init__(self, factory: Callable[[], object]):
+        self.factory = factory
+        self._local = threading.local()
+        self._created = []
+        self._lock = threading.Lock()
+
+    def fetch(self, url: str) -> str:
+        fetcher = getattr(self._local, "fetcher", None)
+        if fetcher is None:
+            fetcher = self.factory()
+            self._local.fetcher = fetcher
+            with self._lock:
+                self._created.append(fetcher)
+        return fetcher.fetch(url)
+
+    def close(self):
+        with self._lock:
+            fetchers, self._created = self._created, []
+        for fetcher in fetchers:
+            try:
+                fetcher.close()
+            except Exception as e:
+                logger.warning(f"关闭浏览器失败: {e}")
+
+
+class HostRateLimiter:
+    """按域名限速：同一域名两次请求之间至少间隔 min_interval 秒"""
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class CrawlCheckpoint:
+    """持久化的待爬队列(frontier)与已抓取链接集合
+
+    每完成一个任务就原子地写回 frontier，进程崩溃后可从断点继续。
+    正在执行中的任务也保留在 frontier 里，恢复时会重新执行。
+    已抓取链接逐行追加到 <断点文件>.links，不随每个任务整体重写。
+    frontier 清空后调用 clear 删除断点，再次运行同一查询时从头开始。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.links_path = path + ".links"
+        self.query = ""
+        self.frontier: "OrderedDict[str, dict]" = OrderedDict()
+        self.fetched_links = set()
+        self.resumed = False
+        self._links_file = None
+
+    def load(self, query: str) -> bool:
+        """加载同一查询的断点，返回是否成功恢复"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("query") != query:
+            logger.info("断点文件属于其他查询，忽略")
+            return False
+        self.query = query
+        self.frontier = OrderedDict((self.task_key(t), t) for t in state.get("frontier", []))
+        # 旧版断点把已抓取链接存在 JSON 里
+        self.fetched_links = set(state.get("fetched_links", []))
+        if os.path.exists(self.links_path):
+            with open(self.links_path, "r", encoding="utf-8") as f:
+                self.fetched_links.update(line.rstrip("\n") for line in f if line.strip())
+        self.resumed = True
+        return True
+
+    def save(self):
+        state = {
+            "query": self.query,
+            "frontier": list(self.frontier.values()),
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def add_link(self, link: str):
+        """记录已抓取的链接，追加写入链接文件"""
+        if link in self.fetched_links:
+            return
+        self.fetched_links.add(link)
+        if self._links_file is None:
+            self._links_file = open(self.links_path, "a", encoding="utf-8")
+        self._links_file.write(link + "\n")
+        self._links_file.flush()
+
+    def close(self):
+        if self._links_file is not None:
+            self._links_file.close()
+            self._links_file = None
+
+    def clear(self):
+        """删除断点文件和链接文件：爬取完成后，或开始新的查询前"""
+        self.close()
+        for path in (self.path, self.links_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.frontier.clear()
+        self.fetched_links.clear()
+        self.resumed = False
+
+    @staticmethod
+    def task_key(task: dict) -> str:
+        if task["kind"] == "search":
+            return f"search:{task['page']}"
+        return f"detail:{task['result']['link']}"
+
+    def add(self, task: dict):
+        self.frontier.setdefault(self.task_key(task), task)
+
+    def done(self, task: dict):
+        self.frontier.pop(self.task_key(task), None)
+
+
+class ScholarCrawler:
+    """谷歌学术爬取流水线
+
+    - 多个浏览器并行抓取搜索页和详情页，不再 get/back 来回跳转
+    - 搜索页与详情页任务都记录在断点文件中，可中断后继续
+    - 按域名限速，已抓取过的链接不会重复抓取
+    - raw 模式的网页源码存入压缩的内容寻址存储，CSV 里只有元数据和内容键
+    """
+
+    def __init__(self, query: str, mode: str = "link", pages: int = 50,
+                 output: Optional[str] = None, checkpoint: Optional[str] = None,
+                 workers: int = 4, min_interval: float = 1.0,
+                 base_url: str = BASE_URL, fetcher_factory: Optional[Callable[[], object]] = None,
+                 max_retries: int = 2, blob_store: Optional[BlobStore] = None):
+        if mode not in HEADERS:
+            raise ValueError(f"未知的爬取模式: {mode}")
+        self.query = query
+        self.mode = mode
+        self.pages = pages
+        self.output = output or {"link": "output.csv", "raw": "output_raw.csv"}[mode]
+        self.checkpoint = CrawlCheckpoint(checkpoint or self.output + ".checkpoint.json")
+        self.workers = workers
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.rate_limiter = HostRateLimiter(min_interval)
+        self.pool = BrowserPool(fetcher_factory or ChromeFetcher)
+        # raw 模式下网页源码压缩存入 BlobStore，CSV 只记录内容键
+        self.blob_store = blob_store or BlobStore()
+
+    def _fetch(self, url: str) -> str:
+        self.rate_limiter.wait(url)
+        return self.pool.fetch(url)
+
+    def _run_task(self, task: dict):
+        if task["kind"] == "search":
+            page = task["page"]
+            html = self._fetch(self.base_url.format(page * 10, self.query))
+            return parse_result_page(html, page + 1)
+        result = SearchResult(**task["result"])
+        return self.blob_store.put(self._fetch(result.link))
+
+    def _row(self, result: SearchResult, content: str = "") -> list:
+        if self.mode == "link":
+            return [result.page, result.index, result.title, result.link,
+                    result.abstract, result.keywords, result.authors]
+        return [result.page, result.index, result.title, result.link, content]
+
+    def run(self):
+        """执行爬取，返回本次写入的行数"""
+        if not self.checkpoint.load(self.query):
+            # 其他查询留下的断点和链接文件不再有用
+            self.checkpoint.clear()
+            self.checkpoint.query = self.query
+            for page in range(self.pages):
+                self.checkpoint.add({"kind": "search", "page": page, "attempts": 0})
+            self.checkpoint.save()
+
+        resume = self.checkpoint.resumed and os.path.exists(self.output)
+        written = 0
+        with open(self.output, "a" if resume else "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            if not resume:
+                writer.writerow(HEADERS[self.mode])
+
+            pending = list(self.checkpoint.frontier.values())
+            in_flight = {}
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    while pending or in_flight:
+                        while pending and len(in_flight) < self.workers * 2:
+                            task = pending.pop(0)
+                            in_flight[executor.submit(self._run_task, task)] = task
+
+                        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            task = in_flight.pop(future)
+                            try:
+                                outcome = future.result()
+                            except Exception as e:
+                                task["attempts"] = task.get("attempts", 0) + 1
+                                if task["attempts"] <= self.max_retries:
+                                    logger.warning(f"任务 {CrawlCheckpoint.task_key(task)} 失败，稍后重试: {e}")
+                                    pending.append(task)
+                                else:
+                                    logger.error(f"任务 {CrawlCheckpoint.task_key(task)} 多次失败，放弃: {e}")
+                                    self.checkpoint.done(task)
+                                    self.checkpoint.save()
+                                continue
+
+                            if task["kind"] == "search":
+                                written += self._handle_search(task, outcome, writer, pending)
+                            else:
+                                result = SearchResult(**task["result"])
+                                writer.writerow(self._row(result, outcome))
+                                self.checkpoint.add_link(result.link)
+                                written += 1
+                            file.flush()
+                            self.checkpoint.done(task)
+                            self.checkpoint.save()
+            finally:
+                self.pool.close()
+                self.checkpoint.close()
+
+        if not self.checkpoint.frontier:
+            # 断点只用于中断后继续，完成后删除，再次运行同一查询时重新爬取
+            self.checkpoint.clear()
+            logger.info(f"爬取完成，共写入 {written} 行")
+        return written
+
+    def _handle_search(self, task: dict, results: List[SearchResult], writer, pending: list) -> int:
+        """处理一页搜索结果：直接写出或派生详情页任务"""
+        logger.info(f"第 {task['page'] + 1} 页解析到 {len(results)} 条结果")
+        written = 0
+        for result in results:
+            if result.link and result.link in self.checkpoint.fetched_links:
+                continue
+            if self.mode == "link" or not result.link:
+                writer.writerow(self._row(result))
+                if result.link:
+                    self.checkpoint.add_link(result.link)
+                written += 1
+                continue
+            detail = {"kind": "detail", "result": asdict(result), "attempts": 0}
+            key = CrawlCheckpoint.task_key(detail)
+            if key not in self.checkpoint.frontier:
+                self.checkpoint.add(detail)
+                pending.append(detail)
+        return written
+
+
+def build_arg_parser(mode: str = "link", default_pages: int = 50) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='读取搜索内容')
+    parser.add_argument('-q', '--query', required=True, help='搜索内容')
+    parser.add_argument('-m', '--mode', choices=sorted(HEADERS), default=mode,
+                        help='link: 只保存结果页信息; raw: 保存详情页源码')
+    parser.add_argument('-o', '--output', help='输出CSV文件')
+    parser.add_argument('-p', '--pages', type=int, default=default_pages, help='爬取的搜索结果页数')
+    parser.add_argument('-w', '--workers', type=int, default=4, help='并行浏览器数量')
+    parser.add_argument('--interval', type=float, default=1.0, help='同一域名两次请求的最小间隔(秒)')
+    parser.add_argument('--checkpoint', help='断点文件路径，默认为 <输出文件>.checkpoint.json')
+    parser.add_argument('--base-url', default=BASE_URL, help='搜索页URL模板，可指向本地静态HTML替身')
+    parser.add_argument('--no-browser', action='store_true', help='不启动Chrome，直接用urllib抓取(用于本地替身)')
+    parser.add_argument('--blob-dir', default='raw_pages', help='raw 模式下网页源码的存储目录')
+    return parser
+
+
+def crawler_from_args(args: argparse.Namespace, output: Optional[str] = None) -> ScholarCrawler:
+    """根据命令行参数构造爬虫"""
+    q = args.query
+    if len(q) == 0:
+        q = "Privacy+Preserving+Computing"
+    return ScholarCrawler(
+        query=q,
+        mode=args.mode,
+        pages=args.pages,
+        output=output or args.output,
+        checkpoint=args.checkpoint,
+        workers=args.workers,
+        min_interval=args.interval,
+        base_url=args.base_url,
+        fetcher_factory=UrllibFetcher if args.no_browser else None,
+        blob_store=BlobStore(args.blob_dir),
+    )
+
+
+def main(mode: str = "link", default_pages: int = 50):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = build_arg_parser(mode, default_pages).parse_args()
+    crawler_from_args(args).run()
+
+
+if __name__ == "__main__":
+    main()
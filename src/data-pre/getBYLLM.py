@@ -1,52 +1,24 @@
-import csv
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import NoSuchElementException
-import argparse
+import logging
 
-from llm import gen_abstract
+from crawler import build_arg_parser, crawler_from_args
+from blobstore import BlobStore
+from summarize import Summarizer, SummaryCache, load_client, summarize_csv
 
-parser = argparse.ArgumentParser(description='读取搜索内容')
-parser.add_argument('-q', '--query', required=True, help='搜索内容')
-args = parser.parse_args()
-q = args.query
-if len(q) == 0:
-    q = "Privacy+Preserving+Computing"
+# 先爬取网页源码(output_raw.csv)，再作为独立阶段并发生成大模型摘要，输出 output_llm.csv
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = build_arg_parser(mode="raw", default_pages=1)
+    parser.add_argument('--raw-output', default='output_raw.csv', help='中间结果：网页源码CSV')
+    parser.add_argument('--llm-workers', type=int, default=4, help='并发摘要请求数')
+    parser.add_argument('--cache-dir', default='.summary_cache', help='摘要缓存目录')
+    parser.add_argument('--client', help='摘要函数 "module:function"，默认 llm:gen_abstract')
+    args = parser.parse_args()
+    args.mode = "raw"
 
-chrome_options = Options()
-chrome_options.add_argument("--headless")
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-service = Service('/usr/local/bin/chromedriver')
-driver = webdriver.Chrome(service=service, options=chrome_options)
-with open('output_llm.csv', 'w', newline='') as file:
-    writer = csv.writer(file)
-    writer.writerow(["Page", "Result", "Title", "Link", "Abstract_With_LLM"])
-    try:
-        base_url = "https://scholar.google.com.hk/scholar?start={}&q={}&hl=zh-CN&as_sdt=0,5"
-        for i in range(1):
-            driver.get(base_url.format(i*10, q))
-            results = driver.find_elements(By.CSS_SELECTOR, "div.gs_ri")
-            print("Search results loaded.")
-            for index, result in enumerate(results, start=1):
-                try:
-                    title = result.find_element(By.CSS_SELECTOR, "h3.gs_rt a").text
-                except NoSuchElementException:
-                    title = ""
-                try:
-                    link = result.find_element(By.CSS_SELECTOR, "h3.gs_rt a").get_attribute('href')
-                except NoSuchElementException:
-                    link = ""
-                if len(link) > 0:
-                    driver.get(link)
-                    html_source = driver.page_source
-                else:
-                    html_source = ""
-                html_source = gen_abstract(html_source)
-                writer.writerow([i+1, index, title, link, html_source])
-                if len(link) > 0:
-                    driver.back()
-    finally:
-        driver.quit()
\ No newline at end of file
+    crawler_from_args(args, output=args.raw_output).run()
+    summarizer = Summarizer(
+        client=load_client(args.client),
+        cache=SummaryCache(args.cache_dir),
+        workers=args.llm_workers,
+    )
+    summarize_csv(args.raw_output, args.output or 'output_llm.csv', summarizer, BlobStore(args.blob_dir))
@@ -0,0 +1,249 @@
+import argparse
+import csv
+import hashlib
+import importlib
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from blobstore import BlobStore
+
+logger = logging.getLogger(__name__)
+
+# 送给大模型的正文最大长度，超出部分截断
+MAX_TEXT_CHARS = 6000
+
+
+class MainTextExtractor(HTMLParser):
+    """从网页源码中提取正文文本，丢弃脚本、样式、导航等无关内容"""
+    SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav",
+                 "header", "footer", "aside", "form", "button", "select"}
+    BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "br", "tr",
+                  "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "td"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._skip_depth = 0
+        self._parts: List[str] = []
+        self.title = ""
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth > 0:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif self._skip_depth == 0:
+            self._parts.append(data)
+
+    def text(self) -> str:
+        lines = (" ".join(line.split()) for line in "".join(self._parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def html_to_text(html: str, max_chars: int = MAX_TEXT_CHARS) -> str:
+    """把网页源码压缩为正文文本，避免把整页HTML发给大模型"""
+    if not html:
+        return ""
+    extractor = MainTextExtractor()
+    try:
+        extractor.feed(html)
+        extractor.close()
+    except Exception as e:
+        # 极少数畸形页面解析失败时，退化为粗暴去标签
+        logger.warning(f"HTML解析失败，退化为去标签: {e}")
+        return re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", html)).strip()[:max_chars]
+
+    text = extractor.text()
+    title = " ".join(extractor.title.split())
+    if title and not text.startswith(title):
+        text = f"{title}\n{text}"
+    return text[:max_chars]
+
+
+class SummaryCache:
+    """以正文内容哈希为键的磁盘缓存，重复运行时相同页面不再调用大模型"""
+
+    def __init__(self, cache_dir: str = ".summary_cache"):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".txt")
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, summary: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 多个工作线程可能同时写同一个键，临时文件按进程和线程区分
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(summary)
+        os.replace(tmp_path, path)
+
+
+def load_client(spec: Optional[str] = None) -> Callable[[str], str]:
+    """加载摘要客户端，spec 形如 "module:function"，默认使用 llm.gen_abstract"""
+    if not spec:
+        from llm import gen_abstract
+        return gen_abstract
+    module_name, _, func_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), func_name or "gen_abstract")
+
+
+class Summarizer:
+    """大模型摘要阶段：正文抽取 + 并发请求 + 失败退避重试 + 磁盘缓存
+
+    Args:
+        client: 摘要函数，输入正文返回摘要；可替换为本地桩函数用于调试
+        cache: 摘要缓存，为 None 时不缓存
+        workers: 并发请求数上限
+        max_retries: 单条请求失败后的最大重试次数
+        backoff: 首次重试前的等待秒数，之后按指数增长
+    """
+
+    def __init__(self, client: Callable[[str], str], cache: Optional[SummaryCache] = None,
+                 workers: int = 4, max_retries: int = 3, backoff: float = 1.0):
+        self.client = client
+        self.cache = cache
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def summarize(self, html: str) -> str:
+        """为单个网页生成摘要"""
+        text = html_to_text(html)
+        if not text:
+            return ""
+        key = SummaryCache.key(text)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        summary = self._call_with_retry(text)
+        if self.cache is not None:
+            self.cache.put(key, summary)
+        return summary
+
+    def _call_with_retry(self, text: str) -> str:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.client(text)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                logger.warning(f"摘要请求失败，{delay:.1f}秒后重试: {e}")
+                time.sleep(delay)
+
+    def summarize_many(self, pages: Iterable[Any],
+                       loader: Optional[Callable[[Any], str]] = None) -> Iterable[Optional[str]]:
+        """并发为多个网页生成摘要，按输入顺序返回；重试后仍失败的页面返回 None
+
+        失败的摘要不写入缓存，重新运行时只有这些页面会再次请求大模型。
+
+        loader 用于在工作线程中把 pages 的元素加载为网页源码（如按内容键读取），
+        这样同一时刻只有正在处理的网页驻留内存。
+        """
+        def safe_summarize(page: Any) -> str:
+            try:
+                return self.summarize(loader(page) if loader else page)
+            except Exception as e:
+                logger.error(f"摘要生成失败: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # map 会按顺序产出结果，同时最多有 workers 个请求在进行
+            yield from executor.map(safe_summarize, pages)
+
+
+def summarize_csv(input_path: str, output_path: str, summarizer: Summarizer,
+                  blob_store: Optional[BlobStore] = None) -> int:
+    """读取 output_raw.csv，生成 output_llm.csv，返回写入行数
+
+    output_raw.csv 只含元数据和内容键，网页源码在工作线程中按键从 blob_store 逐页读取；
+    旧格式中直接内嵌在 HTML 列的源码仍然兼容。
+    生成失败的行摘要留空，结束时列出这些行的链接；成功的摘要已缓存，重新运行即只重试失败的行。
+    """
+    blob_store = blob_store or BlobStore()
+    csv.field_size_limit(sys.maxsize)
+    with open(input_path, "r", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    def load_page(row: Dict[str, str]) -> str:
+        if row.get("Blob"):
+            return blob_store.get(row["Blob"])
+        return row.get("HTML", "")
+
+    written, failed = 0, []
+    with open(output_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Page", "Result", "Title", "Link", "Abstract_With_LLM"])
+        summaries = summarizer.summarize_many(rows, loader=load_page)
+        for row, summary in zip(rows, summaries):
+            if summary is None:
+                failed.append(row.get("Link") or row["Title"])
+            writer.writerow([row["Page"], row["Result"], row["Title"], row.get("Link", ""), summary or ""])
+            written += 1
+    if failed:
+        logger.error(f"{len(failed)} 行摘要生成失败，摘要留空，重新运行可重试: " + ", ".join(failed))
+    return written
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='为爬取到的网页生成大模型摘要')
+    parser.add_argument('-i', '--input', default='output_raw.csv', help='get_raw_html.py 的输出')
+    parser.add_argument('-o', '--output', default='output_llm.csv', help='摘要输出CSV')
+    parser.add_argument('-w', '--workers', type=int, default=4, help='并发请求数')
+    parser.add_argument('--retries', type=int, default=3, help='失败重试次数')
+    parser.add_argument('--cache-dir', default='.summary_cache', help='摘要缓存目录')
+    parser.add_argument('--blob-dir', default='raw_pages', help='网页源码存储目录')
+    parser.add_argument('--client', help='摘要函数 "module:function"，默认 llm:gen_abstract')
+    return parser
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = build_arg_parser().parse_args()
+    summarizer = Summarizer(
+        client=load_client(args.client),
+        cache=SummaryCache(args.cache_dir),
+        workers=args.workers,
+        max_retries=args.retries,
+    )
+    written = summarize_csv(args.input, args.output, summarizer, BlobStore(args.blob_dir))
+    logger.info(f"摘要完成，共写入 {written} 行")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""实体链接：在问题中找出专家姓名和论文标题，解析为节点id
+
+用全部专家的 name、name_zh 和论文标题构建 Aho–Corasick 自动机（不区分大小写），
+对问题做一次线性扫描即可找出所有提及，取最左最长且互不重叠的匹配。
+英文提及要求两端不与字母数字相连，避免 "Li" 命中 "Lisa"。
+处理方法拿到id后按 id 查询，不再用 CONTAINS 做不走索引的子串扫描。
+"""
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+# 英文提及的最短长度，过短的姓名（如 "Li"）误匹配太多；中文姓名不受此限制
+MIN_LATIN_LENGTH = 3
+
+
+@dataclass
+class Mention:
+    """问题中的一个实体提及"""
+    text: str
+    start: int
+    end: int
+    kind: str  # "expert" 或 "publication"
+    ids: List[str]
+
+
+def _fold(ch: str) -> str:
+    """单个字符转小写，少数转小写后长度变化的字符保持原样，保证匹配位置与原文一致"""
+    lower = ch.lower()
+    return lower if len(lower) == 1 else ch
+
+
+class AhoCorasick:
+    """多模式串匹配自动机，模式串和文本都按小写处理"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 以该节点结尾的模式串下标，以及沿失败链最近的有输出的节点
+        self._output: List[int] = [-1]
+        self._dict_link: List[int] = [0]
+        self.patterns: List[str] = []
+        self._built = False
+
+    def add(self, pattern: str) -> int:
+        """加入模式串，返回其下标；重复加入返回已有下标"""
+        node = 0
+        for ch in map(_fold, pattern):
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(-1)
+                self._dict_link.append(0)
+            node = nxt
+        if self._output[node] < 0:
+            self._output[node] = len(self.patterns)
+            self.patterns.append(pattern)
+        self._built = False
+        return self._output[node]
+
+    def build(self):
+        """按层计算失败链接"""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+            self._dict_link[node] = 0
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                fallback = self._fail[child]
+                self._dict_link[child] = fallback if self._output[fallback] >= 0 else self._dict_link[fallback]
+                queue.append(child)
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterable[Tuple[int, int, int]]:
+        """产出 (起点, 终点, 模式串下标)"""
+        if not self._built:
+            self.build()
+        node = 0
+        for i, ch in enumerate(map(_fold, text)):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            out = node if self._output[node] >= 0 else self._dict_link[node]
+            while out:
+                index = self._output[out]
+                yield i + 1 - len(self.patterns[index]), i + 1, index
+                out = self._dict_link[out]
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+class EntityLinker:
+    """专家姓名和论文标题的词典及链接"""
+
+    def __init__(self):
+        self.automaton = AhoCorasick()
+        # 模式串下标 -> [(实体类型, id)]，同名专家对应多个id
+        self._targets: List[List[Tuple[str, str]]] = []
+
+    def add(self, surface: str, kind: str, entity_id: str):
+        surface = " ".join((surface or "").split())
+        if not surface or entity_id is None:
+            return
+        if surface.isascii() and len(surface) < MIN_LATIN_LENGTH:
+            return
+        index = self.automaton.add(surface)
+        if index == len(self._targets):
+            self._targets.append([])
+        target = (kind, str(entity_id))
+        if target not in self._targets[index]:
+            self._targets[index].append(target)
+
+    @classmethod
+    def from_rows(cls, experts: Iterable[Dict[str, Any]], publications: Iterable[Dict[str, Any]]) -> "EntityLinker":
+        """experts 行含 id/name/name_zh，publications 行含 id/title"""
+        linker = cls()
+        for row in experts:
+            linker.add(row.get("name"), "expert", row.get("id"))
+            linker.add(row.get("name_zh"), "expert", row.get("id"))
+        for row in publications:
+            linker.add(row.get("title"), "publication", row.get("id"))
+        linker.automaton.build()
+        return linker
+
+    def find(self, text: str) -> List[Mention]:
+        """找出文本中所有实体提及，重叠时保留最左最长的匹配"""
+        candidates = []
+        for start, end, index in self.automaton.iter_matches(text):
+            if start > 0 and _is_word_char(text[start]) and _is_word_char(text[start - 1]):
+                continue
+            if end < len(text) and _is_word_char(text[end - 1]) and _is_word_char(text[end]):
+                continue
+            candidates.append((start, -end, index))
+
+        mentions = []
+        covered = 0
+        for start, neg_end, index in sorted(candidates):
+            if start < covered:
+                continue
+            covered = -neg_end
+            by_kind: Dict[str, List[str]] = {}
+            for kind, entity_id in self._targets[index]:
+                by_kind.setdefault(kind, []).append(entity_id)
+            for kind, ids in by_kind.items():
+                mentions.append(Mention(text[start:covered], start, covered, kind, ids))
+        return mentions
+
+
+_linkers: Dict[Hashable, Tuple[Any, EntityLinker]] = {}
+_linkers_lock = threading.Lock()
+
+
+def shared_linker(source: Hashable, version: Any,
+                  loader: Callable[[], Tuple[Iterable[Dict[str, Any]], Iterable[Dict[str, Any]]]]) -> EntityLinker:
+    """同一数据源在进程内共用一个链接器，图版本变化后重建
+
+    Args:
+        source: 数据源标识，如数据库地址
+        version: 当前图版本
+        loader: 返回 (专家行, 论文行)
+    """
+    with _linkers_lock:
+        cached = _linkers.get(source)
+        if cached is None or cached[0] != version:
+            experts, publications = loader()
+            cached = _linkers[source] = (version, EntityLinker.from_rows(experts, publications))
+        return cached[1]
@@ -0,0 +1,239 @@
+"""合成与 data/demo-time.json 同构的主题数据，用于大规模基准和压测
+
+分布特征：
+- 研究领域热度服从 Zipf 分布，真实数据中的领域排在最前面，保证示例问题能命中
+- 合著关系按优先连接生成，论文多的作者更容易再获得合作，作者产出呈幂律分布
+- 发表年份按指数增长分布，越近的年份论文越多
+- 专家和论文逐条流式写出，可直接生成数百万节点的数据文件
+
+    python src/gen_synthetic.py --experts 1000000 --publications 3000000 --shards 10 -o data/synthetic.json
+    python src/import_to_neo4j.py data/synthetic-*.json
+    python src/benchmark.py --no-load
+"""
+import argparse
+import bisect
+import itertools
+import json
+import math
+import os
+import random
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_NAMES = ["Wei", "Jing", "Li", "Ming", "Hui", "Yan", "Tao", "Jun", "Xin", "Lei",
+               "John", "Maria", "David", "Anna", "Robert", "Laura", "Peter", "Sara", "Thomas", "Emma",
+               "Ehud", "Albert", "Kees", "Emiel", "Robert", "Claire", "Ivan", "Yuki", "Hiroshi", "Olga",
+               "Ahmed", "Fatima", "Carlos", "Lucia", "Marco", "Elena", "Jan", "Eva", "Noah", "Mia"]
+LAST_NAMES = ["Wang", "Li", "Zhang", "Liu", "Chen", "Yang", "Huang", "Zhao", "Wu", "Zhou",
+              "Smith", "Johnson", "Brown", "Garcia", "Miller", "Davis", "Martin", "Bernard", "Rossi", "Muller",
+              "Reiter", "Dale", "Gatt", "Krahmer", "Deemter", "Tanaka", "Suzuki", "Ivanov", "Novak", "Silva",
+              "Kim", "Park", "Nguyen", "Singh", "Kumar", "Hassan", "Cohen", "Jensen", "Larsen", "Costa"]
+TOPIC_WORDS = ["Learning", "Language", "Vision", "Graph", "Network", "Retrieval", "Generation", "Reasoning",
+               "Optimization", "Security", "Privacy", "Robotics", "Speech", "Knowledge", "Semantic",
+               "Distributed", "Quantum", "Neural", "Statistical", "Interactive", "Computational", "Mining"]
+TOPIC_SUFFIXES = ["Systems", "Models", "Analysis", "Theory", "Methods", "Processing", "Representation",
+                  "Inference", "Architecture", "Computing"]
+TITLE_WORDS = ["towards", "efficient", "robust", "scalable", "a", "study", "of", "for", "with", "using",
+               "adaptive", "unified", "framework", "approach", "evaluation", "benchmark", "deep", "sparse"]
+POSITIONS = ["", "", "", "Professor", "Associate Professor", "Assistant Professor", "Researcher", "PhD Student"]
+
+
+class ZipfSampler:
+    """按 1/rank^s 权重抽样下标"""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.rng = rng
+        self.cum_weights = list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+    def sample(self) -> int:
+        return bisect.bisect_left(self.cum_weights, self.rng.random() * self.cum_weights[-1])
+
+
+def load_seed_interests(seed_file: str) -> List[str]:
+    """读取真实数据中的研究领域，按出现次数降序"""
+    if not seed_file or not os.path.exists(seed_file):
+        return []
+    with open(seed_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    counts: Dict[str, int] = {}
+    for expert in data.get('experts', []):
+        for interest in expert.get('interests', []):
+            counts[interest] = counts.get(interest, 0) + 1
+    return sorted(counts, key=lambda name: -counts[name])
+
+
+def build_interests(count: int, seed_interests: List[str], rng: random.Random) -> List[str]:
+    """生成 count 个不重复的领域名称，真实领域在前"""
+    interests = list(dict.fromkeys(seed_interests))[:count]
+    seen = set(interests)
+    while len(interests) < count:
+        words = rng.sample(TOPIC_WORDS, rng.choice([1, 2]))
+        name = " ".join(words + [rng.choice(TOPIC_SUFFIXES)])
+        if name in seen:
+            name = f"{name} {len(interests)}"
+        seen.add(name)
+        interests.append(name)
+    return interests
+
+
+class SyntheticGraph:
+    """逐条生成专家与论文
+
+    Args:
+        experts: 专家数量
+        publications: 论文数量
+        interests: 领域数量
+        zipf_s: 领域热度的 Zipf 指数
+        attachment: 挑选作者时按已有论文数优先连接的概率，越大产出越集中
+        years: 年份范围（含两端）
+        growth: 每年论文数量的增长率
+    """
+
+    def __init__(self, experts: int, publications: int, interests: int, seed: int = 42,
+                 zipf_s: float = 1.1, attachment: float = 0.75,
+                 years: Tuple[int, int] = (1950, 2024), growth: float = 0.06,
+                 seed_interests: Optional[List[str]] = None):
+        self.rng = random.Random(seed)
+        self.n_experts = experts
+        self.n_publications = publications
+        self.interests = build_interests(interests, seed_interests or [], self.rng)
+        self.interest_sampler = ZipfSampler(len(self.interests), zipf_s, self.rng)
+        self.attachment = attachment
+        self.year_values = list(range(years[0], years[1] + 1))
+        self.year_weights = list(itertools.accumulate(
+            math.exp(growth * (year - years[0])) for year in self.year_values))
+        self.expert_names: List[str] = []
+        # 每次作者署名都追加一次作者下标，从中均匀抽样即等价于按署名次数加权
+        self._authorships: List[int] = []
+
+    @staticmethod
+    def expert_id(index: int) -> str:
+        return f"{index:024x}"
+
+    def _h_index(self) -> int:
+        return min(150, int(self.rng.paretovariate(1.8) * 4))
+
+    def experts(self) -> Iterator[Dict]:
+        for index in range(self.n_experts):
+            name = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+            self.expert_names.append(name)
+            interests = []
+            for _ in range(self.rng.randint(3, 10)):
+                interest = self.interests[self.interest_sampler.sample()]
+                if interest not in interests:
+                    interests.append(interest)
+            yield {
+                "id": self.expert_id(index),
+                "name": name,
+                "name_zh": "",
+                "position": self.rng.choice(POSITIONS),
+                "h_index": self._h_index(),
+                "interests": interests,
+            }
+
+    def _author_count(self) -> int:
+        # 大多数论文2~4位作者，少量大合作论文作者很多
+        return max(1, min(300, round(self.rng.lognormvariate(1.0, 0.7))))
+
+    def _pick_author(self) -> int:
+        if self._authorships and self.rng.random() < self.attachment:
+            return self.rng.choice(self._authorships)
+        return self.rng.randrange(self.n_experts)
+
+    def publications(self) -> Iterator[Dict]:
+        if not self.expert_names:
+            raise RuntimeError("需要先生成专家")
+        for index in range(self.n_publications):
+            authors = []
+            for _ in range(min(self._author_count(), self.n_experts)):
+                author = self._pick_author()
+                if author not in authors:
+                    authors.append(author)
+            self._authorships.extend(authors)
+            words = self.rng.sample(TITLE_WORDS, 4) + [self.rng.choice(self.interests).lower()]
+            year = self.year_values[bisect.bisect_left(
+                self.year_weights, self.rng.random() * self.year_weights[-1])]
+            yield {
+                "id": f"p{index:023x}",
+                "title": f"{' '.join(words).capitalize()} {index}",
+                "year": year,
+                "authors": [{"id": self.expert_id(a), "name": self.expert_names[a]} for a in authors],
+            }
+
+
+def write_items(f: IO[str], items: Iterator[Dict]):
+    """逐条写出JSON数组元素，不在内存中拼出整个文档"""
+    for i, item in enumerate(items):
+        f.write(("," if i else "") + "\n        " + json.dumps(item, ensure_ascii=False))
+
+
+def shard_paths(output: str, shards: int) -> List[str]:
+    if shards <= 1:
+        return [output]
+    stem, ext = os.path.splitext(output)
+    return [f"{stem}-{i:03d}{ext or '.json'}" for i in range(shards)]
+
+
+def split_count(total: int, parts: int) -> List[int]:
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def generate(args: argparse.Namespace) -> List[str]:
+    """生成数据并写出，返回写出的文件列表"""
+    graph = SyntheticGraph(
+        experts=args.experts,
+        publications=args.publications,
+        interests=args.interests,
+        seed=args.seed,
+        zipf_s=args.zipf,
+        attachment=args.attachment,
+        years=(args.start_year, args.end_year),
+        seed_interests=load_seed_interests(args.seed_data),
+    )
+    topic = {"id": 1, "name": "General and reference", "name_zh": "一般和参考", "level": 0,
+             "definition": "", "definition_zh": "", "child_nodes": [], "parent": 0}
+    header = json.dumps(topic, ensure_ascii=False, indent=4)[:-2]
+
+    # 分片时先把全部专家写进各分片，再写论文，保证优先连接时能看到完整的专家集合
+    paths = shard_paths(args.output, args.shards)
+    files = [open(path, 'w', encoding='utf-8') for path in paths]
+    try:
+        experts = graph.experts()
+        for f, count in zip(files, split_count(args.experts, len(files))):
+            f.write(header + ',\n    "experts": [')
+            write_items(f, itertools.islice(experts, count))
+            f.write('\n    ],\n    "publications": [')
+
+        publications = graph.publications()
+        for f, count in zip(files, split_count(args.publications, len(files))):
+            write_items(f, itertools.islice(publications, count))
+            f.write('\n    ]\n}\n')
+    finally:
+        for f in files:
+            f.close()
+
+    for path in paths:
+        print(f"已写出 {path}")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成大规模合成专家图谱数据')
+    parser.add_argument('--experts', type=int, default=10000)
+    parser.add_argument('--publications', type=int, default=30000)
+    parser.add_argument('--interests', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42, help='随机种子，相同参数生成相同数据')
+    parser.add_argument('--zipf', type=float, default=1.1, help='领域热度 Zipf 指数')
+    parser.add_argument('--attachment', type=float, default=0.75, help='合著优先连接概率')
+    parser.add_argument('--start-year', type=int, default=1950)
+    parser.add_argument('--end-year', type=int, default=2024)
+    parser.add_argument('--seed-data', default=os.path.join(ROOT_DIR, 'data', 'demo-time.json'),
+                        help='从中读取真实领域名称，排在热度最前')
+    parser.add_argument('--shards', type=int, default=1, help='拆分为多个文件，便于分批导入')
+    parser.add_argument('-o', '--output', default=os.path.join(ROOT_DIR, 'data', 'synthetic.json'))
+    generate(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
-from py2neo import Graph, Node, Relationship
+from py2neo import Graph
+import argparse
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import logging
 from pathlib import Path
 
+import queries
+
 class Neo4jImporter:
     def __init__(self, uri: str = "bolt://localhost:7687", 
                  user: str = "neo4j", 
-                 password: str = "password"):
+                 password: str = "password",
+                 batch_size: int = 1000):
         """
         初始化Neo4j连接
         
@@ -15,8 +19,14 @@ class Neo4jImporter:
             uri: Neo4j服务器地址
             user: 用户名
             password: 密码
+            batch_size: 批量导入时每个事务包含的记录数
         """
         self.graph = Graph(uri, auth=(user, password))
+        self.batch_size = batch_size
+        # import_batch 导入、等待 flush_updates 更新资料和排名的专家和论文id（dict 用作有序集合）
+        self._linked_experts: Dict[Any, None] = {}
+        self._authors: Dict[Any, None] = {}
+        self._publications: Dict[Any, None] = {}
         self.logger = self._setup_logger()
 
     def _setup_logger(self) -> logging.Logger:
@@ -27,12 +37,13 @@ class Neo4jImporter:
         )
         return logging.getLogger(__name__)
 
-    def import_data(self, json_file: str):
+    def import_data(self, json_file: str, clear: bool = True):
         """
         导入JSON数据到Neo4j
         
         Args:
             json_file: JSON文件路径
+            clear: 是否先清空现有数据库
         """
         try:
             # 读取JSON文件
@@ -40,16 +51,15 @@ class Neo4jImporter:
                 data = json.load(f)
 
             # 清空现有数据库(可选)
-            self.graph.run("MATCH (n) DETACH DELETE n")
+            if clear:
+                self.graph.run("MATCH (n) DETACH DELETE n")
+            self.ensure_indexes()
             
             # 创建主题节点
             self._create_topic_node(data)
             
-            # 创建专家节点及关系
-            self._create_expert_nodes(data)
-            
-            # 创建出版物节点及关系
-            self._create_publication_nodes(data)
+            # 批量创建专家、出版物节点及关系
+            self.import_batch(data['experts'], data['publications'], topic_id=data['id'])
             
             self.logger.info("数据导入完成")
             
@@ -57,73 +67,327 @@ class Neo4jImporter:
             self.logger.error(f"导入过程中出错: {str(e)}")
             raise
 
+    def ensure_indexes(self):
+        """为MERGE和按id查询用到的属性建立索引"""
+        for label, prop in [("Expert", "id"), ("Publication", "id"),
+                            ("Interest", "name"), ("Topic", "id")]:
+            self.graph.run(
+                f"CREATE INDEX {label.lower()}_{prop} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+            )
+
     def _create_topic_node(self, data: Dict[str, Any]):
         """创建主题节点"""
-        topic = Node("Topic",
-                    id=data['id'],
-                    name=data['name'],
-                    name_zh=data['name_zh'],
-                    level=data['level'])
-        self.graph.create(topic)
+        self.graph.run("""
+            MERGE (t:Topic {id: $id})
+            SET t.name = $name, t.name_zh = $name_zh, t.level = $level
+            """, id=data['id'], name=data['name'],
+            name_zh=data.get('name_zh', ''), level=data.get('level', 0))
         self.logger.info(f"创建主题节点: {data['name']}")
-        return topic
 
-    def _create_expert_nodes(self, data: Dict[str, Any]):
-        """创建专家节点及其关系"""
-        topic = self.graph.nodes.match("Topic", id=data['id']).first()
+    def import_batch(self, experts: List[Dict[str, Any]], publications: List[Dict[str, Any]],
+                     topic_id: Any = None, flush: bool = True):
+        """
+        批量导入专家和出版物，数据格式与主题JSON中的 experts / publications 相同
         
-        for expert_data in data['experts']:
-            # 创建专家节点
-            expert = Node("Expert",
-                        id=expert_data['id'],
-                        name=expert_data['name'],
-                        name_zh=expert_data.get('name_zh', ''),
-                        position=expert_data.get('position', ''),
-                        h_index=expert_data.get('h_index', 0))
-            self.graph.create(expert)
-            
-            # 创建专家与主题的关系
-            research_in = Relationship(expert, "RESEARCH_IN", topic)
-            self.graph.create(research_in)
-            
-            # 创建研究兴趣节点及关系
-            for interest in expert_data.get('interests', []):
-                interest_node = Node("Interest", name=interest)
-                self.graph.merge(interest_node, "Interest", "name")
-                
-                interested_in = Relationship(expert, "INTERESTED_IN", interest_node)
-                self.graph.create(interested_in)
-            
-            self.logger.info(f"创建专家节点: {expert_data['name']}")
-
-    def _create_publication_nodes(self, data: Dict[str, Any]):
-        """创建出版物节点及其关系"""
-        for pub_data in data['publications']:
-            # 创建出版物节点
-            publication = Node("Publication",
-                             id=pub_data['id'],
-                             title=pub_data['title'],
-                             year=pub_data.get('year', 0))  # 添加year属性，如果没有则默认为0
-            self.graph.create(publication)
-            
-            # 创建作者与出版物的关系
-            for author in pub_data['authors']:
-                # 查找或创建作者节点
-                expert = self.graph.nodes.match("Expert", id=author['id']).first()
-                if not expert:
-                    # 如果作者节点不存在，创建新的作者节点
-                    expert = Node("Expert",
-                                id=author['id'] if author['id'] else author['name'],  # 如果没有id则使用name作为id
-                                name=author['name'])
-                    self.graph.create(expert)
-                
-                # 创建作者与论文的关系
-                authored = Relationship(expert, "AUTHORED", publication)
-                self.graph.create(authored)
-            
-            self.logger.info(f"创建出版物节点: {pub_data['title'][:50]}...")
+        使用 UNWIND + MERGE，每批一次往返，重复导入同一数据是幂等的。
+        每批论文导入后随即更新其作者之间的 COAUTHOR 关系（见 update_coauthors）；
+        涉及的专家和论文只记下来，全部导入后由 flush_updates 统一更新专家资料和领域排名，
+        同一位专家出现在多批里也只重算一次。
+        
+        Args:
+            experts: 专家列表，可带 interests 字段
+            publications: 出版物列表，authors 中的作者没有id时以姓名作为id
+            topic_id: 若给出，则把 experts 关联到该主题
+            flush: 为 False 时不更新资料和排名，由调用方在若干次导入后调用 flush_updates
+        """
+        for start in range(0, len(experts), self.batch_size):
+            rows = [self._expert_row(e) for e in experts[start:start + self.batch_size]]
+            self.graph.run(self.EXPERT_BATCH_QUERY, rows=rows, topic_id=topic_id)
+            self._linked_experts.update(dict.fromkeys(row['id'] for row in rows))
+            self.logger.info(f"导入专家 {start + len(rows)}/{len(experts)}")
+
+        for start in range(0, len(publications), self.batch_size):
+            rows = [self._publication_row(p) for p in publications[start:start + self.batch_size]]
+            self.graph.run(self.PUBLICATION_BATCH_QUERY, rows=rows)
+            self.update_coauthors([row['id'] for row in rows])
+            self._authors.update(dict.fromkeys(author['id'] for row in rows for author in row['authors']))
+            self._publications.update(dict.fromkeys(row['id'] for row in rows))
+            self.logger.info(f"导入出版物 {start + len(rows)}/{len(publications)}")
+
+        if flush:
+            self.flush_updates()
+
+    def flush_updates(self):
+        """更新 import_batch 记下的专家的资料和所在领域的排名，然后更新图数据版本号
+
+        新关联了领域的专家，其全部论文并入领域排名；其余只有新论文的作者，只把新论文并入排名。
+        """
+        linked = list(self._linked_experts)
+        authors = [eid for eid in self._authors if eid not in self._linked_experts]
+        publications = list(self._publications)
+        if not linked and not authors:
+            return
+        for ids in self._chunks(linked + authors):
+            self.update_profiles(ids)
+        for ids in self._chunks(linked):
+            self.update_rankings(ids)
+        for ids in self._chunks(authors):
+            self.graph.run(self.EXPERT_RANKING_QUERY, ids=ids, k=self.RANKING_SIZE)
+        for ids in self._chunks(publications):
+            self.graph.run(self.PAPER_RANKING_BY_PUBLICATION_QUERY, ids=ids, k=self.RANKING_SIZE)
+        self.logger.info(f"更新专家资料和领域排名: 专家 {len(linked) + len(authors)} 位, 论文 {len(publications)} 篇")
+        self._linked_experts.clear()
+        self._authors.clear()
+        self._publications.clear()
+        self.bump_graph_version()
+
+    def _chunks(self, ids: List[Any]):
+        for start in range(0, len(ids), self.batch_size):
+            yield ids[start:start + self.batch_size]
+
+    def update_coauthors(self, publication_ids: List[Any]):
+        """把这些论文计入其作者两两之间的 COAUTHOR 关系
+
+        COAUTHOR 由 id 较小的专家指向较大的专家，记录首次、最近合作年份、合作次数和论文id，
+        已计入的论文不会重复计数，问答中的合作时间、次数类问题按专家对直接读取。
+        """
+        self.graph.run(self.COAUTHOR_BATCH_QUERY, ids=publication_ids)
+
+    def rebuild_coauthors(self):
+        """为已有数据补建 COAUTHOR 关系，重复运行是幂等的"""
+        ids = [r['id'] for r in self.graph.run("MATCH (p:Publication) RETURN p.id as id").data()]
+        for start in range(0, len(ids), self.batch_size):
+            self.update_coauthors(ids[start:start + self.batch_size])
+            self.logger.info(f"更新合作关系 {min(start + self.batch_size, len(ids))}/{len(ids)}")
+        # 资料中的主要合作者随合作关系变化
+        self.rebuild_profiles()
+
+    def update_profiles(self, expert_ids: List[Any]):
+        """重算这些专家的资料属性
+
+        资料冗余存放在专家节点上：研究领域、论文数、最近的 PROFILE_PAPERS 篇论文、
+        合作次数最多的 PROFILE_COAUTHORS 位合作者，问答中的专家问题按id一次读取。
+        """
+        self.graph.run(self.PROFILE_BATCH_QUERY, ids=expert_ids,
+                       papers=self.PROFILE_PAPERS, coauthors=self.PROFILE_COAUTHORS)
+
+    def rebuild_profiles(self):
+        """为已有数据补建专家资料，重复运行是幂等的"""
+        ids = [r['id'] for r in self.graph.run("MATCH (e:Expert) RETURN e.id as id").data()]
+        for start in range(0, len(ids), self.batch_size):
+            self.update_profiles(ids[start:start + self.batch_size])
+            self.logger.info(f"更新专家资料 {min(start + self.batch_size, len(ids))}/{len(ids)}")
+        self.bump_graph_version()
+
+    def update_rankings(self, expert_ids: List[Any], publication_ids: Optional[List[Any]] = None):
+        """把这些专家（及其论文）并入所在领域的排名
+
+        每个 Interest 上保存 h 指数最高的 RANKING_SIZE 位专家id和最近的 RANKING_SIZE 篇论文id，
+        只在原排名与本批候选之间重新排序，耗时与领域规模无关。
+        给出 publication_ids 时论文候选只取这些论文，否则取这些专家的全部论文。
+        专家 h 指数下降等使原排名变差的修改不会让排名外的专家补进来，需要时可用 rebuild_rankings 重算。
+        """
+        self.graph.run(self.EXPERT_RANKING_QUERY, ids=expert_ids, k=self.RANKING_SIZE)
+        if publication_ids is None:
+            self.graph.run(self.PAPER_RANKING_BY_EXPERT_QUERY, ids=expert_ids, k=self.RANKING_SIZE)
+        else:
+            self.graph.run(self.PAPER_RANKING_BY_PUBLICATION_QUERY, ids=publication_ids, k=self.RANKING_SIZE)
+
+    def rebuild_rankings(self):
+        """按领域全部专家和论文重算排名，重复运行是幂等的"""
+        names = [r['name'] for r in self.graph.run("MATCH (i:Interest) RETURN i.name as name").data()]
+        for start in range(0, len(names), self.batch_size):
+            self.graph.run(self.REBUILD_RANKINGS_QUERY, names=names[start:start + self.batch_size],
+                           k=self.RANKING_SIZE)
+            self.logger.info(f"更新领域排名 {min(start + self.batch_size, len(names))}/{len(names)}")
+        self.bump_graph_version()
+
+    def bump_graph_version(self):
+        """更新图数据版本号，问答系统据此让缓存的统计结果失效
+
+        版本号取写入时的毫秒时间戳，清空数据库后重新导入也不会与旧版本重复。
+        """
+        self.graph.run("""
+            MERGE (m:GraphMeta {id: 'graph'})
+            SET m.version = timestamp()
+            """)
+
+    EXPERT_BATCH_QUERY = """
+    UNWIND $rows AS row
+    MERGE (e:Expert {id: row.id})
+    SET e.name = row.name,
+        e.name_zh = coalesce(row.name_zh, e.name_zh, ''),
+        e.position = coalesce(row.position, e.position, ''),
+        e.h_index = coalesce(row.h_index, e.h_index, 0)
+    WITH e, row
+    OPTIONAL MATCH (t:Topic {id: $topic_id})
+    FOREACH (_ IN CASE WHEN t IS NULL THEN [] ELSE [1] END |
+        MERGE (e)-[:RESEARCH_IN]->(t))
+    WITH e, row
+    UNWIND row.interests AS interest
+    MERGE (i:Interest {name: interest})
+    MERGE (e)-[:INTERESTED_IN]->(i)
+    """
+
+    PUBLICATION_BATCH_QUERY = """
+    UNWIND $rows AS row
+    MERGE (p:Publication {id: row.id})
+    SET p.title = row.title, p.year = row.year
+    SET p += row.extra
+    WITH p, row
+    UNWIND row.authors AS author
+    MERGE (e:Expert {id: author.id})
+    ON CREATE SET e.name = author.name
+    MERGE (e)-[:AUTHORED]->(p)
+    WITH e, author
+    UNWIND author.interests AS interest
+    MERGE (i:Interest {name: interest})
+    MERGE (e)-[:INTERESTED_IN]->(i)
+    """
+
+    # 年份为0或缺失的论文只计次数，不影响首次、最近合作年份
+    COAUTHOR_BATCH_QUERY = """
+    UNWIND $ids AS pid
+    MATCH (p:Publication {id: pid})<-[:AUTHORED]-(a:Expert)
+    MATCH (p)<-[:AUTHORED]-(b:Expert)
+    WHERE a.id < b.id
+    MERGE (a)-[c:COAUTHOR]->(b)
+    ON CREATE SET c.count = 0, c.paper_ids = []
+    WITH p, c
+    WHERE NOT p.id IN c.paper_ids
+    WITH p, c, CASE WHEN p.year > 0 THEN p.year END AS year
+    SET c.paper_ids = c.paper_ids + p.id,
+        c.count = c.count + 1,
+        c.first_year = CASE WHEN c.first_year IS NULL OR year < c.first_year THEN year ELSE c.first_year END,
+        c.last_year = CASE WHEN c.last_year IS NULL OR year > c.last_year THEN year ELSE c.last_year END
+    """
+
+    PROFILE_PAPERS = 20
+    PROFILE_COAUTHORS = 5
+
+    PROFILE_BATCH_QUERY = """
+    UNWIND $ids AS eid
+    MATCH (e:Expert {id: eid})
+    CALL {
+        WITH e
+        OPTIONAL MATCH (e)-[:AUTHORED]->(p:Publication)
+        WITH p ORDER BY coalesce(p.year, 0) DESC
+        RETURN count(p) AS publication_count, collect(p.title)[..$papers] AS recent_papers
+    }
+    CALL {
+        WITH e
+        OPTIONAL MATCH (e)-[c:COAUTHOR]-(b:Expert)
+        WITH b, c ORDER BY c.count DESC
+        RETURN collect(b.name)[..$coauthors] AS top_coauthors
+    }
+    SET e.profile_interests = [(e)-[:INTERESTED_IN]->(i:Interest) | i.name],
+        e.publication_count = publication_count,
+        e.recent_papers = recent_papers,
+        e.top_coauthors = top_coauthors
+    """
+
+    RANKING_SIZE = queries.RANKING_SIZE
+
+    EXPERT_RANKING_QUERY = """
+    UNWIND $ids AS eid
+    MATCH (e:Expert {id: eid})-[:INTERESTED_IN]->(i:Interest)
+    WITH i, collect(e.id) AS candidates
+    CALL {
+        WITH i, candidates
+        UNWIND coalesce(i.top_expert_ids, []) + candidates AS cid
+        MATCH (e:Expert {id: cid})-[:INTERESTED_IN]->(i)
+        WITH DISTINCT e
+        ORDER BY coalesce(e.h_index, -1) DESC, e.id
+        RETURN collect(e.id)[..$k] AS top_expert_ids
+    }
+    SET i.top_expert_ids = top_expert_ids
+    """
+
+    # 论文排名的合并部分，候选论文由下面两条查询分别给出
+    _PAPER_RANKING_MERGE = """
+    WITH i, collect(DISTINCT p.id) AS candidates
+    CALL {
+        WITH i, candidates
+        UNWIND coalesce(i.recent_paper_ids, []) + candidates AS cid
+        MATCH (p:Publication {id: cid})
+        WITH DISTINCT p
+        ORDER BY coalesce(p.year, -1) DESC, p.title
+        RETURN collect(p.id)[..$k] AS recent_paper_ids
+    }
+    SET i.recent_paper_ids = recent_paper_ids
+    """
+
+    PAPER_RANKING_BY_EXPERT_QUERY = """
+    UNWIND $ids AS eid
+    MATCH (p:Publication)<-[:AUTHORED]-(:Expert {id: eid})-[:INTERESTED_IN]->(i:Interest)
+    """ + _PAPER_RANKING_MERGE
+
+    PAPER_RANKING_BY_PUBLICATION_QUERY = """
+    UNWIND $ids AS pid
+    MATCH (p:Publication {id: pid})<-[:AUTHORED]-(:Expert)-[:INTERESTED_IN]->(i:Interest)
+    """ + _PAPER_RANKING_MERGE
+
+    REBUILD_RANKINGS_QUERY = """
+    UNWIND $names AS name
+    MATCH (i:Interest {name: name})
+    CALL {
+        WITH i
+        MATCH (e:Expert)-[:INTERESTED_IN]->(i)
+        WITH e ORDER BY coalesce(e.h_index, -1) DESC, e.id
+        RETURN collect(e.id)[..$k] AS top_expert_ids
+    }
+    CALL {
+        WITH i
+        MATCH (i)<-[:INTERESTED_IN]-(:Expert)-[:AUTHORED]->(p:Publication)
+        WITH DISTINCT p
+        ORDER BY coalesce(p.year, -1) DESC, p.title
+        RETURN collect(p.id)[..$k] AS recent_paper_ids
+    }
+    SET i.top_expert_ids = top_expert_ids, i.recent_paper_ids = recent_paper_ids
+    """
+
+    @staticmethod
+    def _expert_row(expert_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": expert_data['id'],
+            "name": expert_data['name'],
+            "name_zh": expert_data.get('name_zh'),
+            "position": expert_data.get('position'),
+            "h_index": expert_data.get('h_index'),
+            "interests": list(expert_data.get('interests', [])),
+        }
+
+    @staticmethod
+    def _publication_row(pub_data: Dict[str, Any]) -> Dict[str, Any]:
+        # 标准字段之外的属性（如爬取得到的 link、abstract）原样写入论文节点
+        extra = {k: v for k, v in pub_data.items()
+                 if k not in ("id", "title", "year", "authors") and v is not None}
+        return {
+            "id": pub_data['id'],
+            "title": pub_data['title'],
+            "year": pub_data.get('year', 0),  # 添加year属性，如果没有则默认为0
+            "extra": extra,
+            "authors": [{
+                "id": author['id'] if author.get('id') else author['name'],  # 如果没有id则使用name作为id
+                "name": author['name'],
+                "interests": list(author.get('interests', [])),
+            } for author in pub_data['authors']],
+        }
 
 def main():
+    parser = argparse.ArgumentParser(description='导入主题JSON数据到Neo4j')
+    parser.add_argument('files', nargs='*', default=["data/demo-time.json"],
+                        help='JSON文件路径，可给出多个分片文件')
+    parser.add_argument('--append', action='store_true', help='不清空现有数据库，追加导入')
+    parser.add_argument('--no-precompute', action='store_true', help='导入后不重算统计快照')
+    parser.add_argument('--rebuild-coauthors', action='store_true',
+                        help='不导入文件，只为已有数据补建 COAUTHOR 关系和专家资料')
+    parser.add_argument('--rebuild-profiles', action='store_true',
+                        help='不导入文件，只为已有数据补建专家资料')
+    parser.add_argument('--rebuild-rankings', action='store_true',
+                        help='不导入文件，只重算各领域的专家和论文排名')
+    args = parser.parse_args()
+
     # Neo4j连接配置
     config = {
         "uri": "bolt://localhost:7687",
@@ -131,12 +395,25 @@ def main():
         "password": "123456"  # 替换为你的密码
     }
     
-    # JSON文件路径
-    json_file = "data/demo-time.json"
-    
-    # 创建导入器并执行导入
+    # 创建导入器并执行导入，多个分片时只在导入第一个文件前清空数据库
     importer = Neo4jImporter(**config)
-    importer.import_data(json_file)
+    if args.rebuild_coauthors:
+        importer.rebuild_coauthors()
+    elif args.rebuild_profiles:
+        importer.rebuild_profiles()
+    elif args.rebuild_rankings:
+        importer.rebuild_rankings()
+    else:
+        for index, json_file in enumerate(args.files):
+            importer.import_data(json_file, clear=index == 0 and not args.append)
+
+    # 导入后用新数据校验一遍查询目录，语句有误时在部署阶段就失败
+    queries.validate(importer.graph)
+
+    # 导入完成后重算统计快照，问答系统据此直接返回全图统计结果
+    if not args.no_precompute:
+        from precompute import precompute
+        precompute(importer.graph)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main() 
@@ -0,0 +1,300 @@
+"""轻量意图分类器
+
+问题中的实体先替换为占位符（[E] 专家、[F] 领域、[P] 论文），再取字符 1~3 元组，
+哈希到固定维度的特征向量，用 NumPy 上的 softmax 线性模型分类。单个问题分类耗时在几十微秒，
+批量分类只需一次矩阵乘法。置信度低于阈值时由 KnowledgeQA 回退到规则和正则匹配。
+
+训练数据来自按原有问题模式生成的模板，以及追踪文件中记录的线上问题（qa.route span 的
+qa.masked 和 qa.intent 属性）：
+
+    python src/intent_classifier.py                              # 只用模板训练
+    python src/intent_classifier.py --traces logs/traces.jsonl   # 加上线上问题
+
+    QA_INTENT_MODEL  模型文件路径，默认 data/intent_model.npz（随仓库提供）；文件不存在或意图列表
+                     与 TEMPLATES 不一致时用模板在内存中训练
+
+NumPy 只在加载、训练和分类时导入，不影响页面冷启动；KnowledgeQA 创建时调用 preload()
+在后台线程加载模型，第一个问题不必等待。
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import threading
+import zlib
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODEL = os.environ.get("QA_INTENT_MODEL") or os.path.join(ROOT_DIR, "data", "intent_model.npz")
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDERS = {"expert": "[E]", "field": "[F]", "publication": "[P]"}
+
+# 不属于任何可回答意图的问题，用于校准置信度
+OTHER = "other"
+
+TEMPLATES = {
+    "expert_by_interest": [
+        "谁研究了[F]领域", "谁研究[F]", "谁在研究[F]", "哪些人研究[F]", "研究[F]的有谁",
+        "有谁做[F]方向", "谁研究了[F]",
+    ],
+    "expert_interests": [
+        "[E]的研究领域是什么", "[E]的领域有哪些", "[E]研究什么", "[E]的研究方向是什么",
+        "[E]是做什么研究的", "[E]研究哪些方向", "[E]的领域",
+    ],
+    "expert_h_index": [
+        "[E]的h指数是多少", "[E]的h指数", "[E]的H指数是多少", "[E]的h-index是多少",
+        "[E]h指数多少", "[E]的h指数有多高",
+    ],
+    "expert_publications": [
+        "[E]发表了什么论文", "[E]发表了哪些论文", "[E]的论文有哪些", "[E]写过哪些文章",
+        "[E]有什么论文", "列出[E]的论文",
+    ],
+    "publication_authors": [
+        "[P]这篇论文的作者是谁", "[P]的作者是谁", "谁写了[P]", "[P]是谁写的", "[P]的作者有哪些",
+    ],
+    "publication_year": [
+        "[P]这篇论文发表在哪一年", "[P]是哪一年发表的", "[P]发表于哪年", "[P]的发表年份",
+        "[P]这篇论文哪年发表的",
+    ],
+    "publication_field": [
+        "[P]这篇论文属于什么领域", "[P]属于哪个领域", "[P]是哪个方向的论文", "[P]这篇论文属于哪些领域",
+    ],
+    "cooperation": [
+        "[E]和[E]有合作吗", "[E]和[E]有什么合作关系吗", "[E]与[E]合作过吗",
+        "[E]和[E]合作发表了哪些论文", "[E]跟[E]是合作者吗", "[E]和[E]有合作关系吗",
+    ],
+    "collaboration_path": [
+        "[E]和[E]之间怎么联系上", "[E]和[E]之间如何联系", "[E]怎么才能联系上[E]", "[E]到[E]的合作链",
+        "[E]和[E]之间的最短合作路径", "[E]和[E]之间怎样认识", "[E]和[E]之间隔了几个合作者",
+    ],
+    "top_experts_in_field": [
+        "[F]领域最强的专家有哪些", "[F]方向的专家", "[F]领域排名前的专家", "[F]领域最好的学者是谁",
+        "[F]方向h指数最高的专家", "[F]的顶尖研究员", "[F]研究最强的学者",
+    ],
+    "field_publications": [
+        "[F]领域的论文有哪些", "[F]方向的论文", "[F]领域的相关论文有哪些", "[F]相关的文章",
+        "关于[F]的论文", "[F]方向的论文有哪些",
+    ],
+    "recent_field_publications": [
+        "[F]最近的研究论文", "[F]领域最新的论文", "[F]近期论文有哪些", "[F]方向最近发表的文章",
+        "[F]最新研究论文",
+    ],
+    OTHER: [
+        "你好", "谢谢", "今天天气怎么样", "你是谁", "你能做什么", "帮我写一首诗", "[E]是谁",
+        "[F]是什么", "再见", "讲个笑话",
+    ],
+}
+
+PREFIXES = ["", "请问", "我想知道", "能告诉我"]
+SUFFIXES = ["", "？", "?", "呢", "呢？"]
+
+
+def mask_entities(text: str, tokens: Iterable) -> str:
+    """把分词结果中的实体替换为占位符，tokens 为 segmenter.Token"""
+    parts = []
+    position = 0
+    for token in tokens:
+        placeholder = PLACEHOLDERS.get(token.tag)
+        if placeholder:
+            parts.append(text[position:token.start])
+            parts.append(placeholder)
+            position = token.end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def template_samples() -> Tuple[List[str], List[str]]:
+    """由模板加上常见前后缀生成训练样本"""
+    texts, labels = [], []
+    for intent, templates in TEMPLATES.items():
+        for template, prefix, suffix in itertools.product(templates, PREFIXES, SUFFIXES):
+            texts.append(prefix + template + suffix)
+            labels.append(intent)
+    return texts, labels
+
+
+def trace_samples(path: str, labels: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """从追踪文件中读取已识别意图的线上问题"""
+    texts, intents = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                payload = json.loads(line)
+            except ValueError:
+                continue
+            for resource in payload.get("resourceSpans", []):
+                for scope in resource.get("scopeSpans", []):
+                    for span in scope.get("spans", []):
+                        if span.get("name") != "qa.route":
+                            continue
+                        attrs = {a["key"]: a["value"].get("stringValue") for a in span.get("attributes", [])}
+                        if attrs.get("qa.masked") and attrs.get("qa.intent") in labels:
+                            texts.append(attrs["qa.masked"])
+                            intents.append(attrs["qa.intent"])
+    return texts, intents
+
+
+class IntentClassifier:
+    """字符 n-gram 哈希特征 + softmax 线性模型
+
+    Args:
+        labels: 意图列表
+        dim: 哈希特征维度
+        threshold: 置信度阈值，低于它时调用方应回退到规则匹配
+    """
+
+    def __init__(self, labels: Sequence[str], dim: int = 4096, threshold: float = 0.6):
+        self.labels = list(labels)
+        self.dim = dim
+        self.threshold = threshold
+        import numpy as np
+
+        self.weights = np.zeros((dim, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+
+    def _indices(self, text: str) -> List[int]:
+        text = text.lower()
+        return [zlib.crc32(text[i:i + n].encode("utf-8")) % self.dim
+                for n in (1, 2, 3) for i in range(len(text) - n + 1)]
+
+    def featurize(self, texts: Sequence[str]) -> "np.ndarray":
+        """每行一个问题的 L2 归一化哈希特征"""
+        import numpy as np
+
+        features = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            np.add.at(features[row], self._indices(text), 1.0)
+        norms = np.linalg.norm(features, axis=1, keepdims=True)
+        return features / np.maximum(norms, 1e-6)
+
+    def predict_proba(self, texts: Sequence[str]) -> "np.ndarray":
+        import numpy as np
+
+        logits = self.featurize(texts) @ self.weights + self.bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def predict(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """批量分类，返回每个问题的 (意图, 置信度)；判为 other 时置信度记为 0"""
+        if not texts:
+            return []
+        probs = self.predict_proba(texts)
+        best = probs.argmax(axis=1)
+        return [(self.labels[i], 0.0 if self.labels[i] == OTHER else float(probs[row, i]))
+                for row, i in enumerate(best)]
+
+    def fit(self, texts: Sequence[str], labels: Sequence[str], epochs: int = 60,
+            learning_rate: float = 2.0, l2: float = 1e-4, batch_size: int = 256, seed: int = 0):
+        """小批量梯度下降训练"""
+        import numpy as np
+
+        features = self.featurize(texts)
+        index = {label: i for i, label in enumerate(self.labels)}
+        targets = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        targets[np.arange(len(texts)), [index[label] for label in labels]] = 1.0
+        rng = np.random.default_rng(seed)
+        for _ in range(epochs):
+            order = rng.permutation(len(texts))
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                x, y = features[batch], targets[batch]
+                logits = x @ self.weights + self.bias
+                logits -= logits.max(axis=1, keepdims=True)
+                probs = np.exp(logits)
+                probs /= probs.sum(axis=1, keepdims=True)
+                grad = (probs - y) / len(batch)
+                self.weights -= learning_rate * (x.T @ grad + l2 * self.weights)
+                self.bias -= learning_rate * grad.sum(axis=0)
+        return self
+
+    def accuracy(self, texts: Sequence[str], labels: Sequence[str]) -> float:
+        probs = self.predict_proba(texts)
+        predicted = [self.labels[i] for i in probs.argmax(axis=1)]
+        return sum(p == label for p, label in zip(predicted, labels)) / max(1, len(labels))
+
+    def save(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        import numpy as np
+
+        np.savez_compressed(tmp_path, weights=self.weights, bias=self.bias, labels=np.array(self.labels),
+                 dim=self.dim, threshold=self.threshold)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        import numpy as np
+
+        with np.load(path) as data:
+            classifier = cls([str(label) for label in data["labels"]], int(data["dim"]), float(data["threshold"]))
+            classifier.weights = data["weights"]
+            classifier.bias = data["bias"]
+        return classifier
+
+
+def train(traces: Optional[str] = None) -> IntentClassifier:
+    """用模板（和追踪文件中的线上问题）训练分类器"""
+    texts, labels = template_samples()
+    if traces:
+        logged_texts, logged_labels = trace_samples(traces, list(TEMPLATES))
+        logger.info(f"从 {traces} 读取 {len(logged_texts)} 条线上问题")
+        texts += logged_texts
+        labels += logged_labels
+    return IntentClassifier(list(TEMPLATES)).fit(texts, labels)
+
+
+_default_classifier: Optional[IntentClassifier] = None
+_preload_started = False
+_preload_lock = threading.Lock()
+_default_lock = threading.Lock()
+
+
+def default_classifier(path: str = DEFAULT_MODEL) -> IntentClassifier:
+    """进程级共享的分类器：模型文件存在且意图列表与 TEMPLATES 一致时加载，否则用模板训练"""
+    global _default_classifier
+    with _default_lock:
+        if _default_classifier is None:
+            classifier = IntentClassifier.load(path) if os.path.exists(path) else None
+            if classifier is None:
+                logger.info(f"未找到意图模型 {path}，使用模板训练")
+            elif classifier.labels != list(TEMPLATES):
+                logger.info(f"意图模型 {path} 的意图列表已过期，使用模板重新训练")
+                classifier = None
+            _default_classifier = classifier or train()
+        return _default_classifier
+
+
+def preload(path: str = DEFAULT_MODEL):
+    """在后台线程加载（或训练）共享分类器，多次调用只启动一次"""
+    global _preload_started
+    with _preload_lock:
+        if _preload_started or _default_classifier is not None:
+            return
+        _preload_started = True
+    threading.Thread(target=default_classifier, args=(path,), name="intent-preload", daemon=True).start()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='训练意图分类器')
+    parser.add_argument('-o', '--output', default=DEFAULT_MODEL, help='模型文件路径')
+    parser.add_argument('--traces', help='追踪文件（QA_TRACE_FILE），其中的线上问题加入训练')
+    parser.add_argument('--threshold', type=float, default=0.6, help='置信度阈值')
+    args = parser.parse_args()
+
+    classifier = train(args.traces)
+    classifier.threshold = args.threshold
+    texts, labels = template_samples()
+    logger.info(f"模板准确率: {classifier.accuracy(texts, labels):.1%}")
+    classifier.save(args.output)
+    logger.info(f"模型已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
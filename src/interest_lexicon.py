@@ -0,0 +1,207 @@
+"""中英文研究领域词典
+
+把问题中的领域说法（中文名、英文名、缩写、别名）解析为 Interest 节点的 name（Interest 以 name 为键）。
+别名来源：
+- 全部 Interest 的名称，以及多词名称的首字母缩写（如 Natural Language Generation -> NLG）
+- 名称与某个 Interest 相同的 Topic 的 name_zh
+- SEED_ALIASES 中的常用中文名和缩写，以及 data/interest_aliases.json 中补充的别名（{"别名": "英文领域名"}）
+
+精确查找先按规范化后的别名查字典；查不到时取包含该说法的全部别名（对应原来的 CONTAINS 匹配，
+如 Learning -> Machine Learning、Deep Learning ...），再加上字符二元组余弦相似度达到阈值的别名（容忍拼写错误），
+只在内存中完成，不再对 Interest 做 CONTAINS 扫描。词典在导入后的预计算中生成并写入快照。
+"""
+import json
+import math
+import os
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import queries
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALIAS_FILE = os.path.join(ROOT_DIR, "data", "interest_aliases.json")
+
+# 原 KnowledgeQA.field_mapping 中的常用说法
+SEED_ALIASES = {
+    "自然语言生成": "Natural Language Generation",
+    "自然语言": "Natural Language",
+    "自然语言处理": "Natural Language Processing",
+    "NLP": "Natural Language Processing",
+    "机器学习": "Machine Learning",
+    "ML": "Machine Learning",
+    "深度学习": "Deep Learning",
+    "DL": "Deep Learning",
+    "计算机视觉": "Computer Vision",
+    "CV": "Computer Vision",
+    "NLG": "Natural Language Generation",
+}
+
+# 生成缩写时跳过的虚词
+_STOPWORDS = {"and", "of", "the", "for", "in", "on", "to", "with", "a", "an"}
+
+
+def normalize(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def abbreviation(name: str) -> Optional[str]:
+    """多词英文名称的首字母缩写，如 Natural Language Generation -> NLG"""
+    words = [w for w in name.replace("-", " ").split() if w.lower() not in _STOPWORDS]
+    if len(words) < 2 or not all(w[0].isascii() and w[0].isalpha() for w in words):
+        return None
+    return "".join(w[0] for w in words).upper()
+
+
+def _grams(text: str) -> List[str]:
+    padded = f" {text} "
+    return [padded[i:i + 2] for i in range(len(padded) - 1)]
+
+
+class InterestLexicon:
+    """领域别名 -> Interest 名称，附带字符二元组近似查找
+
+    Args:
+        aliases: 别名 -> Interest 名称列表，别名保留原始写法（也用作分词词典）
+        min_score: 近似查找的最低余弦相似度
+    """
+
+    def __init__(self, aliases: Dict[str, List[str]], min_score: float = 0.65):
+        self.aliases = aliases
+        self.min_score = min_score
+        self._exact: Dict[str, List[str]] = {}
+        for alias, names in aliases.items():
+            targets = self._exact.setdefault(normalize(alias), [])
+            targets.extend(n for n in names if n not in targets)
+        # 二元组 -> 别名下标，以及每个别名的二元组数
+        self._keys = list(self._exact)
+        self._postings: Dict[str, List[int]] = {}
+        self._sizes: List[int] = []
+        for index, key in enumerate(self._keys):
+            grams = set(_grams(key))
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(index)
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def similar(self, text: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """按余弦相似度返回最接近的别名及分数"""
+        grams = set(_grams(normalize(text)))
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        scored = [(self._keys[i], count / math.sqrt(len(grams) * self._sizes[i]))
+                  for i, count in shared.items()]
+        scored.sort(key=lambda item: -item[1])
+        return scored[:limit]
+
+    def containing(self, text: str) -> List[str]:
+        """包含 text 的全部别名，按别名登记顺序"""
+        key = normalize(text)
+        inner = set(_grams(key)[1:-1])
+        if not inner:
+            # 单个字符包含关系太宽，不做子串匹配
+            return []
+        # 子串的每个内部二元组都必须出现在别名中，先用倒排表求交集缩小候选
+        candidates = None
+        for gram in inner:
+            postings = set(self._postings.get(gram, ()))
+            candidates = postings if candidates is None else candidates & postings
+            if not candidates:
+                return []
+        return [self._keys[i] for i in sorted(candidates) if key in self._keys[i]]
+
+    def resolve(self, text: str) -> List[str]:
+        """领域说法对应的 Interest 名称
+
+        精确匹配优先；否则返回包含该说法的全部别名，以及相似度达到阈值的全部别名（按相似度从高到低）对应的名称。
+        """
+        names = self._exact.get(normalize(text))
+        if names:
+            return names
+        aliases = self.containing(text)
+        aliases += [alias for alias, score in self.similar(text, limit=len(self._keys))
+                    if score >= self.min_score]
+        resolved: List[str] = []
+        for alias in aliases:
+            resolved.extend(n for n in self._exact[alias] if n not in resolved)
+        return resolved
+
+
+def _load_alias_file(path: str) -> Dict[str, str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def build_aliases(interests: Iterable[str], topics: Iterable[Dict[str, Any]],
+                  extra: Optional[Dict[str, str]] = None) -> Dict[str, List[str]]:
+    """生成别名表
+
+    Args:
+        interests: 全部 Interest 名称
+        topics: Topic 行，含 name/name_zh
+        extra: 补充别名 -> 英文领域名，默认为 SEED_ALIASES 加上别名文件
+    """
+    aliases: Dict[str, List[str]] = {}
+    by_name: Dict[str, List[str]] = {}
+
+    def add(alias: str, name: str):
+        alias = " ".join((alias or "").split())
+        if alias:
+            targets = aliases.setdefault(alias, [])
+            if name not in targets:
+                targets.append(name)
+
+    for name in interests:
+        if not name:
+            continue
+        by_name.setdefault(normalize(name), []).append(name)
+        add(name, name)
+        short = abbreviation(name)
+        if short:
+            add(short, name)
+
+    for row in topics:
+        for name in by_name.get(normalize(row.get("name")), []):
+            add(row.get("name_zh"), name)
+
+    if extra is None:
+        extra = dict(SEED_ALIASES, **_load_alias_file(ALIAS_FILE))
+    for alias, target in extra.items():
+        for name in by_name.get(normalize(target), []):
+            add(alias, name)
+    return aliases
+
+
+def build_lexicon(run) -> Dict[str, List[str]]:
+    """从图中读取领域和主题生成别名表，run 为 precompute.QueryRunner"""
+    interests = [r['name'] for r in run(queries.INTEREST_NAMES)]
+    topics = run(queries.TOPIC_NAMES_ZH)
+    return build_aliases(interests, topics)
+
+
+_lexicons: Dict[Hashable, Tuple[Any, InterestLexicon]] = {}
+_lexicons_lock = threading.Lock()
+
+
+def shared_lexicon(source: Hashable, version: Any,
+                   loader: Callable[[], Dict[str, List[str]]]) -> InterestLexicon:
+    """同一数据源在进程内共用一个词典，图版本变化后重建
+
+    Args:
+        source: 数据源标识，如数据库地址
+        version: 当前图版本
+        loader: 返回别名表
+    """
+    with _lexicons_lock:
+        cached = _lexicons.get(source)
+        if cached is None or cached[0] != version:
+            cached = _lexicons[source] = (version, InterestLexicon(loader()))
+        return cached[1]
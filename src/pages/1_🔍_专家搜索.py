@@ -56,15 +56,7 @@ def main():
         keyword = st.text_input("输入论文关键词")
         if st.button("搜索", key="paper_search", use_container_width=True):
             if keyword:
-                query = f"""
-                MATCH (e:Expert)-[:AUTHORED]->(p:Publication)
-                WHERE p.title CONTAINS $keyword
-                RETURN DISTINCT e.name as name, e.h_index as h_index
-                ORDER BY e.h_index DESC
-                """
-                results = st.session_state.qa_system.graph.run(
-                    query, keyword=keyword
-                ).data()
+                results = st.session_state.qa_system.search_experts_by_paper_keyword(keyword)
                 display_results(results)
             else:
                 st.warning("请输入论文关键词")
@@ -1,9 +1,5 @@
 import streamlit as st
-import streamlit.components.v1 as components
 from qa_sys import KnowledgeQA
-import plotly.graph_objects as go
-import networkx as nx
-import json
 
 # 确保QA系统已初始化
 if "qa_system" not in st.session_state:
@@ -15,6 +11,10 @@ if "qa_system" not in st.session_state:
 
 def create_network_graph(nodes, edges, title):
     """创建网络图"""
+    # 只在点击分析后才需要，首次打开页面不导入
+    import networkx as nx
+    import plotly.graph_objects as go
+    
     G = nx.Graph()
     
     # 添加节点和边
@@ -3,6 +3,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from qa_sys import KnowledgeQA
 import pandas as pd
+from typing import Optional
 
 # 确保QA系统已初始化
 if "qa_system" not in st.session_state:
@@ -12,17 +13,39 @@ if "qa_system" not in st.session_state:
         password="123456"
     )
 
+def h_index_stats(counts: dict) -> Optional[dict]:
+    """由各h指数的人数计算均值、中位数、最值和标准差，没有专家时返回None"""
+    total = sum(counts.values())
+    if total == 0:
+        return None
+    mean = sum(h * c for h, c in counts.items()) / total
+    variance = sum(c * (h - mean) ** 2 for h, c in counts.items()) / max(1, total - 1)
+    ordered = sorted(counts.items())
+    
+    def nth(n):
+        seen = 0
+        for h, c in ordered:
+            seen += c
+            if seen > n:
+                return h
+    
+    median = (nth((total - 1) // 2) + nth(total // 2)) / 2
+    return {"mean": mean, "median": median, "max": ordered[-1][0], "min": ordered[0][0],
+            "std": variance ** 0.5}
+
 def plot_h_index_distribution():
     """绘制h指数分布图"""
-    h_indices = st.session_state.qa_system.get_h_index_distribution()
+    counts = st.session_state.qa_system.get_h_index_counts()
     
-    # 创建DataFrame
-    df = pd.DataFrame({'h_index': h_indices})
+    # 创建DataFrame，每个h指数一行，按人数加权
+    df = pd.DataFrame(list(counts.items()), columns=['h_index', 'count'])
     
     # 创建直方图
     fig = px.histogram(
         df, 
         x='h_index',
+        y='count',
+        histfunc='sum',
         nbins=30,
         title='专家h指数分布',
         labels={'h_index': 'h指数', 'count': '专家数量'},
@@ -30,13 +53,15 @@ def plot_h_index_distribution():
     )
     
     # 添加均值线
-    mean_h = df['h_index'].mean()
-    fig.add_vline(
-        x=mean_h, 
-        line_dash="dash", 
-        line_color="red",
-        annotation_text=f"平均值: {mean_h:.1f}"
-    )
+    stats = h_index_stats(counts)
+    if stats is not None:
+        mean_h = stats["mean"]
+        fig.add_vline(
+            x=mean_h, 
+            line_dash="dash", 
+            line_color="red",
+            annotation_text=f"平均值: {mean_h:.1f}"
+        )
     
     # 更新布局
     fig.update_layout(
@@ -179,15 +204,18 @@ def main():
             st.plotly_chart(h_index_fig, use_container_width=True)
         
         with col2:
-            h_indices = pd.Series(st.session_state.qa_system.get_h_index_distribution())
+            stats = h_index_stats(st.session_state.qa_system.get_h_index_counts())
             st.markdown("#### 统计指标")
-            st.markdown(f"""
-            - **平均值**: {h_indices.mean():.1f}
-            - **中位数**: {h_indices.median():.1f}
-            - **最大值**: {h_indices.max()}
-            - **最小值**: {h_indices.min()}
-            - **标准差**: {h_indices.std():.1f}
-            """)
+            if stats is None:
+                st.info("暂无专家数据")
+            else:
+                st.markdown(f"""
+                - **平均值**: {stats['mean']:.1f}
+                - **中位数**: {stats['median']:.1f}
+                - **最大值**: {stats['max']}
+                - **最小值**: {stats['min']}
+                - **标准差**: {stats['std']:.1f}
+                """)
 
     # 研究领域分布
     with tab2:
@@ -202,7 +230,7 @@ def main():
         #### 领域统计
         - **总计领域数**: {len(field_dist)}
         - **涉及专家总数**: {total_experts}
-        - **平均每个领域专家数**: {total_experts/len(field_dist):.1f}
+        - **平均每个领域专家数**: {total_experts/max(1, len(field_dist)):.1f}
         """)
 
     # 论文发表趋势
@@ -0,0 +1,193 @@
+"""全图统计的预计算
+
+统计页面和“某领域最强的专家”类问题需要全图聚合：领域专家数前10、各年论文数、h指数分布、
+每个领域 h 指数最高的专家，问答还需要中英文领域词典（interest_lexicon.py）。这些结果与提问无关，只随导入变化，这里一次算好写入快照文件，
+KnowledgeQA 在快照的图版本与当前一致时直接读取，请求耗时不再随图规模增长。
+
+    python src/precompute.py                  # 计算一次
+    python src/precompute.py --interval 3600  # 每小时重算一次
+    python src/import_to_neo4j.py data/demo-time.json   # 导入完成后会自动运行一次
+
+    QA_PRECOMPUTE_FILE  快照文件路径，默认 data/precomputed.json
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import interest_lexicon
+import queries
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SNAPSHOT = os.environ.get("QA_PRECOMPUTE_FILE") or os.path.join(ROOT_DIR, "data", "precomputed.json")
+
+logger = logging.getLogger(__name__)
+
+# run(query, **params) -> 结果行列表，KnowledgeQA.run_query 或 py2neo Graph 的包装
+QueryRunner = Callable[..., List[Dict[str, Any]]]
+
+
+def field_distribution(run: QueryRunner, limit: int = 10) -> Dict[str, int]:
+    """专家数最多的 limit 个研究领域"""
+    results = run(queries.FIELD_DISTRIBUTION, limit=limit)
+    return {r['field']: r['count'] for r in results}
+
+
+def yearly_publication_counts(run: QueryRunner) -> Dict[int, int]:
+    """各年论文数"""
+    results = run(queries.YEARLY_PUBLICATIONS)
+    return {r['year']: r['count'] for r in results}
+
+
+def h_index_counts(run: QueryRunner) -> Dict[int, int]:
+    """各 h 指数的专家人数"""
+    results = run(queries.H_INDEX_COUNTS)
+    return {r['h_index']: r['count'] for r in results}
+
+
+def top_experts_by_field(run: QueryRunner, k: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+    """每个研究领域 h 指数最高的 k 位专家，键为小写的领域名
+
+    优先读导入时维护的领域排名，尚未生成时对全部专家排序。
+    """
+    results = run(queries.RANKED_TOP_EXPERTS_BY_FIELD, k=k) or run(queries.TOP_EXPERTS_BY_FIELD, k=k)
+    return {r['field'].lower(): r['experts'] for r in results}
+
+
+def compute_snapshot(run: QueryRunner, top_k: int = 10) -> Dict[str, Any]:
+    """计算全部预计算结果"""
+    versions = run(queries.GRAPH_VERSION)
+    started = time.perf_counter()
+    snapshot = {
+        "graph_version": versions[0]['version'] if versions else None,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "field_distribution": field_distribution(run),
+        "yearly_publications": yearly_publication_counts(run),
+        "h_index_counts": h_index_counts(run),
+        "top_experts": top_experts_by_field(run, top_k),
+        "interest_lexicon": interest_lexicon.build_lexicon(run),
+    }
+    logger.info(f"预计算完成，耗时 {time.perf_counter() - started:.1f}s，"
+                f"覆盖 {len(snapshot['top_experts'])} 个领域")
+    return snapshot
+
+
+def write_snapshot(snapshot: Dict[str, Any], path: str = DEFAULT_SNAPSHOT):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def graph_runner(graph) -> QueryRunner:
+    """把 py2neo Graph 包装成 QueryRunner"""
+    return lambda query, **params: graph.run(query, params).data()
+
+
+def precompute(graph, path: str = DEFAULT_SNAPSHOT, top_k: int = 10) -> Dict[str, Any]:
+    """计算并写出快照"""
+    snapshot = compute_snapshot(graph_runner(graph), top_k)
+    write_snapshot(snapshot, path)
+    logger.info(f"快照已写入 {path}")
+    return snapshot
+
+
+class SnapshotStore:
+    """读取预计算快照，文件更新后自动重新加载
+
+    Args:
+        path: 快照文件路径
+        check_interval: 检查文件是否更新的最小间隔(秒)
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT, check_interval: float = 5):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._mtime = 0.0
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """当前快照，文件不存在时返回 None"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked >= self.check_interval:
+                self._checked = now
+                self._reload()
+            return self._snapshot
+
+    def _reload(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._snapshot = None
+            return
+        if mtime == self._mtime and self._snapshot is not None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取预计算快照失败: {e}")
+            return
+        # JSON 的键都是字符串，年份和 h 指数还原为整数
+        for name in ("yearly_publications", "h_index_counts"):
+            snapshot[name] = {int(k): v for k, v in snapshot.get(name, {}).items()}
+        self._snapshot = snapshot
+        self._mtime = mtime
+
+
+_stores: Dict[str, SnapshotStore] = {}
+_stores_lock = threading.Lock()
+
+
+def shared_store(path: str = DEFAULT_SNAPSHOT) -> SnapshotStore:
+    """同一快照文件在进程内共用一个 SnapshotStore"""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = SnapshotStore(path)
+        return _stores[path]
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='预计算全图统计结果')
+    parser.add_argument('-o', '--output', default=DEFAULT_SNAPSHOT, help='快照文件路径')
+    parser.add_argument('--top-k', type=int, default=10, help='每个领域保留的专家数')
+    parser.add_argument('--interval', type=float, default=0, help='定时重算的间隔(秒)，0 表示只算一次')
+    parser.add_argument('--uri', default='bolt://localhost:7687')
+    parser.add_argument('--user', default='neo4j')
+    parser.add_argument('--password', default='123456')
+    args = parser.parse_args()
+
+    from py2neo import Graph
+
+    graph = Graph(args.uri, auth=(args.user, args.password))
+    last_version = object()
+    while True:
+        try:
+            versions = graph.run(queries.GRAPH_VERSION).data()
+            version = versions[0]['version'] if versions else None
+            # 定时模式下图版本没变就跳过
+            if version != last_version:
+                precompute(graph, args.output, args.top_k)
+                last_version = version
+        except Exception as e:
+            if not args.interval:
+                raise
+            logger.error(f"预计算失败: {e}")
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
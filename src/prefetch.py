@@ -0,0 +1,85 @@
+"""追问结果的后台预取
+
+列出专家之后，下一轮几乎总是追问这些专家的研究领域、论文或彼此之间的合作。
+KnowledgeQA 每次回答后把上下文中前几位专家交给 Prefetcher，在后台线程用一条批量查询取回这些结果，
+写入对话上下文中对应的实体，追问时直接读取。
+
+预取受预算约束：专家数、每人论文数、参与合作查询的专家数，以及耗时上限（超时的结果丢弃，
+追问最多等待到上限）。用户问了无关的新问题时取消尚未写入的预取。
+
+    QA_PREFETCH_ENTITIES  每轮预取详细信息的专家数，默认 5，设为 0 关闭预取
+    QA_PREFETCH_BUDGET_MS 预取耗时上限(毫秒)，默认 1000
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+DEFAULT_ENTITIES = int(os.environ.get("QA_PREFETCH_ENTITIES", 5))
+DEFAULT_BUDGET_MS = float(os.environ.get("QA_PREFETCH_BUDGET_MS", 1000))
+# 每位专家预取的论文数，论文更多的专家追问时仍实时查询
+PAPERS_PER_ENTITY = 20
+# 参与两两合作查询的专家数上限
+MAX_PAIR_ENTITIES = 50
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    __slots__ = ("done", "cancelled", "deadline")
+
+    def __init__(self, deadline: float):
+        self.done = threading.Event()
+        self.cancelled = False
+        self.deadline = deadline
+
+
+class Prefetcher:
+    """同一时间只有一个预取任务，新任务或 cancel 会取消上一个
+
+    Args:
+        entities: 每轮预取详细信息的实体数，0 表示不预取
+        budget_ms: 预取耗时上限，超过后结果丢弃
+    """
+
+    def __init__(self, entities: int = DEFAULT_ENTITIES, budget_ms: float = DEFAULT_BUDGET_MS):
+        self.entities = entities
+        self.budget = budget_ms / 1000
+        self._job: Optional[_Job] = None
+        self._lock = threading.Lock()
+
+    def schedule(self, fetch: Callable[[], Any], apply: Callable[[Any], None]):
+        """在后台执行 fetch，未被取消且未超时时把结果交给 apply"""
+        job = _Job(time.monotonic() + self.budget)
+        with self._lock:
+            if self._job is not None:
+                self._job.cancelled = True
+            self._job = job
+        threading.Thread(target=self._run, args=(job, fetch, apply), name="qa-prefetch", daemon=True).start()
+
+    def _run(self, job: _Job, fetch: Callable[[], Any], apply: Callable[[Any], None]):
+        try:
+            result = fetch()
+            with self._lock:
+                # 在锁内写入，保证 cancel 返回后不会再有结果写入上下文
+                if not job.cancelled and time.monotonic() <= job.deadline:
+                    apply(result)
+        except Exception as e:
+            logger.warning(f"预取失败: {e}")
+        finally:
+            job.done.set()
+
+    def cancel(self):
+        """取消尚未写入结果的预取；已发出的查询照常执行完，结果丢弃"""
+        with self._lock:
+            if self._job is not None:
+                self._job.cancelled = True
+                self._job = None
+
+    def wait(self):
+        """等待进行中的预取写入结果，最多等到其耗时上限"""
+        with self._lock:
+            job = self._job
+        if job is not None:
+            job.done.wait(max(0.0, job.deadline - time.monotonic()))
@@ -1,10 +1,34 @@
-# 调试语句版本
-from py2neo import Graph
-import jieba
 import re
-from typing import List, Dict, Any, Optional
+from itertools import chain
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from query_metrics import QueryMetrics, current_handler, default_metrics, query_handler
+from result_cache import ResultCache, cached_by_graph_version, default_cache
+import precompute
+import entity_linker
+from entity_linker import EntityLinker, Mention
+import segmenter
+from segmenter import Segmenter, Token
+import intent_classifier
+from intent_classifier import OTHER, IntentClassifier, mask_entities
+import interest_lexicon
+from interest_lexicon import InterestLexicon
+import coauthor_graph
+from coauthor_graph import CoauthorGraph
+import queries
+import tracing
+import prefetch
+from prefetch import Prefetcher
+
+@dataclass
+class EntityRef:
+    """回答中涉及的一个实体：显示名、节点id和已查到的属性"""
+    name: str
+    kind: str  # expert / publication
+    id: Optional[str] = None
+    properties: Dict[str, Any] = field(default_factory=dict)
+
 
 @dataclass
 class DialogContext:
@@ -14,55 +38,230 @@ class DialogContext:
     last_entities: List[str] = field(default_factory=list)  # 存储上一轮提到的专家名字
     last_topic: str = ""
     timestamp: datetime = field(default_factory=datetime.now)
+    last_refs: List[EntityRef] = field(default_factory=list)  # 上一轮实体的id和已查到的属性
+    pairs: Optional[List[Dict[str, Any]]] = None  # 预取的上一轮专家两两之间的合作
     
     def is_valid(self) -> bool:
         """检查上下文是否仍然有效（默认5分钟内）"""
         return datetime.now() - self.timestamp < timedelta(minutes=5)
 
-    def update(self, question: str, answer: str, entities: List[str], topic: str):
+    def update(self, question: str, answer: str, entities: List[str], topic: str,
+               refs: Sequence[EntityRef] = ()):
         """更新上下文"""
         self.last_question = question
         self.last_answer = answer
         self.last_entities = entities
         self.last_topic = topic
+        self.last_refs = list(refs)
+        self.pairs = None
         self.timestamp = datetime.now()
 
+    def ref(self, name: str, kind: str) -> Optional[EntityRef]:
+        """上一轮回答中名为 name 的实体"""
+        for ref in self.last_refs:
+            if ref.kind == kind and ref.name == name:
+                return ref
+        return None
+
+    def remember(self, refs: Sequence[EntityRef]):
+        """追问中按id查到的属性并入上一轮的同一实体"""
+        for new in refs:
+            ref = self.ref(new.name, new.kind)
+            if ref is not None and new.id is not None and ref.id in (None, new.id):
+                ref.id = new.id
+                ref.properties.update(new.properties)
+
+# (实体提及, 分词结果, 替换实体后的问题, (分类意图, 置信度))
+Analysis = Tuple[List[Mention], List[Token], str, Tuple[str, float]]
+
 class KnowledgeQA:
     def __init__(self, uri: str = "bolt://localhost:7687", 
                  user: str = "neo4j", 
-                 password: str = "password"):
+                 password: str = "password",
+                 metrics: Optional[QueryMetrics] = None,
+                 result_cache: Optional[ResultCache] = None,
+                 snapshot_file: str = precompute.DEFAULT_SNAPSHOT,
+                 prefetcher: Optional[Prefetcher] = None):
         """初始化问答系统"""
-        self.graph = Graph(uri, auth=(user, password))
+        self.uri = uri
+        self._auth = (user, password)
+        self._graph = None
+        # jieba 词典在后台加载，与页面其余部分的初始化并行
+        segmenter.preload()
+        intent_classifier.preload()
+        self.metrics = metrics or default_metrics()
+        self.result_cache = result_cache or default_cache()
+        self.snapshot = precompute.shared_store(snapshot_file)
+        self._intent = ""  # 当前正在处理的问题意图，用于查询埋点
+        self.last_trace: Optional[tracing.Span] = None  # 最近一次问答的根 span
+        self._mentions: List[Mention] = []  # 当前问题中链接到的实体
+        self._refs: List[EntityRef] = []  # 当前回答涉及的实体，回答后写入对话上下文
         self.question_patterns = self._init_patterns()
         self.context = DialogContext()
+        self.prefetcher = prefetcher or Prefetcher()
         self.follow_up_patterns = self._init_follow_up_patterns()
-        # 添加领域名称映射字典
-        self.field_mapping = {
-            "自然语言生成": "Natural Language Generation",
-            "自然语言": "Natural Language",
-            "自然语言处理": "Natural Language Processing",
-            "NLP": "Natural Language Processing",
-            "机器学习": "Machine Learning",
-            "ML": "Machine Learning",
-            "深度学习": "Deep Learning",
-            "DL": "Deep Learning",
-            "计算机视觉": "Computer Vision",
-            "CV": "Computer Vision",
-            "NLG": "Natural Language Generation"
-        }
+
+    @property
+    def graph(self):
+        """py2neo Graph，首次使用时才导入 py2neo 并建立连接"""
+        if self._graph is None:
+            from py2neo import Graph
+
+            graph = Graph(self.uri, auth=self._auth)
+            # 每个进程只用 EXPLAIN 校验一次查询目录，同时预热执行计划缓存；校验失败时直接抛出记下的错误
+            self.metrics.warm(queries.validate_once(self.uri, graph))
+            self._graph = graph
+        return self._graph
+
+    def connect(self):
+        """连接数据库并校验查询目录，应用启动时调用，使语句错误在启动时而不是第一次提问时暴露
+
+        有语句无法编译时抛出 ValueError；同一进程中之后的调用直接抛出同一个错误。
+        """
+        return self.graph
+
+    def run_query(self, query: str, **params) -> List[Dict[str, Any]]:
+        """执行Cypher查询的唯一入口，按处理方法和当前意图记录耗时、行数等指标
+
+        query 取自 queries.py 中的查询目录。
+        """
+        handler = self._handler(query)
+        intent = self._intent or "direct"
+        with tracing.span("db.query", **{"db.system": "neo4j", "code.function": handler,
+                                         "qa.intent": intent}) as db_span:
+            rows = self.metrics.execute(self.graph, query, params, handler=handler, intent=intent)
+            db_span.set_attribute("db.rows", len(rows))
+        return rows
+
+    def stream_query(self, query: str, **params) -> Iterator[Dict[str, Any]]:
+        """流式执行Cypher查询，逐条产出结果行，用于长列表的渐进输出"""
+        return self._stream_rows(query, params, self._handler(query), self._intent or "direct")
+
+    @staticmethod
+    def _handler(query: str) -> str:
+        """指标中的 handler：用 query_handler 声明的处理方法，直接调用时取语句名"""
+        return current_handler() or getattr(query, "name", "") or "direct"
+
+    def _stream_rows(self, query: str, params: Dict[str, Any],
+                     handler: str, intent: str) -> Iterator[Dict[str, Any]]:
+        with tracing.span("db.query", **{"db.system": "neo4j", "code.function": handler,
+                                         "qa.intent": intent, "db.stream": True}) as db_span:
+            rows = 0
+            for row in self.metrics.stream(self.graph, query, params, handler=handler, intent=intent):
+                rows += 1
+                yield row
+            db_span.set_attribute("db.rows", rows)
+
+    @property
+    def linker(self) -> EntityLinker:
+        """进程内共享的实体链接器，图版本变化后重建"""
+        version = self.result_cache.version(self.uri, self.graph_version)
+        return entity_linker.shared_linker(self.uri, version, self._load_entity_rows)
+
+    @query_handler()
+    def _load_entity_rows(self):
+        experts = self.stream_query(queries.EXPERT_NAMES)
+        publications = self.stream_query(queries.PUBLICATION_TITLES)
+        return experts, publications
+
+    @property
+    def segmenter(self) -> Segmenter:
+        """进程内共享的分词器，用户词典按图版本缓存在磁盘上"""
+        version = self.result_cache.version(self.uri, self.graph_version)
+        return segmenter.load_segmenter(self.uri, version, self._load_user_dict)
+
+    @property
+    def classifier(self) -> IntentClassifier:
+        """进程内共享的意图分类器"""
+        return intent_classifier.default_classifier()
+
+    @query_handler()
+    def _load_user_dict(self) -> Dict[str, str]:
+        experts = self.stream_query(queries.EXPERT_NAMES)
+        return segmenter.build_entries(self.lexicon.aliases, experts)
+
+    @property
+    def lexicon(self) -> InterestLexicon:
+        """进程内共享的中英文领域词典，优先取预计算快照中的别名表"""
+        version = self.result_cache.version(self.uri, self.graph_version)
+        return interest_lexicon.shared_lexicon(self.uri, version, self._load_lexicon)
+
+    @query_handler()
+    def _load_lexicon(self) -> Dict[str, List[str]]:
+        aliases = self._precomputed("interest_lexicon")
+        return aliases if aliases is not None else interest_lexicon.build_lexicon(self.run_query)
+
+    @property
+    def coauthors(self) -> CoauthorGraph:
+        """进程内共享的合著图，图版本变化后重建"""
+        version = self.result_cache.version(self.uri, self.graph_version)
+        return coauthor_graph.shared_graph(self.uri, version, self._load_coauthor_rows)
+
+    @query_handler()
+    def _load_coauthor_rows(self):
+        # 优先读导入时建立的 COAUTHOR 关系，旧数据没有时从论文作者展开
+        pairs = self.stream_query(queries.COAUTHOR_PAIRS)
+        first = next(pairs, None)
+        if first is None:
+            return self.stream_query(queries.PUBLICATION_AUTHOR_IDS)
+        return chain([first], pairs)
+
+    def _linked_ids(self, kind: str, text: str) -> List[str]:
+        """text 中提及的实体id：优先取问题链接阶段的结果，其次是上一轮回答中的同名实体，
+        最后对 text 本身做链接"""
+        folded = text.lower()
+        mentions = [m for m in self._mentions if m.kind == kind and m.text.lower() in folded]
+        if not mentions:
+            ref = self.context.ref(text, kind) if self.context.is_valid() else None
+            if ref is not None and ref.id is not None:
+                return [ref.id]
+            mentions = [m for m in self.linker.find(text) if m.kind == kind]
+        if not mentions:
+            return []
+        return max(mentions, key=lambda m: len(m.text)).ids
+
+    def _entity_condition(self, statement: queries.Statement, var: str, kind: str,
+                          text: str) -> Tuple[str, Dict[str, Any]]:
+        """返回语句槽位 var 中匹配 text 所指实体的条件和参数
+
+        链接到实体时按id匹配（走索引，参数 ${var}_ids）；否则模糊匹配，参数为 ${var}_text。
+        """
+        indexed, fallback = statement.slots[var]
+        ids = self._linked_ids(kind, text)
+        if ids:
+            return indexed, {f"{var}_ids": ids}
+        return fallback, {f"{var}_text": text}
+
+    def _resolve_interests(self, field: str) -> List[str]:
+        """领域说法（中文名、英文名、缩写、别名）对应的 Interest 名称"""
+        return self.lexicon.resolve(field)
 
     def _map_field_name(self, field: str) -> str:
-        """统一的领域名称映射方法"""
-        # print(f"正在映射领域名称: {field}")
-        # 如果输入的是英文，就不进行映射
-        if any(field.lower() == en.lower() for en in self.field_mapping.values()):
-            field_en = field
-            # print(f"检测到英文输入，保持原样: {field_en}")  
-        else:
-            # 获取英文领域名称
-            field_en = self.field_mapping.get(field, field)
-            # print(f"映射结果: {field} -> {field_en}")
-        return field_en
+        """统一的领域名称映射方法：唯一对应一个 Interest 时返回其名称，否则原样返回"""
+        names = self._resolve_interests(field)
+        if len(names) == 1:
+            return names[0]
+        return interest_lexicon.SEED_ALIASES.get(field, field)
+
+    def _interest_names(self, field: str, limit: int = 20) -> List[str]:
+        """field 对应的 Interest 名称：领域词典解析不到时，取名称包含 field 的领域"""
+        names = self._resolve_interests(field)
+        if names:
+            return names
+        results = self.run_query(queries.INTERESTS_CONTAINING, text=self._map_field_name(field), limit=limit)
+        return [r['name'] for r in results]
+
+    def _interest_condition(self, statement: queries.Statement, var: str,
+                            field: str) -> Tuple[str, Dict[str, Any]]:
+        """返回语句槽位 var 中匹配 field 所指领域的条件和参数
+
+        解析到 Interest 时按名称匹配（走索引，参数 ${var}_names）；否则模糊匹配，参数为 ${var}_text。
+        """
+        indexed, fallback = statement.slots[var]
+        names = self._resolve_interests(field)
+        if names:
+            return indexed, {f"{var}_names": names}
+        return fallback, {f"{var}_text": self._map_field_name(field)}
 
     def _init_patterns(self) -> Dict[str, Dict[str, Any]]:
         """初始化问题模式"""
@@ -96,6 +295,16 @@ class KnowledgeQA:
                 "extract": lambda m: m.group(1).strip()
             },
             
+            # 合作链问题，需在合作关系之前匹配
+            r"(.*?)(和|与|跟)(.*?)之间(要)?(怎么|如何|怎样)(才能)?(联系|认识)": {
+                "type": "collaboration_path",
+                "extract": lambda m: (m.group(1).strip(), m.group(3).strip())
+            },
+            r"(.*?)(和|与|跟|到)(.*?)(之间)?的(最短)?合作(链|路径)": {
+                "type": "collaboration_path",
+                "extract": lambda m: (m.group(1).strip(), m.group(3).strip())
+            },
+            
             # 合作关系问题
             r"(.*?)和(.*?)有(什么)?合作(关系)?吗?": {
                 "type": "cooperation",
@@ -170,6 +379,149 @@ class KnowledgeQA:
 
     def answer(self, question: str) -> str:
         """处理问题并返回答案"""
+        answer = self._answer(question, None)
+        self._prefetch_follow_ups()
+        return answer
+
+    def answer_many(self, questions: List[str]) -> List[str]:
+        """批量回答互不相关的问题：意图一次批量分类，各问题不共享对话上下文"""
+        analyses = self._analyze(questions)
+        context = self.context
+        answers = []
+        try:
+            for question, analysis in zip(questions, analyses):
+                self.context = DialogContext()
+                answers.append(self._answer(question, analysis))
+        finally:
+            self.context = context
+        return answers
+
+    def _answer(self, question: str, analysis: Optional[Analysis]) -> str:
+        with tracing.span("qa.answer", **{"qa.question": question}) as root:
+            self.last_trace = root
+            try:
+                return self._route(question, analysis)
+            finally:
+                root.set_attribute("qa.intent", self._intent or "unknown")
+                self._intent = ""
+                self._mentions = []
+                self._refs = []
+
+    def _route(self, question: str, analysis: Optional[Analysis] = None) -> str:
+        """识别问题意图并分发到对应的处理方法"""
+        with tracing.span("qa.route") as route_span:
+            kind, intent, extracted = self._understand(question, route_span, analysis)
+        if kind is None:
+            return "抱歉，我还不能理解这个问题"
+
+        self._intent = intent
+        with tracing.span("qa.handler", **{"qa.intent": intent, "qa.kind": kind}):
+            return "".join(self._dispatch(kind, intent, extracted, question, stream=False))
+
+    def answer_stream(self, question: str) -> Iterator[str]:
+        """逐段产出答案：长列表类问题先产出标题，再随驱动返回的记录逐行产出，其余问题一次产出"""
+        with tracing.span("qa.answer", **{"qa.question": question, "qa.stream": True}) as root:
+            self.last_trace = root
+            try:
+                with tracing.span("qa.route") as route_span:
+                    kind, intent, extracted = self._understand(question, route_span)
+                if kind is None:
+                    yield "抱歉，我还不能理解这个问题"
+                    return
+
+                self._intent = intent
+                with tracing.span("qa.handler", **{"qa.intent": intent, "qa.kind": kind}):
+                    yield from self._dispatch(kind, intent, extracted, question, stream=True)
+                self._prefetch_follow_ups()
+            finally:
+                root.set_attribute("qa.intent", self._intent or "unknown")
+                self._intent = ""
+                self._mentions = []
+                self._refs = []
+
+    def _analyze(self, questions: List[str]) -> List[Analysis]:
+        """实体链接、分词、实体替换为占位符，再对全部问题批量分类"""
+        prepared = []
+        for question in questions:
+            mentions = self.linker.find(question)
+            tokens = self.segmenter.segment(question, mentions)
+            prepared.append((mentions, tokens, mask_entities(question, tokens)))
+        predictions = self.classifier.predict([masked for _, _, masked in prepared])
+        return [item + (prediction,) for item, prediction in zip(prepared, predictions)]
+
+    def _understand(self, question: str, route_span: tracing.Span,
+                    analysis: Optional[Analysis] = None) -> Tuple[Optional[str], str, Any]:
+        """识别意图，analysis 为 _analyze 的结果，未提供时现算"""
+        self._mentions, tokens, masked, prediction = analysis or self._analyze([question])[0]
+        kind, intent, extracted = self._match(question, tokens, prediction)
+        route_span.set_attribute("qa.intent", intent or "unknown")
+        route_span.set_attribute("qa.mentions", len(self._mentions))
+        route_span.set_attribute("qa.tokens", len(tokens))
+        # 记录替换实体后的问题和分类结果，供 intent_classifier.py --traces 重新训练
+        route_span.set_attribute("qa.masked", masked)
+        route_span.set_attribute("qa.classifier", f"{prediction[0]}:{prediction[1]:.2f}")
+        return kind, intent, extracted
+
+    def _dispatch(self, kind: str, intent: str, extracted: Any, question: str,
+                  stream: bool) -> Iterator[str]:
+        """调用意图对应的处理方法；stream 为 True 且该意图有 _stream_ 版本时逐段产出"""
+        target = (intent, extracted)
+        if kind != "follow_up":
+            # 问了新问题，上一轮的预取不再需要
+            self.prefetcher.cancel()
+        else:
+            self.prefetcher.wait()
+            target = self._follow_up_target(intent, extracted)
+            answer = self._answer_from_context(*target) if target is not None else None
+            if answer is None and (target is None or not (stream and hasattr(self, f"_stream_{target[0]}"))):
+                answer = self._handle_follow_up(intent, extracted)
+            if answer is not None:
+                yield answer
+                self._keep_refs(question, answer)
+                return
+
+        def run() -> Iterator[str]:
+            if stream and hasattr(self, f"_stream_{target[0]}"):
+                return getattr(self, f"_stream_{target[0]}")(target[1])
+            return iter([getattr(self, f"_handle_{target[0]}")(target[1])])
+
+        if kind != "question":
+            parts = []
+            for part in run():
+                parts.append(part)
+                yield part
+            self._keep_refs(question, "".join(parts))
+            return
+
+        parts = []
+        try:
+            for part in run():
+                parts.append(part)
+                yield part
+        except Exception as e:
+            yield f"抱歉，处理您的问题时出现错误: {str(e)}"
+            return
+        # 处理方法记录了实体时（如专家列表），上下文中的实体取这些实体，否则取问题中抽取的实体
+        entities = [ref.name for ref in self._refs] if self._refs else \
+            ([extracted] if isinstance(extracted, str) else list(extracted))
+        self.context.update(question, "".join(parts), entities,
+                            extracted if isinstance(extracted, str) else "", self._refs)
+
+    def _keep_refs(self, question: str, answer: str):
+        """追问回答后：列出了新的实体（如领域的专家列表）时上下文改为这些实体，
+        否则把按id查到的属性并入上一轮的实体"""
+        if any(self.context.ref(ref.name, ref.kind) is None for ref in self._refs):
+            self.context.update(question, answer, [ref.name for ref in self._refs],
+                                self.context.last_topic, self._refs)
+        else:
+            self.context.remember(self._refs)
+
+    def _match(self, question: str, tokens: Sequence[Token] = (),
+               prediction: Tuple[str, float] = (OTHER, 0.0)) -> Tuple[Optional[str], str, Any]:
+        """识别问题意图，返回 (类别, 意图, 抽取的实体)，类别为 None 表示无法识别
+
+        依次尝试：分类器（置信度达到阈值且分词结果中有所需实体）、分词规则、正则模式。
+        """
         # 预处理问题中的特殊模式
         field_expert_pattern = r"研究(.*?)的(.*?)(的)(.*)"
         field_expert_match = re.match(field_expert_pattern, question)
@@ -179,76 +531,71 @@ class KnowledgeQA:
             query_type = field_expert_match.group(4)
             
             if "h指数" in query_type:
-                return self._handle_expert_h_index(f"研究{field}的{expert}")
+                return "special", "expert_h_index", f"研究{field}的{expert}"
             elif "研究领域" in query_type:
-                return self._handle_expert_interests(f"研究{field}的{expert}")
+                return "special", "expert_interests", f"研究{field}的{expert}"
             elif "论文" in query_type:
-                return self._handle_expert_publications(f"研究{field}的{expert}")
+                return "special", "expert_publications", f"研究{field}的{expert}"
         
         # 原有的问题处理逻辑
         if self.context.is_valid():
             for pattern, config in self.follow_up_patterns.items():
                 match = re.match(pattern, question)
                 if match:
-                    extracted = config["extract"](match)
-                    answer = self._handle_follow_up(config["type"], extracted)
-                    return answer
+                    return "follow_up", config["type"], config["extract"](match)
+
+        intent, confidence = prediction
+        if confidence >= self.classifier.threshold:
+            slot = Segmenter.fill_slot(intent, tokens)
+            if slot:
+                return "question", intent, slot
+
+        parsed = Segmenter.parse(tokens)
+        if parsed:
+            return "question", parsed[0], parsed[1]
         
         for pattern, config in self.question_patterns.items():
             match = re.match(pattern, question)
             if match:
-                try:
-                    extracted = config["extract"](match)
-                    if not extracted:
-                        continue
-                    
-                    answer = getattr(self, f"_handle_{config['type']}")(extracted)
-                    self.context.update(question, answer, 
-                                      [extracted] if isinstance(extracted, str) else list(extracted),
-                                      extracted if isinstance(extracted, str) else "")
-                    return answer
-                    
-                except Exception as e:
-                    return f"抱歉，处理您的问题时出现错误: {str(e)}"
-        
-        return "抱歉，我还不能理解这个问题"
+                extracted = config["extract"](match)
+                if extracted:
+                    return "question", config["type"], extracted
+        
+        return None, "", None
+
+    def _follow_up_target(self, follow_up_type: str, extracted_info: Any) -> Optional[Tuple[str, Any]]:
+        """单个专家、领域的追问直接转为对应的意图，返回 (意图, 参数)，其他追问返回 None"""
+        if follow_up_type == "expert_follow_up":
+            expert_name, question_type = extracted_info
+            if not expert_name:
+                return None
+            if "研究领域" in question_type or "领域" in question_type:
+                return "expert_interests", expert_name
+            elif "论文" in question_type:
+                return "expert_publications", expert_name
+            elif "h指数" in question_type:
+                return "expert_h_index", expert_name
+        elif follow_up_type == "field_follow_up":
+            field, question_type = extracted_info
+            if not field:
+                return None
+            if "专家" in question_type:
+                return "expert_by_interest", field
+            elif "论文" in question_type:
+                return "field_publications", field
+        return None
 
+    @query_handler()
     def _handle_follow_up(self, follow_up_type: str, extracted_info: Any) -> str:
         """处理追问"""
+        target = self._follow_up_target(follow_up_type, extracted_info)
+        if target is not None:
+            return getattr(self, f"_handle_{target[0]}")(target[1])
+
         if follow_up_type == "experts_follow_up":
             question_type = extracted_info
             if "合作" in question_type and len(self.context.last_entities) >= 2:
-                # 获取所有专家的合作关系
-                collaborations = []
-                experts = self.context.last_entities
-                
-                # 构建查询
-                query = """
-                MATCH (e1:Expert)-[:AUTHORED]->(p:Publication)<-[:AUTHORED]-(e2:Expert)
-                WHERE e1.name IN $expert_names AND e2.name IN $expert_names
-                AND e1.name < e2.name  // 避免重复
-                WITH e1, e2, COLLECT(p) as papers
-                RETURN e1.name as expert1, e2.name as expert2, papers
-                """
-                
-                results = self.graph.run(query, expert_names=experts).data()
-                
-                if results:
-                    response = []
-                    for r in results:
-                        expert1, expert2 = r['expert1'], r['expert2']
-                        papers = r['papers']
-                        if papers:
-                            paper_titles = [p['title'] for p in papers]
-                            response.append(f"{expert1} 和 {expert2} 有 {len(papers)} 篇合作论文：\n" + 
-                                         "\n".join(f"- {title}" for title in paper_titles[:3]))
-                            if len(paper_titles) > 3:
-                                response[-1] += f"\n... 等{len(paper_titles)}篇论文"
-                    
-                    if response:
-                        return "\n\n".join(response)
-                
-                return "这些专家之间未找到直接的合作论文"
+                return self._answer_coauthor_pairs(self.context.last_entities, question_type)
                 
             return f"抱歉，我不太理解您想了解这些专家的什么信息"
             
@@ -256,44 +603,132 @@ class KnowledgeQA:
             expert_name, question_type = extracted_info
             if not expert_name:
                 return "抱歉，我不确定您指的是哪位专家"
-            
-            if "研究领域" in question_type or "领域" in question_type:
-                return self._handle_expert_interests(expert_name)
-            elif "论文" in question_type:
-                return self._handle_expert_publications(expert_name)
-            elif "h指数" in question_type:
-                return self._handle_expert_h_index(expert_name)
                 
         elif follow_up_type == "field_follow_up":
             field, question_type = extracted_info
-            # print(f"- 处理领域追问，领域: {field}, 问题类型: {question_type}")
             if not field:
                 return "抱歉，我不确定您指的是哪个领域"
-            
-            if "专家" in question_type:
-                return self._handle_expert_by_interest(field)
-            elif "论文" in question_type:  # 判断条件
-                return self._handle_field_publications(field)
                 
         elif follow_up_type == "more_info":
-            # print(f"- 处理更多信息请求，当前话题: {self.context.last_topic}")   
             if self.context.last_topic:
                 return self._get_more_information(self.context.last_topic)
         
         return "抱歉，我不理解您的追问"
 
+    def _record(self, kind: str, text: str, entity_id: Optional[str], **properties):
+        """记录本轮回答涉及的实体（text 为回答中的显示名），追问时按id查询或直接取已查到的属性"""
+        self._refs.append(EntityRef(text, kind, entity_id,
+                                    {k: v for k, v in properties.items() if v is not None}))
+
+    def _answer_from_context(self, intent: str, name: str) -> Optional[str]:
+        """用上一轮已查到的属性回答单个专家的追问，缺少所需属性时返回 None"""
+        ref = self.context.ref(name, "expert")
+        if ref is None:
+            return None
+        if intent == "expert_h_index" and ref.properties.get("h_index") is not None:
+            return self._format_expert_h_index(ref.properties)
+        if intent == "expert_interests" and ref.properties.get("interests"):
+            return self._format_expert_interests(ref.properties)
+        # 预取的论文不超过 prefetch.PAPERS_PER_ENTITY 篇，取全了才直接回答
+        publications = ref.properties.get("publications")
+        if intent == "expert_publications" and publications and \
+                len(publications) == ref.properties.get("publication_count"):
+            return f"{name}发表的论文包括:\n" + "".join(f"- {title}\n" for title in publications)
+        return None
+
+    def _prefetch_follow_ups(self):
+        """回答后在后台预取上下文中专家可能被追问的结果：研究领域、论文和彼此之间的合作"""
+        context = self.context
+        if self.prefetcher.entities <= 0 or not context.is_valid():
+            return
+        experts = [ref for ref in context.last_refs if ref.kind == "expert" and ref.id]
+        if not experts:
+            return
+        # “他”指上一轮最后一位专家，其余名额给列表中排在前面的专家
+        detailed = {ref.id: ref for ref in [experts[-1]] + experts
+                    if "publication_count" not in ref.properties}
+        detailed = dict(list(detailed.items())[:self.prefetcher.entities])
+        # 上一轮的专家都有id且不超过上限时，才预取他们两两之间的合作
+        covered = all(context.ref(name, "expert") is not None and context.ref(name, "expert").id
+                      for name in context.last_entities)
+        with_pairs = covered and len(experts) >= 2 and context.pairs is None and \
+            len(experts) <= prefetch.MAX_PAIR_ENTITIES
+        if not detailed and not with_pairs:
+            return
+
+        params = {"ids": list(detailed), "papers": prefetch.PAPERS_PER_ENTITY,
+                  "pair_ids": list({ref.id for ref in experts}) if with_pairs else list(detailed)}
+        refs = context.last_refs
+
+        def fetch() -> List[Dict[str, Any]]:
+            return self.metrics.execute(self.graph, queries.FOLLOW_UP_PREFETCH, params,
+                                        handler="_prefetch_follow_ups", intent="prefetch")
+
+        def apply(rows: List[Dict[str, Any]]):
+            if context.last_refs is not refs:
+                return
+            for row in rows:
+                ref = detailed.get(row['id'])
+                if ref is not None:
+                    ref.properties.update(interests=row['interests'], publications=row['publications'],
+                                          publication_count=row['publication_count'])
+            if with_pairs:
+                pairs = sorted(chain.from_iterable(row['pairs'] for row in rows), key=lambda pair: -pair['count'])
+                for pair in pairs:
+                    # 与 COAUTHOR_TIMELINE 一致，只保留最近的3篇
+                    pair['papers'] = sorted(pair['papers'], key=lambda p: (-(p['year'] or 0), p['id']))[:3]
+                context.pairs = pairs
+
+        self.prefetcher.schedule(fetch, apply)
+
+    def _answer_coauthor_pairs(self, experts: List[str], question_type: str) -> str:
+        """回答多位专家两两之间的合作情况：开始时间、合作次数或合作论文"""
+        if self.context.pairs and experts == self.context.last_entities:
+            pairs = self.context.pairs
+        else:
+            pairs = self._coauthor_pairs(experts)
+        if not pairs:
+            return "这些专家之间未找到直接的合作论文"
+
+        if any(word in question_type for word in ("什么时候", "何时", "哪年", "哪一年", "开始")):
+            response = []
+            for r in pairs:
+                if r['first_year'] is None:
+                    response.append(f"{r['expert1']} 和 {r['expert2']} 合作过 {r['count']} 次，合作年份未知")
+                elif r['first_year'] == r['last_year']:
+                    response.append(f"{r['expert1']} 和 {r['expert2']} 于 {r['first_year']} 年开始合作")
+                else:
+                    response.append(f"{r['expert1']} 和 {r['expert2']} 于 {r['first_year']} 年开始合作，"
+                                    f"最近一次合作在 {r['last_year']} 年")
+            return "\n".join(response)
+
+        if any(word in question_type for word in ("多少", "几次", "次数")):
+            return "\n".join(f"{r['expert1']} 和 {r['expert2']} 一共合作了 {r['count']} 次" for r in pairs)
+
+        # 每对专家只列最近的3篇论文
+        response = []
+        for r in pairs:
+            response.append(f"{r['expert1']} 和 {r['expert2']} 有 {r['count']} 篇合作论文：\n" +
+                            "\n".join(f"- {p['title']}" for p in r['papers']))
+            if r['count'] > 3:
+                response[-1] += f"\n... 等{r['count']}篇论文"
+        return "\n\n".join(response)
+
+    def _coauthor_pairs(self, experts: List[str]) -> List[Dict[str, Any]]:
+        """专家两两之间的合作记录，按合作次数从多到少"""
+        ids = list(chain.from_iterable(self._linked_ids("expert", name) for name in experts))
+        if not ids:
+            return []
+        pairs = self.run_query(queries.COAUTHOR_TIMELINE, ids=ids)
+        if not pairs:
+            # 没有 COAUTHOR 关系的旧数据（导入后未运行 --rebuild-coauthors）从论文作者直接统计
+            pairs = self.run_query(queries.COAUTHOR_TIMELINE_FROM_PAPERS, ids=ids)
+        return pairs
+
     def _get_more_information(self, topic: str) -> str:
         """获取更多相关信息"""
         # 这里可以根据上下文返回更多相关信息
-        query = """
-        MATCH (e:Expert)-[:INTERESTED_IN]->(i:Interest)
-        WHERE i.name CONTAINS $topic
-        WITH e
-        MATCH (e)-[:AUTHORED]->(p:Publication)
-        RETURN e.name, p.title
-        LIMIT 5
-        """
-        results = self.graph.run(query, topic=topic).data()
+        results = self.run_query(queries.TOPIC_PUBLICATIONS, topic=topic)
         
         if not results:
             return f"抱歉，没有找到更多关于{topic}的信息"
@@ -303,78 +738,69 @@ class KnowledgeQA:
             response += f"- {r['e.name']} 发表的论文: {r['p.title']}\n"
         return response
 
+    @query_handler()
     def _handle_expert_by_interest(self, interest: str) -> str:
         """查找研究某领域的专家"""
+        return "".join(self._stream_expert_by_interest(interest))
+
+    @query_handler("_handle_expert_by_interest")
+    def _stream_expert_by_interest(self, interest: str) -> Iterator[str]:
         field_en = self._map_field_name(interest)
-        # 添加调信息
-        # print(f"正在查找领域: {field_en}")
-        
-        # 改查询语句 - 使用小写不敏感的匹配
-        query = """
-        MATCH (e:Expert)-[:INTERESTED_IN]->(i:Interest)
-        WHERE toLower(i.name) = toLower($field_en)
-        RETURN DISTINCT e.name, e.name_zh, e.h_index, e.position
-        ORDER BY e.h_index DESC
-        """
+        # 领域词典解析到 Interest 时按名称匹配，否则模糊匹配；优先读导入时维护的领域排名
+        statement = queries.RANKED_EXPERTS_BY_INTEREST
+        condition, params = self._interest_condition(statement, "i", interest)
+        results = self.stream_query(statement.render(i=condition), limit=queries.RANKING_SIZE, **params)
+        first = next(results, None)
+        ranked = first is not None
+        if first is None:
+            # 有领域的排名尚未生成（旧数据未运行 import_to_neo4j.py --rebuild-rankings）时对领域全部专家排序
+            condition, params = self._interest_condition(queries.EXPERT_BY_INTEREST, "i", interest)
+            results = self.stream_query(queries.EXPERT_BY_INTEREST.render(i=condition), **params)
+            first = next(results, None)
         
-        results = self.graph.run(query, field_en=field_en).data()
-        
-        if not results:
-            # 如果没有结果，尝试模糊匹配
-            query_fuzzy = """
-            MATCH (e:Expert)-[:INTERESTED_IN]->(i:Interest)
-            WHERE toLower(i.name) CONTAINS toLower($field_en)
-            RETURN DISTINCT e.name, e.name_zh, e.h_index, e.position
-            ORDER BY e.h_index DESC
-            """
-            results = self.graph.run(query_fuzzy, field_en=field_en).data()
-            
-            if not results:
-                similar_fields = self._find_similar_fields(field_en)
-                if similar_fields:
-                    return f"抱歉,没有找到完全匹配的专家。您是不是想找这些领域?\n{', '.join(similar_fields)}"
-                return f"抱歉,没有找到研究{interest}的专家"
+        if first is None:
+            similar_fields = self._find_similar_fields(interest)
+            if similar_fields:
+                yield f"抱歉,没有找到完全匹配的专家。您是不是想找这些领域?\n{', '.join(similar_fields)}"
+                return
+            yield f"抱歉,没有找到研究{interest}的专家"
+            return
         
         # 判断是否使用中文显示
-        is_chinese_query = interest in self.field_mapping
+        is_chinese_query = not interest.isascii()
         field_display = f"{interest} ({field_en})" if is_chinese_query else field_en
         
-        response = f"研究{field_display}的主要专家有:\n"
+        yield f"研究{field_display}的主要专家有:\n"
         seen_experts = set()
-        experts_list = []
-        for r in results:
+        rows = 0
+        for r in chain([first], results):
+            rows += 1
             name = r['e.name_zh'] if r['e.name_zh'] else r['e.name']
             if name not in seen_experts:
                 seen_experts.add(name)
-                experts_list.append(name)
+                self._record("expert", name, r.get('e.id'), name=r['e.name'], name_zh=r['e.name_zh'],
+                             h_index=r['e.h_index'], position=r.get('e.position'))
                 position = f"({r['e.position']})" if r.get('e.position') else ""
                 # 如果是中文查询且有英文名，显示中文对照
                 if is_chinese_query and r['e.name']:
                     name_display = f"{name} ({r['e.name']})"
                 else:
                     name_display = name
-                response += f"- {name_display} {position} h指数: {r['e.h_index']}\n"
-        
-        # 更新上下文
-        self.context.update(
-            question=f"查询{interest}领域专家",
-            answer=response,
-            entities=experts_list,
-            topic=interest
-        )
-        
-        return response
+                line = f"- {name_display} {position} h指数: {r['e.h_index']}\n"
+                yield line
+        # 领域排名只保存前 RANKING_SIZE 位，取满时说明列表不完整
+        if ranked and rows >= queries.RANKING_SIZE:
+            yield f"(按h指数列出前{queries.RANKING_SIZE}位)\n"
 
+    @query_handler()
     def _handle_expert_interests(self, expert_name: str) -> str:
         """查询专家的研究领域，处理重名情况"""
-        query = """
-        MATCH (e:Expert)-[:INTERESTED_IN]->(i:Interest)
-        WHERE e.name CONTAINS $name
-        WITH e, collect(i.name) as interests
-        RETURN e.name as name, e.name_zh as name_zh, 
-               e.position as position, interests
-        """
-        results = self.graph.run(query, name=expert_name).data()
+        results = self._expert_profiles(expert_name)
+        if results is not None:
+            results = [r for r in results if r['interests']]
+        else:
+            condition, params = self._entity_condition(queries.EXPERT_INTERESTS, "e", "expert", expert_name)
+            results = self.run_query(queries.EXPERT_INTERESTS.render(e=condition), **params)
         
         if not results:
             return f"抱歉，未找到专家 {expert_name} 的研究领域信息"
@@ -385,12 +811,39 @@ class KnowledgeQA:
                 position = f"，职位：{expert['position']}" if expert.get('position') else ""
                 interests = f"，研究领域：{', '.join(expert['interests'][:3])}" if expert.get('interests') else "，暂无研究领域信息"
                 
-                response += f"{idx}. {expert['name']}{position}{interests}\n"
+                response += f"{idx}. {expert['name']}{position}{interests}{self._format_coauthors(expert)}\n"
             
             response += "\n请提供更多信息以确定具体是哪位专家。"
             return response
         
         expert = results[0]
+        self._record("expert", expert_name, expert.get('id'), name=expert['name'], name_zh=expert.get('name_zh'),
+                     position=expert.get('position'), interests=expert.get('interests'))
+        return self._format_expert_interests(expert)
+
+    def _expert_profiles(self, expert_name: str) -> Optional[List[Dict[str, Any]]]:
+        """按id读取导入时维护的专家资料（研究领域、h指数、论文数、最近论文、主要合作者），一次索引查找
+
+        未链接到专家id，或资料尚未生成（旧数据未运行 import_to_neo4j.py --rebuild-profiles）时返回 None，
+        调用方改为沿关系查询。
+        """
+        ids = self._linked_ids("expert", expert_name)
+        if not ids:
+            return None
+        results = self.run_query(queries.EXPERT_PROFILES, ids=ids)
+        if not results or any(r['interests'] is None for r in results):
+            return None
+        return results
+
+    @staticmethod
+    def _format_coauthors(expert: Dict[str, Any]) -> str:
+        """重名专家列表中附上主要合作者，便于区分"""
+        if not expert.get('top_coauthors'):
+            return ""
+        return f"，主要合作者：{', '.join(expert['top_coauthors'][:3])}"
+
+    @staticmethod
+    def _format_expert_interests(expert: Dict[str, Any]) -> str:
         if not expert.get('interests'):
             return f"抱歉，暂无 {expert['name']} 的研究领域信息"
         
@@ -400,32 +853,23 @@ class KnowledgeQA:
         
         return f"{expert['name']}{position} 的研究领域包括：\n- {interests}"
 
+    @query_handler()
     def _handle_expert_h_index(self, expert_name: str) -> str:
         """查询专家的h指数，处理重名和复杂查询情况"""
         # 处理包含领域信息的查询
         field_match = re.match(r"研究(.*?)的(.*)", expert_name)
         if field_match:
-            field = self._map_field_name(field_match.group(1))
             name = field_match.group(2)
-            query = """
-            MATCH (e:Expert)-[:INTERESTED_IN]->(i:Interest)
-            WHERE e.name CONTAINS $name 
-            AND toLower(i.name) CONTAINS toLower($field)
-            RETURN DISTINCT e.name as name, e.position as position, 
-                    e.h_index as h_index, i.name as interest
-            """
-            results = self.graph.run(query, name=name, field=field).data()
+            statement = queries.EXPERT_H_INDEX_IN_FIELD
+            condition, params = self._entity_condition(statement, "e", "expert", name)
+            field_condition, field_params = self._interest_condition(statement, "i", field_match.group(1))
+            results = self.run_query(statement.render(e=condition, i=field_condition), **params, **field_params)
         else:
-            # 普通查询
-            query = """
-            MATCH (e:Expert)
-            WHERE e.name CONTAINS $name
-            OPTIONAL MATCH (e)-[:INTERESTED_IN]->(i:Interest)
-            WITH e, collect(i.name) as interests
-            RETURN e.name as name, e.position as position, 
-                   e.h_index as h_index, interests
-            """
-            results = self.graph.run(query, name=expert_name).data()
+            # 普通查询，优先读专家资料
+            results = self._expert_profiles(expert_name)
+            if results is None:
+                condition, params = self._entity_condition(queries.EXPERT_H_INDEX, "e", "expert", expert_name)
+                results = self.run_query(queries.EXPERT_H_INDEX.render(e=condition), **params)
         
         if not results:
             if field_match:
@@ -443,11 +887,19 @@ class KnowledgeQA:
                     interests = f"，研究领域：{expert['interest']}" if expert.get('interest') else ""
                 h_index = f"，h指数：{expert['h_index']}" if expert.get('h_index') is not None else ""
                 
-                response += f"{idx}. {expert['name']}{position}{interests}{h_index}\n"
+                response += f"{idx}. {expert['name']}{position}{interests}{h_index}{self._format_coauthors(expert)}\n"
             
             return response
         
         expert = results[0]
+        if not field_match:
+            self._record("expert", expert_name, expert.get('id'), name=expert['name'],
+                         position=expert.get('position'), h_index=expert.get('h_index'),
+                         interests=expert.get('interests'))
+        return self._format_expert_h_index(expert)
+
+    @staticmethod
+    def _format_expert_h_index(expert: Dict[str, Any]) -> str:
         if expert.get('h_index') is None:
             return f"抱歉，暂无 {expert['name']} 的h指数信息"
         
@@ -455,30 +907,40 @@ class KnowledgeQA:
         interests = f"，研究领域：{expert.get('interest')}" if expert.get('interest') else ""
         return f"{expert['name']}{position}{interests} 的h指数为: {expert['h_index']}"
 
+    @query_handler()
     def _handle_expert_publications(self, expert_name: str) -> str:
         """查询专家发表的论文"""
-        query = """
-        MATCH (e:Expert {name: $name})-[:AUTHORED]->(p:Publication)
-        RETURN p.title
-        """
-        results = self.graph.run(query, name=expert_name).data()
+        return "".join(self._stream_expert_publications(expert_name))
+
+    @query_handler("_handle_expert_publications")
+    def _stream_expert_publications(self, expert_name: str) -> Iterator[str]:
+        # 专家资料中的最近论文已是全部论文时直接取用
+        profiles = self._expert_profiles(expert_name)
+        if profiles is not None and all(r['publication_count'] <= len(r['recent_papers'] or ()) for r in profiles):
+            titles = [title for r in profiles for title in r['recent_papers']]
+            if not titles:
+                yield f"抱歉,没有找到{expert_name}发表的论文"
+                return
+            yield f"{expert_name}发表的论文包括:\n" + "".join(f"- {title}\n" for title in titles)
+            return
+
+        condition, params = self._entity_condition(queries.EXPERT_PUBLICATIONS, "e", "expert", expert_name)
+        results = self.stream_query(queries.EXPERT_PUBLICATIONS.render(e=condition), **params)
+        first = next(results, None)
         
-        if not results:
-            return f"抱歉,没有找到{expert_name}发表的论文"
+        if first is None:
+            yield f"抱歉,没有找到{expert_name}发表的论文"
+            return
             
-        response = f"{expert_name}发表的论文包括:\n"
-        for r in results:
-            response += f"- {r['p.title']}\n"
-        return response
+        yield f"{expert_name}发表的论文包括:\n"
+        for r in chain([first], results):
+            yield f"- {r['p.title']}\n"
 
+    @query_handler()
     def _handle_publication_authors(self, title: str) -> str:
         """查论文的作者"""
-        query = """
-        MATCH (e:Expert)-[:AUTHORED]->(p:Publication)
-        WHERE p.title CONTAINS $title
-        RETURN e.name
-        """
-        results = self.graph.run(query, title=title).data()
+        condition, params = self._entity_condition(queries.PUBLICATION_AUTHORS, "p", "publication", title)
+        results = self.run_query(queries.PUBLICATION_AUTHORS.render(p=condition), **params)
         
         if not results:
             return f"抱歉,没有找到论文《{title}》的作者信息"
@@ -486,182 +948,145 @@ class KnowledgeQA:
         authors = [r["e.name"] for r in results]
         return f"论文《{title}》的作者是: {', '.join(authors)}"
 
+    @query_handler()
     def _handle_cooperation(self, experts: tuple) -> str:
         """查询两位专家的合作关系"""
+        return "".join(self._stream_cooperation(experts))
+
+    @query_handler("_handle_cooperation")
+    def _stream_cooperation(self, experts: tuple) -> Iterator[str]:
         try:
             expert1, expert2 = experts
-            # print(f"- 正在查询 {expert1} 和 {expert2} 的合作关系")
             
-            query = """
-            MATCH (e1:Expert)-[:AUTHORED]->(p:Publication)<-[:AUTHORED]-(e2:Expert)
-            WHERE e1.name CONTAINS $name1 AND e2.name CONTAINS $name2
-            RETURN p.title, p.year
-            ORDER BY p.year DESC
-            """
-            results = self.graph.run(query, name1=expert1, name2=expert2).data()
+            condition1, params1 = self._entity_condition(queries.COOPERATION, "e1", "expert", expert1)
+            condition2, params2 = self._entity_condition(queries.COOPERATION, "e2", "expert", expert2)
+            results = self.stream_query(queries.COOPERATION.render(e1=condition1, e2=condition2),
+                                        **params1, **params2)
+            first = next(results, None)
             
-            if not results:
-                return f"未发现{expert1}和{expert2}有直接的合作论文"
+            if first is None:
+                yield f"未发现{expert1}和{expert2}有直接的合作论文"
+                return
             
-            response = f"{expert1}和{expert2}合作发表的论文:\n"
-            for r in results:
+            yield f"{expert1}和{expert2}合作发表的论文:\n"
+            for r in chain([first], results):
                 year = f"({r['p.year']})" if r.get('p.year') else ""
-                response += f"- {r['p.title']} {year}\n"
-            return response
+                yield f"- {r['p.title']} {year}\n"
             
         except Exception as e:
-            return f"抱歉,查询合作关系时出现错误: {str(e)}"
+            yield f"抱歉,查询合作关系时出现错误: {str(e)}"
+
+    @query_handler()
+    def _handle_collaboration_path(self, experts: tuple) -> str:
+        """查询两位专家之间最短的合著链：在内存合著图上双向广度优先搜索，再一次查出每一步的合作论文"""
+        expert1, expert2 = experts
+        sources = self._expert_ids(expert1)
+        if not sources:
+            return f"抱歉，未找到专家 {expert1}"
+        targets = self._expert_ids(expert2)
+        if not targets:
+            return f"抱歉，未找到专家 {expert2}"
+
+        path = self.coauthors.shortest_path(sources, targets)
+        if path is None:
+            return f"未找到{expert1}和{expert2}之间{coauthor_graph.MAX_HOPS}步以内的合作链"
+        if len(path) == 1:
+            return f"{expert1}和{expert2}是同一位专家"
+
+        hops = self.run_query(queries.COLLABORATION_PATH_HOPS, ids=path)
+        if len(hops) == 1:
+            return f"{expert1}和{expert2}直接合作过，如《{hops[0]['title']}》"
+        response = f"{expert1}和{expert2}之间的最短合作链（{len(hops)}步）：\n"
+        for hop in hops:
+            response += f"- {hop['source']} 与 {hop['target']} 合作《{hop['title']}》\n"
+        return response
+
+    def _expert_ids(self, name: str) -> List[str]:
+        """专家姓名对应的id：优先取实体链接结果，否则按姓名查询"""
+        ids = self._linked_ids("expert", name)
+        if ids:
+            return ids
+        return [r['id'] for r in self.run_query(queries.EXPERT_IDS_BY_NAME, name=name)]
 
+    @query_handler()
     def _handle_top_experts_in_field(self, field: str) -> str:
         """查询某领域最具影响力的专家"""
+        return "".join(self._stream_top_experts_in_field(field))
+
+    @query_handler("_handle_top_experts_in_field")
+    def _stream_top_experts_in_field(self, field: str) -> Iterator[str]:
         field_en = self._map_field_name(field)
-        # 使用与_handle_expert_by_interest相同的查询逻辑
-        return self._handle_expert_by_interest(field_en)
+        top_experts = self._precomputed("top_experts")
+        if top_experts is None or field_en.lower() not in top_experts:
+            # 没有预计算结果时，使用与_handle_expert_by_interest相同的查询逻辑
+            return self._stream_expert_by_interest(field_en)
+        return iter([self._format_top_experts(field_en, top_experts[field_en.lower()])])
+
+    def _format_top_experts(self, field_en: str, experts: List[Dict[str, Any]]) -> str:
+        """按 _handle_expert_by_interest 的格式输出预计算的领域专家排名"""
+        response = f"研究{field_en}的主要专家有:\n"
+        experts_list = []
+        for expert in experts:
+            name = expert['name_zh'] if expert.get('name_zh') else expert['name']
+            if name in experts_list:
+                continue
+            experts_list.append(name)
+            self._record("expert", name, expert.get('id'), name=expert['name'], name_zh=expert.get('name_zh'),
+                         h_index=expert.get('h_index'), position=expert.get('position'))
+            position = f"({expert['position']})" if expert.get('position') else ""
+            response += f"- {name} {position} h指数: {expert['h_index']}\n"
+        return response
 
     def _find_similar_fields(self, field: str) -> List[str]:
-        """查找相似的研究领域"""
-        field_en = self._map_field_name(field)
-        query = """
-        MATCH (i:Interest)
-        RETURN DISTINCT i.name as name
-        """
-        all_fields = [r['name'] for r in self.graph.run(query).data()]
-        # print(f"正在查找与 {field_en} 相似的领域")
-        
-        # 使用简单的包含关系查找相似领域
+        """查找相似的研究领域：在领域词典中按字符二元组相似度查找"""
         similar = []
-        for f in all_fields:
-            if (field_en.lower() in f.lower() or 
-                f.lower() in field_en.lower() or 
-                any(word in f.lower() for word in field_en.lower().split())):
-                similar.append(f)
-                # print(f"找到相似领域: {f}")
-        
+        for alias, score in self.lexicon.similar(field, limit=20):
+            if score < 0.4:
+                break
+            similar.extend(name for name in self.lexicon.resolve(alias) if name not in similar)
         return similar[:5]  # 只返回前5个相似领域
 
+    @query_handler()
     def _handle_field_publications(self, field: str) -> str:
         """查询领域相关的论文"""
-        field_en = self._map_field_name(field)
-        # print(f"正在查找{field}领域的论文")
-        
-        # 修改查询语句使用与最近论文查询相同的去重逻辑
-        query = """
-        MATCH (p:Publication)<-[:AUTHORED]-(e:Expert)-[:INTERESTED_IN]->(i:Interest)
-        WHERE toLower(i.name) = toLower($field_en)
-        WITH DISTINCT p.title as title, p.year as year, p.id as id
-        MATCH (p:Publication {id: id})<-[:AUTHORED]-(e:Expert)
-        WITH title, year, id, 
-             COLLECT(DISTINCT {name: e.name, name_zh: e.name_zh}) as authors
-        RETURN title, year, authors
-        ORDER BY year DESC, title
-        LIMIT 10
-        """
-        
-        results = self.graph.run(query, field_en=field_en).data()
-        
-        if not results:
-            # 如果精确匹配没有结果，尝试模糊匹配
-            query_fuzzy = """
-            MATCH (p:Publication)<-[:AUTHORED]-(e:Expert)-[:INTERESTED_IN]->(i:Interest)
-            WHERE toLower(i.name) CONTAINS toLower($field_en)
-            WITH DISTINCT p.title as title, p.year as year, p.id as id
-            MATCH (p:Publication {id: id})<-[:AUTHORED]-(e:Expert)
-            WITH title, year, id, 
-                 COLLECT(DISTINCT {name: e.name, name_zh: e.name_zh}) as authors
-            RETURN title, year, authors
-            ORDER BY year DESC, title
-            LIMIT 10
-            """
-            results = self.graph.run(query_fuzzy, field_en=field_en).data()
-            
+        results = self._ranked_field_publications(field, dated=False, limit=10)
         if not results:
             return f"抱歉，没有找到{field}领域的相关论文"
         
-        # 判断是否使用中文显示
-        is_chinese_query = field in self.field_mapping
-        field_display = f"{field} ({field_en})" if is_chinese_query else field_en
-        
-        response = f"{field_display}领域的相关论文包括:\n"
-        
-        # 使用集合来跟踪已处理的论文
-        seen_titles = set()
-        
-        for r in results:
-            # 如果论文标题已经处理过，跳过
-            if r['title'] in seen_titles:
-                continue
-            seen_titles.add(r['title'])
-            
-            year = f"({r['year']})" if r.get('year') else ""
-            
-            # 处理多个作者的显示
-            author_displays = []
-            for author in r['authors']:
-                if is_chinese_query and author['name'] and author['name_zh']:
-                    author_displays.append(f"{author['name_zh']} ({author['name']})")
-                else:
-                    author_displays.append(author['name_zh'] if author['name_zh'] else author['name'])
-            
-            authors = f" - 作者: {', '.join(author_displays)}" if author_displays else ""
-            response += f"- {r['title']} {year}{authors}\n"
-        
-        return response
+        response = f"{self._field_display(field)}领域的相关论文包括:\n"
+        return response + self._format_field_publications(field, results)
 
+    @query_handler()
     def _handle_recent_field_publications(self, field: str) -> str:
         """查询领域最近的论文"""
-        field_en = self._map_field_name(field)
-        # print(f"正在查找{field}领域最近的论文")
-        
-        # 修改查询语句，先聚合论文信息再处理作者
-        query = """
-        MATCH (p:Publication)<-[:AUTHORED]-(e:Expert)-[:INTERESTED_IN]->(i:Interest)
-        WHERE toLower(i.name) = toLower($field_en) AND p.year IS NOT NULL
-        WITH DISTINCT p.title as title, p.year as year, p.id as id
-        MATCH (p:Publication {id: id})<-[:AUTHORED]-(e:Expert)
-        WITH title, year, id, 
-             COLLECT(DISTINCT {name: e.name, name_zh: e.name_zh}) as authors
-        RETURN title, year, authors
-        ORDER BY year DESC, title
-        LIMIT 5
-        """
-        
-        results = self.graph.run(query, field_en=field_en).data()
-        
-        if not results:
-            # 如果精确匹配没有结果，尝试模糊匹配
-            query_fuzzy = """
-            MATCH (p:Publication)<-[:AUTHORED]-(e:Expert)-[:INTERESTED_IN]->(i:Interest)
-            WHERE toLower(i.name) CONTAINS toLower($field_en) AND p.year IS NOT NULL
-            WITH DISTINCT p.title as title, p.year as year, p.id as id
-            MATCH (p:Publication {id: id})<-[:AUTHORED]-(e:Expert)
-            WITH title, year, id, 
-                 COLLECT(DISTINCT {name: e.name, name_zh: e.name_zh}) as authors
-            RETURN title, year, authors
-            ORDER BY year DESC, title
-            LIMIT 5
-            """
-            results = self.graph.run(query_fuzzy, field_en=field_en).data()
-            
+        results = self._ranked_field_publications(field, dated=True, limit=5)
         if not results:
             return f"抱歉，没有找到{field}领域的相关论文"
         
-        # 判断是否使用中文显示
-        is_chinese_query = field in self.field_mapping
-        field_display = f"{field} ({field_en})" if is_chinese_query else field_en
-        
         # 获取最新年份
         latest_year = results[0]['year']
-        response = f"{field_display}领域最近({latest_year}年)的研究论文包括:\n"
-        
-        # 使用集合来跟踪已处理的论文
-        seen_titles = set()
-        
+        response = f"{self._field_display(field)}领域最近({latest_year}年)的研究论文包括:\n"
+        return response + self._format_field_publications(field, results)
+
+    def _ranked_field_publications(self, field: str, dated: bool, limit: int) -> List[Dict[str, Any]]:
+        """领域最近的论文：读导入时维护的领域排名，有领域的排名尚未生成时对领域全部论文排序"""
+        names = self._interest_names(field)
+        results = self.run_query(queries.RANKED_FIELD_PUBLICATIONS, names=names, dated=dated, limit=limit)
+        if not results:
+            fallback = queries.RECENT_FIELD_PUBLICATIONS if dated else queries.FIELD_PUBLICATIONS
+            results = self.run_query(fallback, names=names, limit=limit)
+        return results
+
+    def _field_display(self, field: str) -> str:
+        """中文提问时显示为 "中文 (英文)"，否则只显示英文领域名"""
+        field_en = self._map_field_name(field)
+        return f"{field} ({field_en})" if not field.isascii() else field_en
+
+    def _format_field_publications(self, field: str, results: List[Dict[str, Any]]) -> str:
+        """每篇论文一行：标题、年份和作者，中文提问时作者显示中英文对照"""
+        is_chinese_query = not field.isascii()
+        lines = []
         for r in results:
-            # 如果论文标题已经处理过，跳过
-            if r['title'] in seen_titles:
-                continue
-            seen_titles.add(r['title'])
-            
             year = f"({r['year']})" if r.get('year') else ""
             
             # 处理多个作者的显示
@@ -673,26 +1098,16 @@ class KnowledgeQA:
                     author_displays.append(author['name_zh'] if author['name_zh'] else author['name'])
             
             authors = f" - 作者: {', '.join(author_displays)}" if author_displays else ""
-            response += f"- {r['title']} {year}{authors}\n"
-        
-        return response
+            lines.append(f"- {r['title']} {year}{authors}\n")
+        return "".join(lines)
 
+    @query_handler()
     def _handle_publication_year(self, title: str) -> str:
         """查询论文发表年份"""
-        # print(f"正在查找论文 {title} 的发表年份")
         
         # 查询论文信息
-        query = """
-        MATCH (p:Publication)
-        WHERE p.title CONTAINS $title
-        WITH DISTINCT p.title as title, p.year as year, p.id as id
-        MATCH (p:Publication {id: id})<-[:AUTHORED]-(e:Expert)
-        WITH title, year, 
-             COLLECT(DISTINCT {name: e.name, name_zh: e.name_zh}) as authors
-        RETURN title, year, authors
-        """
-        
-        results = self.graph.run(query, title=title).data()
+        condition, params = self._entity_condition(queries.PUBLICATION_YEAR, "p", "publication", title)
+        results = self.run_query(queries.PUBLICATION_YEAR.render(p=condition), **params)
         
         if not results:
             return f"抱歉，没有找到标题包含 '{title}' 的论文"
@@ -722,21 +1137,13 @@ class KnowledgeQA:
         
         return response.strip()
 
+    @query_handler()
     def _handle_publication_field(self, title: str) -> str:
         """查询论文所属领域"""
-        # print(f"正在查找论文 {title} 的研究领域")
         
         # 查询论文相关的领域信息
-        query = """
-        MATCH (p:Publication)<-[:AUTHORED]-(e:Expert)-[:INTERESTED_IN]->(i:Interest)
-        WHERE p.title CONTAINS $title
-        WITH DISTINCT p.title as title, p.year as year,
-             COLLECT(DISTINCT i.name) as interest_names,
-             COLLECT(DISTINCT {name: e.name, name_zh: e.name_zh}) as authors
-        RETURN title, year, interest_names, authors
-        """
-        
-        results = self.graph.run(query, title=title).data()
+        condition, params = self._entity_condition(queries.PUBLICATION_FIELD, "p", "publication", title)
+        results = self.run_query(queries.PUBLICATION_FIELD.render(p=condition), **params)
         
         if not results:
             return f"抱歉，没有找到标题包含 '{title}' 的论文"
@@ -773,64 +1180,29 @@ class KnowledgeQA:
         """按研究领域搜索专家"""
         return self._handle_expert_by_interest(field)
 
+    @query_handler()
     def search_experts_by_h_index(self, min_h: int, max_h: int) -> list:
         """按h指数范围搜索专家"""
-        query = """
-        MATCH (e:Expert)
-        WHERE e.h_index >= $min_h AND e.h_index <= $max_h
-        RETURN e.name as name, e.name_zh as name_zh, e.h_index as h_index
-        ORDER BY e.h_index DESC
-        """
-        results = self.graph.run(query, min_h=min_h, max_h=max_h).data()
-        return results
+        return self.run_query(queries.EXPERTS_BY_H_INDEX, min_h=min_h, max_h=max_h)
 
+    @query_handler()
+    def search_experts_by_paper_keyword(self, keyword: str) -> list:
+        """按论文标题关键词搜索专家"""
+        return self.run_query(queries.EXPERTS_BY_PAPER_KEYWORD, keyword=keyword)
+
+    @query_handler()
     def search_experts_by_interest(self, interest: str) -> list:
         """按研究兴趣搜索专家"""
-        field_en = self._map_field_name(interest)
-        
-        query = """
-        MATCH (e:Expert)-[:INTERESTED_IN]->(i:Interest)
-        WHERE toLower(i.name) = toLower($field_en)
-        WITH e, i
-        ORDER BY e.h_index DESC
-        RETURN DISTINCT {
-            name: e.name,
-            name_zh: e.name_zh,
-            h_index: e.h_index,
-            position: e.position
-        } as expert
-        """
-        
-        results = self.graph.run(query, field_en=field_en).data()
-        
-        if not results:
-            # 如果没有结果，尝试模糊匹配
-            query_fuzzy = """
-            MATCH (e:Expert)-[:INTERESTED_IN]->(i:Interest)
-            WHERE toLower(i.name) CONTAINS toLower($field_en)
-            WITH e, i
-            ORDER BY e.h_index DESC
-            RETURN DISTINCT {
-                name: e.name,
-                name_zh: e.name_zh,
-                h_index: e.h_index,
-                position: e.position
-            } as expert
-            """
-            results = self.graph.run(query_fuzzy, field_en=field_en).data()
+        condition, params = self._interest_condition(queries.EXPERTS_BY_INTEREST, "i", interest)
+        results = self.run_query(queries.EXPERTS_BY_INTEREST.render(i=condition), **params)
         
         return [r['expert'] for r in results]
 
+    @query_handler()
     def get_collaboration_network(self, expert_name: str, depth: int = 2) -> dict:
-        """获取专家合作网络"""
-        query = f"""
-        MATCH path = (e1:Expert)-[:AUTHORED*1..{depth}]-(e2:Expert)
-        WHERE e1.name CONTAINS $name
-        WITH DISTINCT e1, e2
-        RETURN e1.name as source, e2.name as target
-        LIMIT 50
-        """
-        results = self.graph.run(query, name=expert_name).data()
+        """获取专家合作网络，depth 限制在 1~queries.MAX_NETWORK_DEPTH 之间"""
+        depth = max(1, min(int(depth), queries.MAX_NETWORK_DEPTH))
+        results = self.run_query(queries.COLLABORATION_NETWORK.render(depth=str(depth)), name=expert_name)
         
         # 构建网络数据
         nodes = set()
@@ -845,43 +1217,54 @@ class KnowledgeQA:
             "links": links
         }
 
+    @query_handler()
+    def graph_version(self) -> Any:
+        """图数据版本号，导入器每次写入后更新，用于使缓存的统计结果失效"""
+        results = self.run_query(queries.GRAPH_VERSION)
+        return results[0]['version'] if results else None
+
+    def _precomputed(self, name: str) -> Any:
+        """读取预计算快照中的结果，快照不存在或不是当前图版本时返回 None"""
+        snapshot = self.snapshot.get()
+        if snapshot is None:
+            return None
+        if snapshot.get("graph_version") != self.result_cache.version(self.uri, self.graph_version):
+            return None
+        return snapshot.get(name)
+
     def get_h_index_distribution(self) -> list:
         """获取h指数分布数据"""
-        query = """
-        MATCH (e:Expert)
-        WHERE e.h_index IS NOT NULL
-        RETURN e.h_index as h_index
-        """
-        results = self.graph.run(query).data()
-        return [r['h_index'] for r in results]
+        return [h for h, count in self.get_h_index_counts().items() for _ in range(count)]
+
+    def get_h_index_counts(self) -> dict:
+        """获取各h指数的专家人数，数据量与专家数无关，适合绘图"""
+        counts = self._precomputed("h_index_counts")
+        if counts is None:
+            counts = self._query_h_index_counts()
+        return counts
+
+    @cached_by_graph_version
+    @query_handler()
+    def _query_h_index_counts(self) -> dict:
+        return precompute.h_index_counts(self.run_query)
 
     def get_field_distribution(self) -> dict:
         """获取研究领域分布数据"""
-        query = """
-        MATCH (i:Interest)<-[:INTERESTED_IN]-(e:Expert)
-        WITH i.name as field, COUNT(DISTINCT e) as count
-        RETURN field, count
-        ORDER BY count DESC
-        LIMIT 10
-        """
-        results = self.graph.run(query).data()
-        return {r['field']: r['count'] for r in results}
+        distribution = self._precomputed("field_distribution")
+        if distribution is None:
+            distribution = self._query_field_distribution()
+        return distribution
 
+    @cached_by_graph_version
+    @query_handler()
+    def _query_field_distribution(self) -> dict:
+        return precompute.field_distribution(self.run_query)
+
+    @query_handler()
     def get_field_network(self, field: str) -> dict:
         """获取研究领域关系网络"""
         field_en = self._map_field_name(field)
-        
-        query = """
-        MATCH (i1:Interest)<-[:INTERESTED_IN]-(e:Expert)-[:INTERESTED_IN]->(i2:Interest)
-        WHERE toLower(i1.name) CONTAINS toLower($field_en)
-        WITH i1, i2, COUNT(e) as weight
-        WHERE weight > 1
-        RETURN i1.name as source, i2.name as target, weight
-        ORDER BY weight DESC
-        LIMIT 50
-        """
-        
-        results = self.graph.run(query, field_en=field_en).data()
+        results = self.run_query(queries.FIELD_NETWORK, field_en=field_en)
         
         # 构建网络数据
         nodes = set()
@@ -902,15 +1285,15 @@ class KnowledgeQA:
 
     def get_yearly_publication_stats(self) -> dict:
         """获取年度论文发表统计"""
-        query = """
-        MATCH (p:Publication)
-        WHERE p.year IS NOT NULL
-        WITH toInteger(p.year) as year, COUNT(p) as count
-        RETURN year, count
-        ORDER BY year
-        """
-        results = self.graph.run(query).data()
-        return {r['year']: r['count'] for r in results}
+        stats = self._precomputed("yearly_publications")
+        if stats is None:
+            stats = self._query_yearly_publication_stats()
+        return stats
+
+    @cached_by_graph_version
+    @query_handler()
+    def _query_yearly_publication_stats(self) -> dict:
+        return precompute.yearly_publication_counts(self.run_query)
 
 def main():
     # 创建问答系统实例
@@ -0,0 +1,586 @@
+"""Cypher 查询目录
+
+问答系统、各页面和预计算用到的全部 Cypher 都在这里登记，每条语句有名字，取值一律通过参数传入。
+可变部分只有两类，都在模板的槽位中列出全部可选片段，render 时不在列表中的片段直接报错：
+- 实体条件：链接到实体时按 id/name 匹配（走索引），否则按文本模糊匹配，如 e=("e.id IN $e_ids", "e.name CONTAINS $e_text")
+- 变长路径的上界：Cypher 不允许用参数，只能是列出的几个值
+
+这样每条语句只有有限几种文本，Neo4j 的执行计划缓存以查询文本为键，同一语句反复执行时都能命中缓存。
+应用启动时（KnowledgeQA.connect）和导入数据后用 EXPLAIN 校验全部语句（validate），顺带预热执行计划缓存，
+每个进程只校验一次，校验失败的结果也会记下；执行时在 QueryMetrics 中按查询文本估计计划缓存命中。也可以单独校验：
+
+    python src/queries.py --uri bolt://localhost:7687 --user neo4j --password 123456
+
+领域论文查询先解析出 Interest 名称（见 interest_lexicon.py），再沿
+Interest<-Expert->Publication 扩展一次，按论文节点去重、按年份取前 k 篇后才展开作者，
+作者数只与返回的 k 篇论文有关。
+"""
+import argparse
+import itertools
+import logging
+import sys
+import threading
+from typing import Dict, Hashable, List, Sequence, Tuple, Union
+
+from query_metrics import plan_db_hits
+
+logger = logging.getLogger(__name__)
+
+
+class Query(str):
+    """一条可直接执行的查询文本，name 为它在目录中的语句名"""
+
+    def __new__(cls, text: str, name: str):
+        query = super().__new__(cls, text)
+        query.name = name
+        return query
+
+
+class Statement:
+    """带槽位的查询模板，模板中的 {槽位} 由 render 从可选片段中选一个填入，字面量花括号写作 {{ }}
+
+    Args:
+        name: 语句名
+        text: 查询模板
+        slots: 槽位 -> 可选片段；实体条件约定第一个为按索引匹配，第二个为模糊匹配
+    """
+
+    def __init__(self, name: str, text: str, **slots: Sequence[str]):
+        self.name = name
+        self.text = text
+        self.slots: Dict[str, Tuple[str, ...]] = {slot: tuple(options) for slot, options in slots.items()}
+        self._rendered: Dict[Tuple[str, ...], Query] = {}
+
+    def render(self, **fragments: str) -> Query:
+        """填入槽位，返回查询文本"""
+        if set(fragments) != set(self.slots):
+            raise ValueError(f"查询 {self.name} 的槽位为 {sorted(self.slots)}，实际传入 {sorted(fragments)}")
+        key = tuple(fragments[slot] for slot in self.slots)
+        query = self._rendered.get(key)
+        if query is None:
+            for slot, fragment in fragments.items():
+                if fragment not in self.slots[slot]:
+                    raise ValueError(f"查询 {self.name} 的槽位 {slot} 不接受片段 {fragment!r}")
+            query = self._rendered[key] = Query(self.text.format(**fragments), self.name)
+        return query
+
+    def variants(self) -> List[Query]:
+        """全部槽位组合对应的查询文本"""
+        names = list(self.slots)
+        return [self.render(**dict(zip(names, choice)))
+                for choice in itertools.product(*(self.slots[name] for name in names))]
+
+
+# 语句名 -> 语句，validate 校验的范围
+CATALOGUE: Dict[str, Statement] = {}
+
+
+def template(name: str, text: str, **slots: Sequence[str]) -> Statement:
+    """登记带槽位的语句"""
+    if name in CATALOGUE:
+        raise ValueError(f"查询 {name} 重复登记")
+    statement = CATALOGUE[name] = Statement(name, text, **slots)
+    return statement
+
+
+def query(name: str, text: str) -> Query:
+    """登记没有槽位的语句，直接返回查询文本"""
+    return template(name, text.replace("{", "{{").replace("}", "}}")).render()
+
+
+# 实体条件的可选片段：(按索引匹配, 模糊匹配)
+def _expert(var: str, fallback: str = "{var}.name CONTAINS ${var}_text") -> Tuple[str, str]:
+    return f"{var}.id IN ${var}_ids", fallback.format(var=var)
+
+
+def _publication(var: str) -> Tuple[str, str]:
+    return f"{var}.id IN ${var}_ids", f"{var}.title CONTAINS ${var}_text"
+
+
+def _interest(var: str) -> Tuple[str, str]:
+    return f"{var}.name IN ${var}_names", f"toLower({var}.name) CONTAINS toLower(${var}_text)"
+
+
+# ---- 图元数据和实体表 ----
+
+GRAPH_VERSION = query("graph_version", """
+MATCH (m:GraphMeta {id: 'graph'})
+RETURN m.version as version
+""")
+
+# 实体链接和分词词典用的全部专家
+EXPERT_NAMES = query("expert_names", """
+MATCH (e:Expert)
+RETURN e.id as id, e.name as name, e.name_zh as name_zh
+""")
+
+PUBLICATION_TITLES = query("publication_titles", """
+MATCH (p:Publication)
+RETURN p.id as id, p.title as title
+""")
+
+INTEREST_NAMES = query("interest_names", """
+MATCH (i:Interest)
+RETURN i.name as name
+""")
+
+# 有中文名的主题，用于领域词典
+TOPIC_NAMES_ZH = query("topic_names_zh", """
+MATCH (t:Topic)
+WHERE t.name_zh IS NOT NULL AND t.name_zh <> ''
+RETURN t.name as name, t.name_zh as name_zh
+""")
+
+# ---- 问答意图 ----
+
+# 名称包含 $text 的领域，用于领域词典解析不到时的模糊匹配
+INTERESTS_CONTAINING = query("interests_containing", """
+MATCH (i:Interest)
+WHERE toLower(i.name) CONTAINS toLower($text)
+RETURN i.name as name
+LIMIT $limit
+""")
+
+EXPERT_BY_INTEREST = template("expert_by_interest", """
+MATCH (e:Expert)-[:INTERESTED_IN]->(i:Interest)
+WHERE {i}
+RETURN DISTINCT e.id, e.name, e.name_zh, e.h_index, e.position
+ORDER BY e.h_index DESC
+""", i=_interest("i"))
+
+# 导入时维护的领域排名（见 import_to_neo4j.Neo4jImporter.update_rankings）中每个领域保存的专家和论文数
+RANKING_SIZE = 20
+
+# 领域排名中 h 指数最高的专家，多个领域时合并后取前 $limit 位；
+# 匹配到的领域中有任何一个还没有排名时不返回结果，由调用方改为对领域全部专家排序
+RANKED_EXPERTS_BY_INTEREST = template("ranked_experts_by_interest", """
+MATCH (i:Interest)
+WHERE {i}
+WITH COLLECT(i) as interests
+WHERE all(x IN interests WHERE x.top_expert_ids IS NOT NULL)
+UNWIND interests AS i
+UNWIND i.top_expert_ids AS eid
+MATCH (e:Expert {{id: eid}})
+WITH DISTINCT e
+RETURN e.id, e.name, e.name_zh, e.h_index, e.position
+ORDER BY coalesce(e.h_index, -1) DESC, e.id
+LIMIT $limit
+""", i=_interest("i"))
+
+EXPERT_INTERESTS = template("expert_interests", """
+MATCH (e:Expert)-[:INTERESTED_IN]->(i:Interest)
+WHERE {e}
+WITH e, collect(i.name) as interests
+RETURN e.id as id, e.name as name, e.name_zh as name_zh,
+       e.position as position, interests
+""", e=_expert("e"))
+
+# “研究某领域的某专家”的 h 指数
+EXPERT_H_INDEX_IN_FIELD = template("expert_h_index_in_field", """
+MATCH (e:Expert)-[:INTERESTED_IN]->(i:Interest)
+WHERE {e}
+AND {i}
+RETURN DISTINCT e.name as name, e.position as position,
+       e.h_index as h_index, i.name as interest
+""", e=_expert("e"), i=_interest("i"))
+
+EXPERT_H_INDEX = template("expert_h_index", """
+MATCH (e:Expert)
+WHERE {e}
+OPTIONAL MATCH (e)-[:INTERESTED_IN]->(i:Interest)
+WITH e, collect(i.name) as interests
+RETURN e.id as id, e.name as name, e.position as position,
+       e.h_index as h_index, interests
+""", e=_expert("e"))
+
+# 导入时维护的专家资料（见 import_to_neo4j.Neo4jImporter.update_profiles），按id一次读取
+EXPERT_PROFILES = query("expert_profiles", """
+MATCH (e:Expert)
+WHERE e.id IN $ids
+RETURN e.id as id, e.name as name, e.name_zh as name_zh, e.position as position,
+       e.h_index as h_index, e.profile_interests as interests,
+       e.publication_count as publication_count, e.recent_papers as recent_papers,
+       e.top_coauthors as top_coauthors
+""")
+
+EXPERT_PUBLICATIONS = template("expert_publications", """
+MATCH (e:Expert)-[:AUTHORED]->(p:Publication)
+WHERE {e}
+RETURN p.title
+""", e=_expert("e", "{var}.name = ${var}_text"))
+
+PUBLICATION_AUTHORS = template("publication_authors", """
+MATCH (e:Expert)-[:AUTHORED]->(p:Publication)
+WHERE {p}
+RETURN e.name
+""", p=_publication("p"))
+
+COOPERATION = template("cooperation", """
+MATCH (e1:Expert)-[:AUTHORED]->(p:Publication)<-[:AUTHORED]-(e2:Expert)
+WHERE {e1} AND {e2}
+RETURN p.title, p.year
+ORDER BY p.year DESC
+""", e1=_expert("e1"), e2=_expert("e2"))
+
+# 领域论文：按年份倒序取前 $limit 篇，附带全部作者
+FIELD_PUBLICATIONS = query("field_publications", """
+MATCH (i:Interest)<-[:INTERESTED_IN]-(:Expert)-[:AUTHORED]->(p:Publication)
+WHERE i.name IN $names
+WITH DISTINCT p
+ORDER BY p.year DESC, p.title
+LIMIT $limit
+MATCH (p)<-[:AUTHORED]-(a:Expert)
+WITH p, COLLECT({name: a.name, name_zh: a.name_zh}) as authors
+RETURN p.title as title, p.year as year, authors
+ORDER BY year DESC, title
+""")
+
+# 领域最近的论文：同上，只取有年份的论文
+RECENT_FIELD_PUBLICATIONS = query("recent_field_publications", """
+MATCH (i:Interest)<-[:INTERESTED_IN]-(:Expert)-[:AUTHORED]->(p:Publication)
+WHERE i.name IN $names AND p.year IS NOT NULL
+WITH DISTINCT p
+ORDER BY p.year DESC, p.title
+LIMIT $limit
+MATCH (p)<-[:AUTHORED]-(a:Expert)
+WITH p, COLLECT({name: a.name, name_zh: a.name_zh}) as authors
+RETURN p.title as title, p.year as year, authors
+ORDER BY year DESC, title
+""")
+
+# 同上，从领域排名中的最近论文取前 $limit 篇，$dated 为 true 时只取有年份的论文；
+# 与 RANKED_EXPERTS_BY_INTEREST 一样，有领域还没有排名时不返回结果
+RANKED_FIELD_PUBLICATIONS = query("ranked_field_publications", """
+MATCH (i:Interest)
+WHERE i.name IN $names
+WITH COLLECT(i) as interests
+WHERE all(x IN interests WHERE x.recent_paper_ids IS NOT NULL)
+UNWIND interests AS i
+UNWIND i.recent_paper_ids AS pid
+MATCH (p:Publication {id: pid})
+WHERE NOT $dated OR p.year IS NOT NULL
+WITH DISTINCT p
+ORDER BY coalesce(p.year, -1) DESC, p.title
+LIMIT $limit
+MATCH (p)<-[:AUTHORED]-(a:Expert)
+WITH p, COLLECT({name: a.name, name_zh: a.name_zh}) as authors
+RETURN p.title as title, p.year as year, authors
+ORDER BY year DESC, title
+""")
+
+PUBLICATION_YEAR = template("publication_year", """
+MATCH (p:Publication)
+WHERE {p}
+WITH DISTINCT p.title as title, p.year as year, p.id as id
+MATCH (p:Publication {{id: id}})<-[:AUTHORED]-(e:Expert)
+WITH title, year,
+     COLLECT(DISTINCT {{name: e.name, name_zh: e.name_zh}}) as authors
+RETURN title, year, authors
+""", p=_publication("p"))
+
+PUBLICATION_FIELD = template("publication_field", """
+MATCH (p:Publication)<-[:AUTHORED]-(e:Expert)-[:INTERESTED_IN]->(i:Interest)
+WHERE {p}
+WITH DISTINCT p.title as title, p.year as year,
+     COLLECT(DISTINCT i.name) as interest_names,
+     COLLECT(DISTINCT {{name: e.name, name_zh: e.name_zh}}) as authors
+RETURN title, year, interest_names, authors
+""", p=_publication("p"))
+
+# 合作链：导入时建立的 COAUTHOR 关系的两端专家id，用于构建内存中的合著图（见 coauthor_graph.py）
+COAUTHOR_PAIRS = query("coauthor_pairs", """
+MATCH (a:Expert)-[:COAUTHOR]->(b:Expert)
+RETURN [a.id, b.id] as authors
+""")
+
+# 没有 COAUTHOR 关系的旧数据：每篇有多位作者的论文的作者id
+PUBLICATION_AUTHOR_IDS = query("publication_author_ids", """
+MATCH (p:Publication)<-[:AUTHORED]-(e:Expert)
+WITH p, COLLECT(e.id) as authors
+WHERE size(authors) > 1
+RETURN authors
+""")
+
+# 合作链上相邻两位专家的姓名，以及他们最近的一篇合作论文
+COLLABORATION_PATH_HOPS = query("collaboration_path_hops", """
+UNWIND range(0, size($ids) - 2) as hop
+MATCH (a:Expert {id: $ids[hop]})-[:AUTHORED]->(p:Publication)<-[:AUTHORED]-(b:Expert {id: $ids[hop + 1]})
+WITH hop, a, b, p
+ORDER BY p.year DESC
+WITH hop, a, b, COLLECT(p.title)[0] as title
+RETURN hop, a.name as source, b.name as target, title
+ORDER BY hop
+""")
+
+# 实体链接找不到专家时按姓名查专家id
+EXPERT_IDS_BY_NAME = query("expert_ids_by_name", """
+MATCH (e:Expert)
+WHERE e.name CONTAINS $name OR e.name_zh CONTAINS $name
+RETURN e.id as id
+LIMIT 20
+""")
+
+# ---- 追问 ----
+
+# “他们之间有合作吗”“什么时候开始合作的”“合作了多少次”：上一轮提到的专家两两之间的合作记录，
+# 由导入时维护的 COAUTHOR 关系直接读出（见 import_to_neo4j.py）
+# papers 为最近的3篇合作论文
+COAUTHOR_TIMELINE = query("coauthor_timeline", """
+MATCH (a:Expert)-[c:COAUTHOR]->(b:Expert)
+WHERE a.id IN $ids AND b.id IN $ids
+UNWIND c.paper_ids AS pid
+MATCH (p:Publication {id: pid})
+WITH a, b, c, p
+ORDER BY coalesce(p.year, 0) DESC, p.id
+WITH a, b, c, COLLECT({id: p.id, title: p.title})[..3] as papers
+RETURN a.name as expert1, b.name as expert2, c.first_year as first_year,
+       c.last_year as last_year, c.count as count, papers
+ORDER BY count DESC
+""")
+
+# 没有 COAUTHOR 关系的旧数据：从论文作者直接统计，结果列与 COAUTHOR_TIMELINE 相同
+COAUTHOR_TIMELINE_FROM_PAPERS = query("coauthor_timeline_from_papers", """
+MATCH (a:Expert)-[:AUTHORED]->(p:Publication)<-[:AUTHORED]-(b:Expert)
+WHERE a.id IN $ids AND b.id IN $ids AND a.id < b.id
+WITH a, b, p, CASE WHEN p.year > 0 THEN p.year END as year
+ORDER BY coalesce(year, 0) DESC, p.id
+WITH a, b, min(year) as first_year, max(year) as last_year, count(p) as count,
+     COLLECT({id: p.id, title: p.title})[..3] as papers
+RETURN a.name as expert1, b.name as expert2, first_year, last_year, count, papers
+ORDER BY count DESC
+""")
+
+# 追问预取：$ids 中的专家取研究领域和前 $papers 篇论文，$pair_ids 中的专家取两两之间的合作及合作论文（带年份，取用时按年份排序）
+FOLLOW_UP_PREFETCH = query("follow_up_prefetch", """
+UNWIND $pair_ids AS id
+MATCH (e:Expert {id: id})
+WITH e, e.id IN $ids as detailed
+WITH e, detailed,
+     CASE WHEN detailed THEN [(e)-[:AUTHORED]->(p:Publication) | p.title] END as titles
+RETURN e.id as id,
+       CASE WHEN detailed THEN [(e)-[:INTERESTED_IN]->(i:Interest) | i.name] END as interests,
+       size(titles) as publication_count, titles[..$papers] as publications,
+       [(e)-[c:COAUTHOR]->(b:Expert) WHERE b.id IN $pair_ids |
+        {expert1: e.name, expert2: b.name, first_year: c.first_year, last_year: c.last_year,
+         count: c.count,
+         papers: [(e)-[:AUTHORED]->(p:Publication)<-[:AUTHORED]-(b) WHERE p.id IN c.paper_ids |
+                  {id: p.id, title: p.title, year: p.year}]}] as pairs
+""")
+
+# “还有吗”：研究当前话题的专家的论文
+TOPIC_PUBLICATIONS = query("topic_publications", """
+MATCH (e:Expert)-[:INTERESTED_IN]->(i:Interest)
+WHERE i.name CONTAINS $topic
+WITH e
+MATCH (e)-[:AUTHORED]->(p:Publication)
+RETURN e.name, p.title
+LIMIT 5
+""")
+
+# ---- 专家搜索和关系分析页面 ----
+
+EXPERTS_BY_H_INDEX = query("experts_by_h_index", """
+MATCH (e:Expert)
+WHERE e.h_index >= $min_h AND e.h_index <= $max_h
+RETURN e.name as name, e.name_zh as name_zh, e.h_index as h_index
+ORDER BY e.h_index DESC
+""")
+
+EXPERTS_BY_INTEREST = template("experts_by_interest", """
+MATCH (e:Expert)-[:INTERESTED_IN]->(i:Interest)
+WHERE {i}
+WITH e, i
+ORDER BY e.h_index DESC
+RETURN DISTINCT {{
+    name: e.name,
+    name_zh: e.name_zh,
+    h_index: e.h_index,
+    position: e.position
+}} as expert
+""", i=_interest("i"))
+
+EXPERTS_BY_PAPER_KEYWORD = query("experts_by_paper_keyword", """
+MATCH (e:Expert)-[:AUTHORED]->(p:Publication)
+WHERE p.title CONTAINS $keyword
+RETURN DISTINCT e.name as name, e.h_index as h_index
+ORDER BY e.h_index DESC
+""")
+
+# 组合条件搜索，未给出的条件传 null
+SEARCH_EXPERTS = query("search_experts", """
+MATCH (e:Expert)
+WHERE ($field IS NULL OR EXISTS { MATCH (e)-[:INTERESTED_IN]->(:Interest {name: $field}) })
+AND ($min_h IS NULL OR e.h_index >= $min_h)
+AND ($max_h IS NULL OR e.h_index <= $max_h)
+AND ($keyword IS NULL OR EXISTS {
+    MATCH (e)-[:AUTHORED]->(p:Publication) WHERE p.title CONTAINS $keyword
+})
+RETURN DISTINCT e.name as name, e.h_index as h_index
+ORDER BY e.h_index DESC
+LIMIT 10
+""")
+
+# 合作网络的最大深度，即 AUTHORED 变长路径上界的可选值
+MAX_NETWORK_DEPTH = 3
+
+COLLABORATION_NETWORK = template("collaboration_network", """
+MATCH path = (e1:Expert)-[:AUTHORED*1..{depth}]-(e2:Expert)
+WHERE e1.name CONTAINS $name
+WITH DISTINCT e1, e2
+RETURN e1.name as source, e2.name as target
+LIMIT 50
+""", depth=[str(d) for d in range(1, MAX_NETWORK_DEPTH + 1)])
+
+FIELD_NETWORK = query("field_network", """
+MATCH (i1:Interest)<-[:INTERESTED_IN]-(e:Expert)-[:INTERESTED_IN]->(i2:Interest)
+WHERE toLower(i1.name) CONTAINS toLower($field_en)
+WITH i1, i2, COUNT(e) as weight
+WHERE weight > 1
+RETURN i1.name as source, i2.name as target, weight
+ORDER BY weight DESC
+LIMIT 50
+""")
+
+# 知识图谱可视化：领域的专家、专家的领域、专家的论文
+INTEREST_EXPERT_GRAPH = query("interest_expert_graph", """
+MATCH (e:Expert)-[r:INTERESTED_IN]->(i:Interest)
+WHERE i.name = $field
+RETURN e, r, i
+""")
+
+EXPERT_INTEREST_GRAPH = query("expert_interest_graph", """
+MATCH (e:Expert)-[r:INTERESTED_IN]->(i:Interest)
+WHERE e.name = $expert_name
+RETURN e, r, i
+""")
+
+EXPERT_PUBLICATION_GRAPH = query("expert_publication_graph", """
+MATCH (e:Expert)-[r:AUTHORED]->(p:Publication)
+WHERE e.name = $expert_name
+RETURN e, r, p
+""")
+
+# ---- 统计预计算 ----
+
+# 专家数最多的 $limit 个研究领域
+FIELD_DISTRIBUTION = query("field_distribution", """
+MATCH (i:Interest)<-[:INTERESTED_IN]-(e:Expert)
+WITH i.name as field, COUNT(DISTINCT e) as count
+RETURN field, count
+ORDER BY count DESC
+LIMIT $limit
+""")
+
+YEARLY_PUBLICATIONS = query("yearly_publications", """
+MATCH (p:Publication)
+WHERE p.year IS NOT NULL
+WITH toInteger(p.year) as year, COUNT(p) as count
+RETURN year, count
+ORDER BY year
+""")
+
+H_INDEX_COUNTS = query("h_index_counts", """
+MATCH (e:Expert)
+WHERE e.h_index IS NOT NULL
+RETURN e.h_index as h_index, COUNT(*) as count
+ORDER BY h_index
+""")
+
+# 每个研究领域 h 指数最高的 $k 位专家
+TOP_EXPERTS_BY_FIELD = query("top_experts_by_field", """
+MATCH (i:Interest)<-[:INTERESTED_IN]-(e:Expert)
+WITH i, e
+ORDER BY e.h_index DESC
+WITH i, COLLECT(DISTINCT {id: e.id, name: e.name, name_zh: e.name_zh,
+                          h_index: e.h_index, position: e.position})[..$k] as experts
+RETURN i.name as field, experts
+""")
+
+
+# 同上，读导入时维护的领域排名，只展开每个领域的前 $k 位专家；有领域还没有排名时不返回结果
+RANKED_TOP_EXPERTS_BY_FIELD = query("ranked_top_experts_by_field", """
+MATCH (i:Interest)
+WITH COLLECT(i) as interests
+WHERE all(x IN interests WHERE x.top_expert_ids IS NOT NULL)
+UNWIND interests AS i
+UNWIND i.top_expert_ids[..$k] AS eid
+MATCH (e:Expert {id: eid})
+WITH i, e
+ORDER BY coalesce(e.h_index, -1) DESC, e.id
+WITH i, COLLECT({id: e.id, name: e.name, name_zh: e.name_zh,
+                 h_index: e.h_index, position: e.position}) as experts
+RETURN i.name as field, experts
+""")
+
+def validate(graph, catalogue: Dict[str, Statement] = CATALOGUE) -> List[Query]:
+    """用 EXPLAIN 编译每条语句的全部文本，有语句无法编译时抛出 ValueError
+
+    只生成执行计划、不执行查询，参数不必提供；编译出的计划进入 Neo4j 的计划缓存。
+    连接失败等非语句错误照常抛出。返回校验过的查询文本。
+    """
+    from py2neo.errors import ClientError
+
+    checked, errors = [], []
+    for name, statement in catalogue.items():
+        for variant in statement.variants():
+            try:
+                graph.run("EXPLAIN " + variant).data()
+            except ClientError as e:
+                errors.append(f"{name}: {e}")
+            else:
+                checked.append(variant)
+    if errors:
+        raise ValueError("以下查询无法编译:\n" + "\n".join(errors))
+    logger.info(f"已校验 {len(checked)} 条查询文本（{len(catalogue)} 条语句）")
+    return checked
+
+
+# 数据源 -> 校验过的查询文本，或校验失败时的 ValueError
+_validated: Dict[Hashable, Union[List[Query], ValueError]] = {}
+_validated_lock = threading.Lock()
+
+
+def validate_once(source: Hashable, graph) -> List[Query]:
+    """同一数据源在进程内只校验一次，返回校验过的查询文本
+
+    语句无法编译时记下错误，之后的调用直接抛出同一个 ValueError，不再重复 EXPLAIN；
+    连接失败等其他错误不记录，下次调用时重新校验。
+    """
+    with _validated_lock:
+        checked = _validated.get(source)
+        if checked is None:
+            try:
+                checked = _validated[source] = validate(graph)
+            except ValueError as e:
+                checked = _validated[source] = e
+        if isinstance(checked, ValueError):
+            raise checked
+        return checked
+
+
+def profile_db_hits(graph, query: str, **params) -> int:
+    """用 PROFILE 执行查询，返回总 dbHits"""
+    cursor = graph.run("PROFILE " + query, params)
+    cursor.data()
+    return plan_db_hits(cursor.plan())
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='用 EXPLAIN 校验查询目录中的全部语句')
+    parser.add_argument('--uri', default='bolt://localhost:7687', help='Neo4j 地址')
+    parser.add_argument('--user', default='neo4j', help='Neo4j 用户名')
+    parser.add_argument('--password', default='123456', help='Neo4j 密码')
+    args = parser.parse_args()
+
+    from py2neo import Graph
+
+    try:
+        validate(Graph(args.uri, auth=(args.user, args.password)))
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
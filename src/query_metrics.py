@@ -0,0 +1,404 @@
+"""Cypher 查询埋点
+
+KnowledgeQA 的所有查询都经过 QueryMetrics.execute 或 stream 执行，按 (handler, intent) 记录：
+客户端耗时、服务端耗时、返回行数，以及抽样 PROFILE 时的 db hits。
+超过阈值的查询写入慢查询日志；计数器和直方图可导出为 Prometheus 文本文件或通过 /metrics 端口暴露。
+
+handler 由 KnowledgeQA 的方法用 query_handler 装饰器声明，未声明时按语句名统计。
+
+执行计划缓存命中只是客户端的估计（指标名带 estimated）：Neo4j 以查询文本为键缓存执行计划，本进程已执行过
+或已用 EXPLAIN 预热过（warm，见 queries.validate）的文本记为命中，否则记为未命中；
+服务端的缓存淘汰、其他进程的预热都不会反映在内。
+
+通过环境变量配置进程级默认实例：
+    QA_SLOW_QUERY_MS       慢查询阈值(毫秒)，默认 200
+    QA_SLOW_QUERY_LOG      慢查询日志路径，默认 logs/slow_queries.log
+    QA_METRICS_FILE        Prometheus 文本文件路径，不设置则不写
+    QA_METRICS_PORT        /metrics HTTP 端口，不设置则不启动
+    QA_PROFILE_SAMPLE_RATE 以 PROFILE 执行的抽样比例，默认 0
+"""
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections.abc import Mapping
+from contextvars import ContextVar
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# 直方图桶上界(秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 当前正在执行的处理方法，期间的查询记在它名下；由 query_handler 设置，每个线程各自独立
+_current_handler: ContextVar[str] = ContextVar("qa_query_handler", default="")
+
+
+def current_handler() -> str:
+    return _current_handler.get()
+
+
+def query_handler(name: Optional[str] = None) -> Callable:
+    """方法装饰器：方法执行期间发出的查询按 name（默认为方法名）统计，内层装饰的方法优先
+
+    生成器方法只在每次产出下一项的过程中生效，调用方在两项之间发出的查询不计入。
+    """
+    def decorate(method: Callable) -> Callable:
+        label = name or method.__name__
+
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def generator(*args, **kwargs):
+                items = method(*args, **kwargs)
+                try:
+                    while True:
+                        token = _current_handler.set(label)
+                        try:
+                            item = next(items)
+                        except StopIteration:
+                            return
+                        finally:
+                            _current_handler.reset(token)
+                        yield item
+                finally:
+                    items.close()
+            return generator
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            token = _current_handler.set(label)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                _current_handler.reset(token)
+        return wrapper
+    return decorate
+
+
+def _get(obj: Any, *keys: str) -> Any:
+    """兼容属性和映射两种形式读取驱动返回的摘要/计划字段"""
+    if obj is None:
+        return None
+    for key in keys:
+        value = getattr(obj, key, None)
+        if value is None and isinstance(obj, Mapping):
+            value = obj.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def plan_db_hits(plan: Any) -> int:
+    """递归累加 PROFILE 计划树中各算子的 db hits"""
+    if plan is None:
+        return 0
+    hits = _get(plan, "db_hits", "dbHits")
+    if hits is None:
+        args = _get(plan, "args") or {}
+        hits = args.get("DbHits", 0) if isinstance(args, Mapping) else 0
+    children = _get(plan, "children") or []
+    return int(hits or 0) + sum(plan_db_hits(child) for child in children)
+
+
+def plan_to_dict(plan: Any) -> Optional[Dict[str, Any]]:
+    """把计划树转为可JSON序列化的结构，写入慢查询日志"""
+    if plan is None:
+        return None
+    return {
+        "operator": _get(plan, "operator_type", "operatorType"),
+        "rows": _get(plan, "rows"),
+        "db_hits": _get(plan, "db_hits", "dbHits"),
+        "identifiers": list(_get(plan, "identifiers") or []),
+        "children": [plan_to_dict(child) for child in (_get(plan, "children") or [])],
+    }
+
+
+class _Series:
+    """单个 (handler, intent) 的计数器和直方图"""
+    __slots__ = ("count", "errors", "rows", "db_hits", "profiled", "plan_hits", "plan_misses",
+                 "wall_sum", "server_sum", "bucket_counts")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.db_hits = 0
+        self.profiled = 0
+        self.plan_hits = 0
+        self.plan_misses = 0
+        self.wall_sum = 0.0
+        self.server_sum = 0.0
+        self.bucket_counts = [0] * len(buckets)
+
+
+class QueryMetrics:
+    """查询执行的统一入口与指标收集
+
+    Args:
+        slow_ms: 慢查询阈值，超过后写入慢查询日志
+        slow_log: 慢查询日志路径，None 表示不写
+        prom_file: Prometheus 文本文件路径，None 表示不写
+        profile_sample_rate: 以 PROFILE 执行查询的比例，用于采集 db hits 和执行计划
+        flush_interval: 写 Prometheus 文件的最小间隔(秒)
+    """
+
+    def __init__(self, slow_ms: float = 200, slow_log: Optional[str] = "logs/slow_queries.log",
+                 prom_file: Optional[str] = None, profile_sample_rate: float = 0.0,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS, flush_interval: float = 10.0):
+        self.slow_ms = slow_ms
+        self.prom_file = prom_file
+        self.profile_sample_rate = profile_sample_rate
+        self.buckets = buckets
+        self.flush_interval = flush_interval
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._planned: Set[str] = set()  # 已生成过执行计划的查询文本
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self.slow_logger = self._setup_slow_logger(slow_log)
+
+    @staticmethod
+    def _setup_slow_logger(path: Optional[str]) -> Optional[logging.Logger]:
+        if not path:
+            return None
+        logger = logging.getLogger(f"{__name__}.slow.{path}")
+        if not logger.handlers:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = logging.FileHandler(path, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+        return logger
+
+    def warm(self, queries: Iterable[str]):
+        """记录已在数据库中生成过执行计划的查询文本"""
+        with self._lock:
+            self._planned.update(queries)
+
+    def _plan_cached(self, text: str) -> bool:
+        with self._lock:
+            if text in self._planned:
+                return True
+            self._planned.add(text)
+            return False
+
+    def execute(self, graph, query: str, params: Dict[str, Any],
+                handler: str = "", intent: str = "") -> List[Dict[str, Any]]:
+        """执行查询并记录指标，返回 .data() 的结果"""
+        profiled = self.profile_sample_rate > 0 and random.random() < self.profile_sample_rate
+        text = ("PROFILE " + query) if profiled else query
+        plan_cached = self._plan_cached(text)
+        started = time.perf_counter()
+        try:
+            cursor = graph.run(text, params)
+            rows = cursor.data()
+        except Exception:
+            self._observe(handler, intent, time.perf_counter() - started, 0.0, 0, None,
+                          plan_cached, error=True)
+            raise
+        wall = time.perf_counter() - started
+
+        server = self._server_seconds(cursor)
+        plan = self._plan(cursor) if profiled else None
+        db_hits = plan_db_hits(plan) if profiled else None
+        self._observe(handler, intent, wall, server, len(rows), db_hits, plan_cached)
+
+        self._log_slow(handler, intent, wall, server, len(rows), db_hits, query, params, plan)
+        return rows
+
+    def stream(self, graph, query: str, params: Dict[str, Any],
+               handler: str = "", intent: str = "") -> Iterator[Dict[str, Any]]:
+        """逐条产出结果行，驱动每返回一条记录就交给调用方
+
+        耗时只累计从游标取记录的时间，不包括调用方处理每行的时间；
+        结果全部消费完或生成器被提前关闭时记录指标。流式查询不做 PROFILE 抽样。
+        """
+        wall = 0.0
+        rows = 0
+        cursor = None
+        error = False
+        plan_cached = self._plan_cached(query)
+        try:
+            started = time.perf_counter()
+            cursor = graph.run(query, params)
+            records = iter(cursor)
+            wall += time.perf_counter() - started
+            while True:
+                started = time.perf_counter()
+                record = next(records, None)
+                wall += time.perf_counter() - started
+                if record is None:
+                    break
+                rows += 1
+                yield record.data()
+        except Exception:
+            error = True
+            raise
+        finally:
+            server = 0.0 if error or cursor is None else self._server_seconds(cursor)
+            self._observe(handler, intent, wall, server, rows, None, plan_cached, error=error)
+            if not error:
+                self._log_slow(handler, intent, wall, server, rows, None, query, params, None)
+
+    def _log_slow(self, handler: str, intent: str, wall: float, server: float, rows: int,
+                  db_hits: Optional[int], query: str, params: Dict[str, Any], plan: Any):
+        if self.slow_logger is None or wall * 1000 < self.slow_ms:
+            return
+        self.slow_logger.info(json.dumps({
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "handler": handler,
+            "intent": intent,
+            "wall_ms": round(wall * 1000, 2),
+            "server_ms": round(server * 1000, 2),
+            "rows": rows,
+            "db_hits": db_hits,
+            "query": " ".join(query.split()),
+            "params": params,
+            "plan": plan_to_dict(plan),
+        }, ensure_ascii=False, default=str))
+
+    @staticmethod
+    def _server_seconds(cursor) -> float:
+        """服务端耗时 = 首条结果可用时间 + 结果消费时间(毫秒)，驱动不提供时为0"""
+        try:
+            summary = cursor.summary()
+        except Exception:
+            return 0.0
+        available = _get(summary, "result_available_after", "t_first") or 0
+        consumed = _get(summary, "result_consumed_after", "t_last") or 0
+        return (available + consumed) / 1000
+
+    @staticmethod
+    def _plan(cursor) -> Any:
+        try:
+            return cursor.plan()
+        except Exception:
+            return None
+
+    def _observe(self, handler: str, intent: str, wall: float, server: float,
+                 rows: int, db_hits: Optional[int], plan_cached: bool = False, error: bool = False):
+        with self._lock:
+            series = self._series.get((handler, intent))
+            if series is None:
+                series = self._series[(handler, intent)] = _Series(self.buckets)
+            series.count += 1
+            series.errors += int(error)
+            series.plan_hits += int(plan_cached)
+            series.plan_misses += int(not plan_cached)
+            series.rows += rows
+            series.wall_sum += wall
+            series.server_sum += server
+            if db_hits is not None:
+                series.profiled += 1
+                series.db_hits += db_hits
+            for i, bound in enumerate(self.buckets):
+                if wall <= bound:
+                    series.bucket_counts[i] += 1
+                    break
+            flush = self.prom_file and time.monotonic() - self._last_flush >= self.flush_interval
+            if flush:
+                self._last_flush = time.monotonic()
+        if flush:
+            self.write_prometheus(self.prom_file)
+
+    def snapshot(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """当前各 (handler, intent) 的累计指标"""
+        with self._lock:
+            return {key: {name: getattr(s, name) for name in _Series.__slots__}
+                    for key, s in self._series.items()}
+
+    def render_prometheus(self) -> str:
+        """按 Prometheus 文本格式输出全部指标"""
+        lines = []
+
+        def counter(name: str, help_text: str, field: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (handler, intent), s in series:
+                lines.append(f'{name}{{handler="{handler}",intent="{intent}"}} {s[field]}')
+
+        series = sorted(self.snapshot().items())
+        counter("qa_query_total", "Cypher queries executed", "count")
+        counter("qa_query_errors_total", "Cypher queries that raised", "errors")
+        counter("qa_query_rows_total", "Rows returned", "rows")
+        counter("qa_query_server_seconds_total", "Server-side time reported by Neo4j", "server_sum")
+        counter("qa_query_profiled_total", "Queries executed with PROFILE", "profiled")
+        counter("qa_query_db_hits_total", "DB hits of profiled queries", "db_hits")
+        counter("qa_query_plan_cache_hits_estimated_total",
+                "Client-side estimate: query text already run or warmed by this process", "plan_hits")
+        counter("qa_query_plan_cache_misses_estimated_total",
+                "Client-side estimate: query text not yet run or warmed by this process", "plan_misses")
+
+        name = "qa_query_duration_seconds"
+        lines.append(f"# HELP {name} Client-side wall time of Cypher queries")
+        lines.append(f"# TYPE {name} histogram")
+        for (handler, intent), s in series:
+            labels = f'handler="{handler}",intent="{intent}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, s["bucket_counts"]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {s["count"]}')
+            lines.append(f'{name}_sum{{{labels}}} {s["wall_sum"]}')
+            lines.append(f'{name}_count{{{labels}}} {s["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """原子地写出 Prometheus 文本文件（供 node_exporter textfile collector 采集）"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """在后台线程中启动 /metrics 端点"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+_default_metrics: Optional[QueryMetrics] = None
+_default_lock = threading.Lock()
+
+
+def default_metrics() -> QueryMetrics:
+    """进程级共享的 QueryMetrics，按环境变量配置，首次调用时创建"""
+    global _default_metrics
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = QueryMetrics(
+                slow_ms=float(os.environ.get("QA_SLOW_QUERY_MS", 200)),
+                slow_log=os.environ.get("QA_SLOW_QUERY_LOG", "logs/slow_queries.log"),
+                prom_file=os.environ.get("QA_METRICS_FILE") or None,
+                profile_sample_rate=float(os.environ.get("QA_PROFILE_SAMPLE_RATE", 0)),
+            )
+            port = os.environ.get("QA_METRICS_PORT")
+            if port:
+                _default_metrics.serve(int(port))
+        return _default_metrics
@@ -0,0 +1,137 @@
+"""进程级的全局统计结果缓存
+
+统计分析、关系分析页面的 get_field_distribution、get_yearly_publication_stats、
+get_h_index_distribution 对所有用户结果相同。这里按 (数据库, 方法, 参数, 图版本) 缓存结果，
+同一进程内所有会话共享：
+- 同一个键同时只有一个线程去查询 Neo4j，其余线程等待它的结果（single-flight）
+- 条目超过 ttl * refresh_ahead 后再被访问，先返回旧值，同时在后台线程中刷新
+- 导入器每次写入后更新 (:GraphMeta {id: 'graph'}) 的 version，版本变化后旧条目自然失效
+
+缓存的结果在会话之间共享，调用方不要原地修改。
+
+    QA_CACHE_TTL  缓存有效期(秒)，默认 600
+"""
+import functools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Entry:
+    __slots__ = ("value", "created", "refreshing")
+
+    def __init__(self, value: Any):
+        self.value = value
+        self.created = time.monotonic()
+        self.refreshing = False
+
+
+class ResultCache:
+    """带 single-flight 和提前后台刷新的结果缓存
+
+    Args:
+        ttl: 条目有效期(秒)，过期后同步重新计算
+        refresh_ahead: 条目年龄超过 ttl 的这个比例后，访问时触发后台刷新
+        version_ttl: 图版本号的缓存时间(秒)，避免每次访问都查询版本
+    """
+
+    def __init__(self, ttl: float = 600, refresh_ahead: float = 0.8, version_ttl: float = 5):
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.version_ttl = version_ttl
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._inflight: Dict[Hashable, threading.Lock] = {}
+        self._versions: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, source: Hashable, fetch: Callable[[], Any]) -> Any:
+        """数据源的当前版本号，version_ttl 内复用上次查询的结果"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(source)
+            if cached and now - cached[0] < self.version_ttl:
+                return cached[1]
+        value = fetch()
+        with self._lock:
+            self._versions[source] = (now, value)
+        return value
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """返回 key 对应的结果，不存在或已过期时调用 compute 计算"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry.created
+                if age < self.ttl:
+                    self.hits += 1
+                    if age >= self.ttl * self.refresh_ahead and not entry.refreshing:
+                        entry.refreshing = True
+                        threading.Thread(target=self._refresh, args=(key, compute), daemon=True).start()
+                    return entry.value
+            self.misses += 1
+            lock = self._inflight.setdefault(key, threading.Lock())
+
+        with lock:
+            # 等锁期间其他线程可能已经算好
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and time.monotonic() - entry.created < self.ttl:
+                    return entry.value
+            value = compute()
+            with self._lock:
+                self._entries[key] = _Entry(value)
+                self._inflight.pop(key, None)
+                self._evict_expired()
+            return value
+
+    def _refresh(self, key: Hashable, compute: Callable[[], Any]):
+        try:
+            value = compute()
+        except Exception:
+            # 刷新失败时保留旧值，等过期后由前台请求重试
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refreshing = False
+            return
+        with self._lock:
+            self._entries[key] = _Entry(value)
+
+    def _evict_expired(self):
+        """丢弃已过期的条目（包括旧图版本下的条目），调用方需持有 _lock"""
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if now - e.created >= self.ttl]:
+            del self._entries[key]
+
+    def invalidate(self):
+        """清空所有条目和版本号"""
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+_default_cache: Optional[ResultCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> ResultCache:
+    """进程级共享的 ResultCache，首次调用时创建"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache(ttl=float(os.environ.get("QA_CACHE_TTL", 600)))
+        return _default_cache
+
+
+def cached_by_graph_version(method: Callable) -> Callable:
+    """KnowledgeQA 方法装饰器：按 (数据库地址, 方法名, 参数, 图版本) 在进程级缓存中共享结果"""
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        cache = self.result_cache
+        version = cache.version(self.uri, self.graph_version)
+        key = (self.uri, method.__name__, args, version)
+        return cache.get_or_compute(key, lambda: method(self, *args))
+    return wrapper
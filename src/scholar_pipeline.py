@@ -0,0 +1,313 @@
+"""爬取 -> 转换 -> 导入 的增量流水线
+
+data-pre 下的爬虫输出 output.csv / output_raw.csv / output_llm.csv，
+这里把其中的行流式转换成 Neo4jImporter.import_batch 认识的专家/论文批次并导入。
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+DATA_PRE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data-pre")
+
+logger = logging.getLogger(__name__)
+
+# 谷歌学术标题前的类型标记，如 [PDF] [HTML] [图书]
+TITLE_TAG_PATTERN = re.compile(r"^\s*(\[[^\]]{1,12}\]\s*)+")
+KEYWORD_SPLIT_PATTERN = re.compile(r"[,;，；、|/]+")
+DOMAIN_PATTERN = re.compile(r"^[\w.-]+\.[a-z]{2,}$", re.IGNORECASE)
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+# 文件指纹取开头的字节数
+FINGERPRINT_BYTES = 64 * 1024
+
+
+def normalize_author(name: str) -> str:
+    """规范化作者姓名：全半角统一、去掉省略号和多余空白、首字母大写"""
+    name = unicodedata.normalize("NFKC", name or "")
+    name = name.replace("…", " ").replace("...", " ")
+    name = re.sub(r"[\d*†‡]+", " ", name)
+    name = " ".join(name.split()).strip(" .,-")
+    if not name:
+        return ""
+    # 中文姓名保持原样，英文姓名统一首字母大写
+    if re.search(r"[一-鿿]", name):
+        return name.replace(" ", "")
+    return " ".join(part[:1].upper() + part[1:].lower() if part.isupper() or part.islower() else part
+                    for part in name.split())
+
+
+def normalize_title(title: str) -> str:
+    """论文标题归一化，用作去重键"""
+    title = unicodedata.normalize("NFKC", title or "")
+    title = TITLE_TAG_PATTERN.sub("", title)
+    title = re.sub(r"[^\w\s]", " ", title.lower())
+    return " ".join(title.split())
+
+
+def parse_authors(text: str) -> List[str]:
+    """解析 "A Smith, B Jones…" 形式的作者列表"""
+    authors = []
+    for part in (text or "").split(","):
+        name = normalize_author(part)
+        if name and name.lower() not in {a.lower() for a in authors}:
+            authors.append(name)
+    return authors
+
+
+def parse_keywords(text: str) -> List[str]:
+    """解析关键词列，丢弃站点域名和纯年份这类不是研究领域的片段"""
+    keywords = []
+    for part in KEYWORD_SPLIT_PATTERN.split(unicodedata.normalize("NFKC", text or "")):
+        keyword = " ".join(part.split()).strip(" .-…")
+        if len(keyword) < 2 or DOMAIN_PATTERN.match(keyword) or YEAR_PATTERN.fullmatch(keyword):
+            continue
+        keyword = keyword if not keyword.islower() else keyword.title()
+        if keyword not in keywords:
+            keywords.append(keyword)
+    return keywords
+
+
+def stable_id(prefix: str, key: str) -> str:
+    return f"{prefix}:{hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]}"
+
+
+def file_fingerprint(path: str, length: Optional[int] = None) -> List[Any]:
+    """文件开头 length 字节（默认至多 FINGERPRINT_BYTES）的 [字节数, 哈希]
+
+    爬虫续爬时只在CSV末尾追加，开头不变；换一个检索词重新爬取时从头重写，开头随之改变。
+    """
+    with open(path, "rb") as f:
+        head = f.read(FINGERPRINT_BYTES if length is None else length)
+    return [len(head), hashlib.sha1(head).hexdigest()]
+
+
+def title_hash(key: str) -> str:
+    """归一化标题的哈希，状态中只保存哈希"""
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+@dataclass
+class TransformState:
+    """增量状态：每个CSV已处理的行数及其文件指纹，以及已导入论文的归一化标题哈希
+
+    标题哈希逐行追加到状态文件旁的 .titles 文件中，每次保存只写入新增部分；
+    状态文件记下已确认的 .titles 长度，保存中途失败时多写的尾部在下次加载时截掉。
+    """
+    path: Optional[str] = None
+    rows_done: Dict[str, int] = field(default_factory=dict)
+    seen_titles: Set[str] = field(default_factory=set)
+    fingerprints: Dict[str, List[Any]] = field(default_factory=dict)
+    titles_size: int = 0
+    _new_titles: List[str] = field(default_factory=list, init=False, repr=False)
+
+    @property
+    def titles_path(self) -> Optional[str]:
+        return self.path + ".titles" if self.path else None
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> "TransformState":
+        if not path or not os.path.exists(path):
+            return cls(path=path)
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        loaded = cls(path=path, rows_done=state.get("rows_done", {}),
+                     fingerprints=state.get("fingerprints", {}))
+        size = state.get("titles_size", 0)
+        if size and os.path.exists(loaded.titles_path):
+            with open(loaded.titles_path, "rb") as f:
+                data = f.read(size)
+            loaded.seen_titles.update(data.decode("ascii").split())
+            loaded.titles_size = len(data)
+        # 旧格式的状态文件直接保存标题列表，下次保存时转存到 .titles 文件
+        for key in state.get("seen_titles", []):
+            loaded.add_title(key)
+        return loaded
+
+    def has_title(self, key: str) -> bool:
+        return title_hash(key) in self.seen_titles
+
+    def add_title(self, key: str):
+        digest = title_hash(key)
+        if digest not in self.seen_titles:
+            self.seen_titles.add(digest)
+            self._new_titles.append(digest)
+
+    def offset(self, csv_path: str) -> int:
+        """csv_path 已处理的行数；文件开头与记录的指纹不一致（被重写成了别的内容）时从头处理"""
+        done = self.rows_done.get(csv_path, 0)
+        saved = self.fingerprints.get(csv_path)
+        if done and (saved is None or file_fingerprint(csv_path, saved[0]) != saved):
+            logger.info(f"{csv_path} 已被重写，从第一行重新处理")
+            return 0
+        return done
+
+    def advance(self, csv_path: str, rows_done: int, fingerprint: List[Any]):
+        self.rows_done[csv_path] = rows_done
+        self.fingerprints[csv_path] = fingerprint
+
+    def save(self):
+        if not self.path:
+            return
+        if self._new_titles:
+            with open(self.titles_path, "ab") as f:
+                f.truncate(self.titles_size)
+                f.write("".join(f"{digest}\n" for digest in self._new_titles).encode("ascii"))
+                self.titles_size = f.tell()
+            self._new_titles = []
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"rows_done": self.rows_done, "fingerprints": self.fingerprints,
+                       "titles_size": self.titles_size}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class ScholarCsvTransformer:
+    """把爬虫CSV流式转换为导入批次
+
+    - 作者姓名规范化后作为专家id（爬取数据没有学者id）
+    - 关键词以及本次检索的主题映射为作者的 Interest
+    - 按归一化标题去重论文，跨文件、跨多次运行都有效
+    """
+    ABSTRACT_COLUMNS = ("Abstract", "Abstract_With_LLM")
+
+    def __init__(self, state: TransformState, interests: Optional[List[str]] = None,
+                 batch_size: int = 500):
+        self.state = state
+        self.interests = interests or []
+        self.batch_size = batch_size
+
+    def row_to_publication(self, row: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """单行CSV -> 论文记录，标题为空或已导入过时返回None"""
+        title = " ".join(TITLE_TAG_PATTERN.sub("", row.get("Title") or "").split())
+        key = normalize_title(title)
+        if not key or self.state.has_title(key):
+            return None
+        self.state.add_title(key)
+
+        interests = list(self.interests)
+        for keyword in parse_keywords(row.get("Keywords", "")):
+            if keyword not in interests:
+                interests.append(keyword)
+        year_match = YEAR_PATTERN.search(row.get("Year") or "")
+
+        publication = {
+            "id": stable_id("scholar-pub", key),
+            "title": title,
+            "year": int(year_match.group(0)) if year_match else 0,
+            "authors": [{"id": stable_id("scholar-author", name.lower()), "name": name,
+                         "interests": interests}
+                        for name in parse_authors(row.get("Authors", ""))],
+        }
+        if row.get("Link"):
+            publication["link"] = row["Link"]
+        for column in self.ABSTRACT_COLUMNS:
+            if row.get(column):
+                publication["abstract"] = row[column]
+                break
+        return publication
+
+    def batches(self, csv_path: str) -> Iterator[Tuple[List[Dict[str, Any]], int]]:
+        """流式读取CSV，跳过已处理的行，产出 (论文批次, 已处理行数)"""
+        csv.field_size_limit(sys.maxsize)
+        done = self.state.offset(csv_path)
+        batch = []
+        with open(csv_path, "r", newline="", encoding="utf-8") as f:
+            for row_number, row in enumerate(csv.DictReader(f), start=1):
+                if row_number <= done:
+                    continue
+                publication = self.row_to_publication(row)
+                if publication:
+                    batch.append(publication)
+                if len(batch) >= self.batch_size:
+                    yield batch, row_number
+                    batch = []
+                done = row_number
+        yield batch, done
+
+
+def run_pipeline(csv_paths: List[str], importer, state: TransformState,
+                 interests: Optional[List[str]] = None, batch_size: int = 500,
+                 flush_every: int = 20) -> int:
+    """把若干CSV中的新行转换并导入图数据库，返回导入的论文数
+
+    每导入 flush_every 批（以及每个文件处理完）更新一次专家资料和领域排名（见 Neo4jImporter.flush_updates），
+    多批中反复出现的作者只重算一次。
+    """
+    transformer = ScholarCsvTransformer(state, interests=interests, batch_size=batch_size)
+    importer.ensure_indexes()
+    imported = 0
+    for csv_path in csv_paths:
+        if not os.path.exists(csv_path):
+            logger.warning(f"跳过不存在的文件: {csv_path}")
+            continue
+        fingerprint = file_fingerprint(csv_path)
+        pending = 0
+        for publications, rows_done in transformer.batches(csv_path):
+            if publications:
+                importer.import_batch([], publications, flush=False)
+                imported += len(publications)
+                pending += 1
+            state.advance(csv_path, rows_done, fingerprint)
+            if pending >= flush_every:
+                _flush(importer, state)
+                pending = 0
+        _flush(importer, state)
+        logger.info(f"{csv_path} 处理完毕，累计导入论文 {imported} 篇")
+    return imported
+
+
+def _flush(importer, state: TransformState):
+    # 资料和排名更新后再推进断点，失败重跑时未推进的批会被重新导入（MERGE保证幂等）
+    importer.flush_updates()
+    state.save()
+
+
+def crawl(args: argparse.Namespace) -> str:
+    """运行 data-pre 下的爬虫，返回输出CSV路径"""
+    sys.path.insert(0, DATA_PRE_DIR)
+    from crawler import crawler_from_args
+
+    crawler = crawler_from_args(args)
+    crawler.run()
+    return crawler.output
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.path.insert(0, DATA_PRE_DIR)
+    from crawler import build_arg_parser
+
+    parser = build_arg_parser(mode="link", default_pages=5)
+    parser.description = '爬取谷歌学术并增量导入知识图谱'
+    parser.add_argument('--csv', nargs='*', default=[], help='额外导入的已有CSV(output.csv/output_llm.csv等)')
+    parser.add_argument('--skip-crawl', action='store_true', help='只导入已有CSV，不爬取')
+    parser.add_argument('--state', default='scholar_pipeline.state.json', help='增量导入状态文件')
+    parser.add_argument('--interest', action='append', help='为导入的作者附加的研究领域，默认取检索词')
+    parser.add_argument('--no-precompute', action='store_true', help='导入后不重算统计快照')
+    parser.add_argument('--uri', default='bolt://localhost:7687')
+    parser.add_argument('--user', default='neo4j')
+    parser.add_argument('--password', default='123456')
+    args = parser.parse_args()
+
+    csv_paths = list(args.csv)
+    if not args.skip_crawl:
+        csv_paths.insert(0, crawl(args))
+    interests = [i for i in (args.interest or [" ".join(args.query.replace("+", " ").split())]) if i]
+
+    from import_to_neo4j import Neo4jImporter
+    importer = Neo4jImporter(uri=args.uri, user=args.user, password=args.password)
+    imported = run_pipeline(csv_paths, importer, TransformState.load(args.state), interests=interests)
+    if imported and not args.no_precompute:
+        from precompute import precompute
+        precompute(importer.graph)
+
+
+if __name__ == "__main__":
+    main()
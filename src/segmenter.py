@@ -0,0 +1,290 @@
+"""基于 jieba 的问题分词、意图识别和槽位填充
+
+用户词典由中英文领域词典的全部别名和专家姓名生成，按图版本缓存到磁盘，
+进程启动时直接加载文件，不必重新查询图数据库。
+
+分词时先把问题中的实体整体切出来（专家、论文来自实体链接，领域来自词典），
+其余部分交给 jieba；再根据词的类别（实体、线索词）判断意图并填充槽位。
+这样新增问法只需补充线索词，不会像堆叠正则那样互相干扰。
+
+jieba 导入和主词典加载约需一秒，KnowledgeQA 创建时调用 preload() 在后台线程完成，
+主词典的前缀字典缓存在同一目录下，进程重启后直接读取。
+
+    QA_CACHE_DIR  用户词典和 jieba 前缀字典的缓存目录，默认 .cache
+"""
+import glob
+import hashlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from entity_linker import AhoCorasick, Mention
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.environ.get("QA_CACHE_DIR") or os.path.join(ROOT_DIR, ".cache")
+
+# 线索词 -> 类别，用于意图识别；固定不变，不写入缓存的词典文件
+CUE_WORDS = {
+    "h指数": "h_index", "H指数": "h_index", "h-index": "h_index",
+    "研究领域": "interests", "研究方向": "interests",
+    "领域": "field_word", "方向": "field_word",
+    "论文": "paper", "文章": "paper",
+    "发表": "publish", "发表了": "publish",
+    "作者": "author",
+    "哪一年": "year", "哪年": "year", "年份": "year", "发表于": "year",
+    "合作": "cooperate", "合作关系": "cooperate",
+    "联系": "connect", "联系上": "connect", "认识": "connect", "合作链": "connect", "合作路径": "connect",
+    "谁": "who",
+    "最强": "top", "排名": "top", "最好": "top", "最有名": "top", "专家": "top",
+    "最近": "recent", "近期": "recent", "最新": "recent",
+}
+
+
+_jieba = None
+_jieba_ready = threading.Event()
+_jieba_started = False
+_jieba_lock = threading.Lock()
+
+
+def _load_jieba():
+    global _jieba
+    try:
+        import jieba
+
+        os.makedirs(DEFAULT_CACHE_DIR, exist_ok=True)
+        jieba.dt.tmp_dir = DEFAULT_CACHE_DIR
+        jieba.initialize()
+        _jieba = jieba
+    finally:
+        _jieba_ready.set()
+
+
+def preload():
+    """在后台线程导入 jieba 并加载主词典，多次调用只加载一次"""
+    global _jieba_started
+    with _jieba_lock:
+        if _jieba_started:
+            return
+        _jieba_started = True
+    threading.Thread(target=_load_jieba, name="jieba-preload", daemon=True).start()
+
+
+def get_jieba():
+    """等待后台加载完成并返回 jieba 模块"""
+    preload()
+    _jieba_ready.wait()
+    if _jieba is None:
+        # 后台加载失败，在调用方重新导入以抛出原始异常
+        import jieba
+        return jieba
+    return _jieba
+
+
+# 意图 -> (槽位的实体类别, 个数)
+SLOT_KINDS = {
+    "expert_by_interest": ("field", 1),
+    "top_experts_in_field": ("field", 1),
+    "field_publications": ("field", 1),
+    "recent_field_publications": ("field", 1),
+    "expert_interests": ("expert", 1),
+    "expert_h_index": ("expert", 1),
+    "expert_publications": ("expert", 1),
+    "cooperation": ("expert", 2),
+    "collaboration_path": ("expert", 2),
+    "publication_authors": ("publication", 1),
+    "publication_year": ("publication", 1),
+    "publication_field": ("publication", 1),
+}
+
+
+@dataclass
+class Token:
+    word: str
+    tag: str  # expert / publication / field / 线索词类别 / x
+    start: int
+    end: int
+
+
+def build_entries(fields: Iterable[str], experts: Iterable[Dict[str, Any]]) -> Dict[str, str]:
+    """生成用户词典：词 -> 类别(field / expert)
+
+    Args:
+        fields: 领域的各种说法，即 InterestLexicon 的别名
+        experts: 专家行，含 name/name_zh
+    """
+    entries: Dict[str, str] = {}
+    for name in fields:
+        if name:
+            entries[" ".join(name.split())] = "field"
+    for row in experts:
+        for name in (row.get("name"), row.get("name_zh")):
+            if name:
+                entries.setdefault(" ".join(name.split()), "expert")
+    return entries
+
+
+def write_user_dict(path: str, entries: Dict[str, str]):
+    """写出 jieba 用户词典格式（词 类别），不写词频，由 jieba 保证其能被切出"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for word, tag in entries.items():
+            f.write(f"{word} {tag}\n")
+    os.replace(tmp_path, path)
+
+
+def read_user_dict(path: str) -> Dict[str, str]:
+    entries = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            word, _, tag = line.rstrip("\n").rpartition(" ")
+            if word:
+                entries[word] = tag
+    return entries
+
+
+class Segmenter:
+    """分词并识别意图
+
+    Args:
+        entries: 用户词典，词 -> 类别
+    """
+
+    def __init__(self, entries: Dict[str, str]):
+        self.entries = entries
+        # 领域名称可能含空格（英文），jieba 无法把它切成一个词，改用自动机整体匹配
+        self._fields = AhoCorasick()
+        for word, tag in entries.items():
+            if tag == "field":
+                self._fields.add(word)
+        self._fields.build()
+
+    def _field_spans(self, text: str) -> List[Tuple[int, int, str]]:
+        spans = []
+        for start, end, _ in self._fields.iter_matches(text):
+            before = text[start - 1] if start > 0 else " "
+            after = text[end] if end < len(text) else " "
+            # 英文领域名要求两端不与字母相连，避免 "ML" 命中 "HTML"
+            if (text[start].isascii() and before.isascii() and before.isalnum()) or \
+                    (text[end - 1].isascii() and after.isascii() and after.isalnum()):
+                continue
+            spans.append((start, end, "field"))
+        return spans
+
+    def segment(self, text: str, mentions: Sequence[Mention] = ()) -> List[Token]:
+        """分词：实体整体成词，其余部分用 jieba 切分"""
+        spans = [(m.start, m.end, m.kind) for m in mentions] + self._field_spans(text)
+        # 重叠时保留最左最长的实体
+        spans.sort(key=lambda span: (span[0], -span[1]))
+        tokens: List[Token] = []
+        position = 0
+        for start, end, kind in spans:
+            if start < position:
+                continue
+            tokens.extend(self._cut(text[position:start], position))
+            tokens.append(Token(text[start:end], kind, start, end))
+            position = end
+        tokens.extend(self._cut(text[position:], position))
+        return tokens
+
+    def _cut(self, text: str, offset: int) -> List[Token]:
+        tokens = []
+        for word in get_jieba().cut(text):
+            if word.strip():
+                tag = CUE_WORDS.get(word) or self.entries.get(word, "x")
+                tokens.append(Token(word, tag, offset, offset + len(word)))
+            offset += len(word)
+        return tokens
+
+    @staticmethod
+    def fill_slot(intent: str, tokens: Sequence[Token]) -> Any:
+        """按意图从分词结果中取槽位，缺少所需实体时返回 None"""
+        kind, count = SLOT_KINDS.get(intent, (None, 0))
+        values = [t.word for t in tokens if t.tag == kind]
+        if not kind or len(values) < count:
+            return None
+        return tuple(values[:count]) if count > 1 else values[0]
+
+    @staticmethod
+    def parse(tokens: Sequence[Token]) -> Optional[Tuple[str, Any]]:
+        """根据词的类别识别意图并填充槽位，返回 (意图, 槽位)，无法识别时返回 None"""
+        cues = {t.tag for t in tokens}
+        experts = [t.word for t in tokens if t.tag == "expert"]
+        fields = [t.word for t in tokens if t.tag == "field"]
+        publications = [t.word for t in tokens if t.tag == "publication"]
+
+        if len(experts) >= 2 and "connect" in cues:
+            return "collaboration_path", (experts[0], experts[1])
+        if len(experts) >= 2 and "cooperate" in cues:
+            return "cooperation", (experts[0], experts[1])
+        if publications:
+            if "author" in cues:
+                return "publication_authors", publications[0]
+            if "year" in cues:
+                return "publication_year", publications[0]
+        if experts:
+            if "h_index" in cues:
+                return "expert_h_index", experts[0]
+            if "publish" in cues or "paper" in cues:
+                return "expert_publications", experts[0]
+            if "interests" in cues or "field_word" in cues:
+                return "expert_interests", experts[0]
+        if fields:
+            field = fields[0]
+            if "who" in cues:
+                return "expert_by_interest", field
+            if "paper" in cues:
+                return ("recent_field_publications" if "recent" in cues else "field_publications"), field
+            if "top" in cues:
+                return "top_experts_in_field", field
+        return None
+
+
+_segmenters: Dict[str, Tuple[str, Segmenter]] = {}
+_loaded_dicts = set()
+_lock = threading.Lock()
+
+
+def _init_jieba(path: str):
+    """每个进程只加载一次同一份用户词典"""
+    if path in _loaded_dicts:
+        return
+    jieba = get_jieba()
+    for word in CUE_WORDS:
+        jieba.add_word(word)
+    # 含空格的词 jieba 切不出来，只把单个词的条目交给它
+    for word, tag in read_user_dict(path).items():
+        if " " not in word:
+            jieba.add_word(word, tag=tag)
+    _loaded_dicts.add(path)
+
+
+def load_segmenter(source: str, version: Any, loader: Callable[[], Dict[str, str]],
+                   cache_dir: str = DEFAULT_CACHE_DIR) -> Segmenter:
+    """取得数据源当前图版本对应的分词器：词典文件已缓存时直接读取，否则调用 loader 生成并写盘
+
+    Args:
+        source: 数据源标识，如数据库地址
+        version: 当前图版本，用于区分缓存文件
+        loader: 返回用户词典（词 -> 类别），见 build_entries
+    """
+    prefix = "userdict-" + hashlib.md5(source.encode("utf-8")).hexdigest()[:8]
+    path = os.path.join(cache_dir, f"{prefix}-{version}.txt")
+    with _lock:
+        cached = _segmenters.get(source)
+        if cached is None or cached[0] != path:
+            if not os.path.exists(path):
+                write_user_dict(path, loader())
+                # 旧图版本的词典不再使用
+                for stale in glob.glob(os.path.join(cache_dir, f"{prefix}-*.txt")):
+                    if stale != path:
+                        try:
+                            os.remove(stale)
+                        except OSError:
+                            pass
+            _init_jieba(path)
+            cached = _segmenters[source] = (path, Segmenter(read_user_dict(path)))
+        return cached[1]
@@ -0,0 +1,156 @@
+"""轻量级请求追踪
+
+用 span 记录一次问答从意图路由、处理方法、数据库查询到页面渲染的耗时。
+一个 trace 的根 span 结束时，整棵 span 树以 OTLP/JSON 格式追加一行写入追踪文件，
+可直接被 OpenTelemetry Collector 的 otlpjsonfile receiver 读取，也方便用 jq 查看。
+
+    QA_TRACE_FILE  追踪文件路径，不设置则不写文件（span 仍可用于调试页脚）
+"""
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+SERVICE_NAME = "expert-qa-system"
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("qa_current_span", default=None)
+_export_lock = threading.Lock()
+_trace_file: Optional[str] = os.environ.get("QA_TRACE_FILE") or None
+
+
+class Span:
+    """一个计时区间，记录名称、父子关系和属性"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Dict[str, Any], root: Optional["Span"] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+        self.root = root or self
+        # 只在根 span 上收集整个 trace 内已结束的 span
+        self.finished: List["Span"] = []
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    @property
+    def context(self) -> Tuple[str, str]:
+        """(trace_id, span_id)，用于在另一次调用中把 span 挂到这个 trace 下"""
+        return self.trace_id, self.span_id
+
+    def to_otlp(self) -> Dict[str, Any]:
+        data = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            data["parentSpanId"] = self.parent_id
+        return data
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def configure(trace_file: Optional[str]):
+    """设置追踪文件路径，None 表示不写文件"""
+    global _trace_file
+    _trace_file = trace_file
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, parent: Optional[Tuple[str, str]] = None, **attributes) -> Iterator[Span]:
+    """开启一个 span；在已有 span 内调用时自动成为其子 span
+
+    Args:
+        name: span 名称
+        parent: 显式指定的 (trace_id, span_id)，用于把跨回调的工作（如页面渲染）挂到之前的 trace 上
+        attributes: span 属性
+    """
+    parent_span = _current_span.get()
+    if parent_span is not None:
+        current = Span(name, parent_span.trace_id, parent_span.span_id, attributes, parent_span.root)
+    elif parent is not None:
+        current = Span(name, parent[0], parent[1], attributes)
+    else:
+        current = Span(name, secrets.token_hex(16), None, attributes)
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        current.root.finished.append(current)
+        if current.root is current:
+            _export(current.finished)
+
+
+def _export(spans: List[Span]):
+    if not _trace_file or not spans:
+        return
+    line = json.dumps({
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [s.to_otlp() for s in spans]}],
+        }]
+    }, ensure_ascii=False)
+    with _export_lock:
+        directory = os.path.dirname(_trace_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(_trace_file, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def timing_summary(span: Span) -> Dict[str, float]:
+    """汇总 span 及其子孙各阶段耗时(毫秒)：路由、处理、数据库、格式化与总耗时"""
+    summary = {"total": span.duration_ms, "route": 0.0, "handler": 0.0, "db": 0.0, "db_count": 0}
+    # 子 span 先于父 span 结束，倒序遍历时父节点总在子节点之前出现
+    descendants = {span.span_id}
+    for s in reversed(span.root.finished):
+        if s.parent_id not in descendants:
+            continue
+        descendants.add(s.span_id)
+        if s.name == "qa.route":
+            summary["route"] += s.duration_ms
+        elif s.name == "qa.handler":
+            summary["handler"] += s.duration_ms
+        elif s.name == "db.query":
+            summary["db"] += s.duration_ms
+            summary["db_count"] += 1
+    summary["format"] = max(0.0, summary["handler"] - summary["db"])
+    return summary
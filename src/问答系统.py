@@ -1,17 +1,16 @@
 import streamlit as st
 from qa_sys import KnowledgeQA
+import queries
+import tracing
+from chat_view import get_history, render_chat, stream_reply
 import re
 import os
-import tempfile
 import json
-import streamlit.components.v1 as components
-import random
+
+GREETING = "您好！我是专家知识图谱助手。我可以帮您查询专家信息、研究领域、论文等。请问有什么我可以帮您的？"
 
 # 在最开始就初始化session_state
-if "messages" not in st.session_state:
-    st.session_state.messages = [
-        {"role": "assistant", "content": "您好！我是专家知识图谱助手。我可以帮您查询专家信息、研究领域、论文等。请问有什么我可以帮您的？"}
-    ]
+chat_history = get_history(GREETING)
 if "qa_system" not in st.session_state:
     st.session_state.qa_system = KnowledgeQA(
         uri="bolt://localhost:7687",
@@ -20,56 +19,67 @@ if "qa_system" not in st.session_state:
     )
 if "user_input" not in st.session_state:
     st.session_state.user_input = ""
+if "pending_question" not in st.session_state:
+    st.session_state.pending_question = ""
+if "debug_timing" not in st.session_state:
+    st.session_state.debug_timing = os.environ.get("QA_DEBUG") == "1"
+
+def timing_footer(trace: tracing.Span) -> str:
+    """调试模式下附在回答后的耗时页脚"""
+    t = tracing.timing_summary(trace)
+    return (f"⏱ 总计 {t['total']:.1f}ms · 路由 {t['route']:.1f}ms · "
+            f"查询 {t['db_count']}次 {t['db']:.1f}ms · 格式化 {t['format']:.1f}ms")
 
 def handle_input():
-    """处理用户输入"""
+    """处理用户输入，回答在页面主体中流式生成"""
     if st.session_state.user_input:
         question = st.session_state.user_input
-        st.session_state.messages.append({"role": "user", "content": question})
-        answer = st.session_state.qa_system.answer(question)
-        
-        # 创建一个新的容器来显示图谱
-        graph_container = st.empty()
-        
-        st.session_state.messages.append({
-            "role": "assistant", 
-            "content": answer,
-            "has_graph": True,
-            "question": question,
-            "graph_container": graph_container
-        })
+        chat_history.append("user", question)
+        st.session_state.pending_question = question
         st.session_state.user_input = ""
 
-def search_experts(field=None, h_index_range=None, paper_keyword=None):
-    """搜索专家"""
-    query_conditions = []
-    params = {}
-    
-    if field:
-        query_conditions.append("(e)-[:belongs_to|interested_in]->(i:Interest {name: $field})")
-        params["field"] = field
-    
-    if h_index_range:
-        min_h, max_h = h_index_range
-        query_conditions.append("e.h_index >= $min_h AND e.h_index <= $max_h")
-        params.update({"min_h": min_h, "max_h": max_h})
-    
-    if paper_keyword:
-        query_conditions.append("(e)-[:authored]->(p:Publication) WHERE p.title CONTAINS $keyword")
-        params["keyword"] = paper_keyword
+def answer_pending_question():
+    """边生成边显示待回答的问题，完成后写入聊天记录"""
+    question = st.session_state.pending_question
+    if not question:
+        return
+    st.session_state.pending_question = ""
+    qa_system = st.session_state.qa_system
+    with tracing.span("ui.stream"):
+        answer = stream_reply(chat_history, qa_system.answer_stream(question))
+        trace = qa_system.last_trace
     
-    if not query_conditions:
+    chat_history.append("assistant", answer, {
+        "question": question,
+        "trace": trace.context if trace else None,
+        "timing": timing_footer(trace) if trace else ""
+    })
+
+def show_graph_button():
+    """在最近一条回答下方显示“查看知识图谱”按钮，点击后展示该轮问答涉及的图谱"""
+    for role, content, meta in reversed(chat_history.messages):
+        if role == "assistant" and meta and meta.get("question"):
+            break
+    else:
+        return
+    # 按记录版本取键，每条新回答对应一个新按钮，重跑时键保持不变
+    col1, col2 = st.columns([1, 4])
+    with col1:
+        clicked = st.button("📊 查看知识图谱", key=f"graph_{chat_history.version}")
+    if clicked:
+        with col2:
+            visualize_knowledge_graph(meta["question"], content)
+
+def search_experts(field=None, h_index_range=None, paper_keyword=None):
+    """搜索专家，未给出的条件以 null 传入同一条查询"""
+    if not (field or h_index_range or paper_keyword):
         return []
     
-    query = f"""
-    MATCH (e:Expert)
-    WHERE {' AND '.join(query_conditions)}
-    RETURN DISTINCT e.name as name, e.h_index as h_index
-    ORDER BY e.h_index DESC
-    LIMIT 10
-    """
-    
-    return st.session_state.qa_system.graph.run(query, params).data()
+    min_h, max_h = h_index_range if h_index_range else (None, None)
+    return st.session_state.qa_system.run_query(
+        queries.SEARCH_EXPERTS,
+        field=field or None, min_h=min_h, max_h=max_h, keyword=paper_keyword or None
+    )
 
 def visualize_knowledge_graph(question: str, answer: str):
     return
@@ -90,35 +100,23 @@ def visualize_knowledge_graph(question: str, answer: str):
             field = "Natural Language Processing"
         
         if field:
-            query = """
-            MATCH (e:Expert)-[r:INTERESTED_IN]->(i:Interest)
-            WHERE i.name = $field
-            RETURN e, r, i
-            """
+            query = queries.INTEREST_EXPERT_GRAPH
             params["field"] = field
     
     # 处理专家信息查询
     elif any(name in question for name in ["Kees Van Deemter", "Albert Gatt", "Ehud Reiter"]):
         expert_name = next(name for name in ["Kees Van Deemter", "Albert Gatt", "Ehud Reiter"] if name in question)
         if "研究领域" in question or "方向" in question:
-            query = """
-            MATCH (e:Expert)-[r:INTERESTED_IN]->(i:Interest)
-            WHERE e.name = $expert_name
-            RETURN e, r, i
-            """
+            query = queries.EXPERT_INTEREST_GRAPH
         elif "论文" in question:
-            query = """
-            MATCH (e:Expert)-[r:AUTHORED]->(p:Publication)
-            WHERE e.name = $expert_name
-            RETURN e, r, p
-            """
+            query = queries.EXPERT_PUBLICATION_GRAPH
         params["expert_name"] = expert_name
     
     if not query:
         return None
     
     # 执行查询
-    results = st.session_state.qa_system.graph.run(query, params).data()
+    results = st.session_state.qa_system.run_query(query, **params)
     
     # 构建D3.js数据结构
     nodes = []
@@ -354,6 +352,15 @@ def main():
         initial_sidebar_state="expanded"
     )
 
+    # 启动时连接数据库并校验查询目录（每个进程只校验一次），语句有误时在这里提示，而不是等到第一次提问
+    try:
+        st.session_state.qa_system.connect()
+    except ValueError as e:
+        st.error(f"查询目录校验失败，请检查 src/queries.py：\n{e}")
+        st.stop()
+    except Exception as e:
+        st.warning(f"暂时无法连接数据库，提问时会重新连接：{e}")
+
     # 自定义CSS样式
     st.markdown("""
         <style>
@@ -509,39 +516,17 @@ def main():
         """)
         
         if st.button("🔄 新对话", use_container_width=True):
-            st.session_state.messages = [
-                {"role": "assistant", "content": "您好！我是专家知识图谱助手。我可以帮您查询专家信息、研究领域、论文等。请问有什么我可以帮您的？"}
-            ]
+            chat_history.reset()
             st.experimental_rerun()
 
-    # 主聊天界面
-    for message in st.session_state.messages:
-        with st.container():
-            if message["role"] == "user":
-                st.markdown(f"""
-                <div class="chat-message user">
-                    <div style="color: #8E8EA0">你</div>
-                    <div class="content">{message["content"]}</div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div class="chat-message assistant">
-                    <div style="color: #8E8EA0">助手</div>
-                    <div class="content">{message["content"]}</div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                if message.get("has_graph"):
-                    st.button("📊 查看知识图谱", key=f"graph_{random.randint(1, 100)}")
-                    # col1, col2 = st.columns([1, 4])
-                    # with col1:
-                    #     if st.button("📊 查看知识图谱", key=f"graph_{len(st.session_state.messages)}"):
-                    #         with col2:
-                    #             visualize_knowledge_graph(
-                    #                 message["question"],
-                    #                 message["content"]
-                    #             )
+        st.checkbox("🐞 调试模式（显示耗时）", key="debug_timing")
+
+    # 主聊天界面，渲染耗时记到最近一次回答的 trace 下
+    with tracing.span("ui.render", parent=chat_history.last_meta("trace"),
+                      **{"ui.messages": len(chat_history)}):
+        render_chat(chat_history, debug=st.session_state.debug_timing)
+    answer_pending_question()
+    show_graph_button()
 
     # 输入框
     st.text_input(
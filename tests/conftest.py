@@ -0,0 +1,78 @@
+import itertools
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in ("src", os.path.join("src", "data-pre")):
+    sys.path.insert(0, os.path.join(ROOT_DIR, path))
+
+
+class FakeRecord:
+    def __init__(self, row):
+        self._row = row
+
+    def data(self):
+        return dict(self._row)
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def data(self):
+        return [dict(row) for row in self._rows]
+
+    def __iter__(self):
+        return (FakeRecord(row) for row in self._rows)
+
+
+class FakeGraph:
+    """按语句名返回结果行的假数据库，代替 py2neo Graph
+
+    rows 为 语句名 -> 结果行列表，或接收查询参数、返回结果行的函数；未登记的语句返回空结果。
+    """
+
+    def __init__(self, rows=None):
+        self.rows = dict(rows or {})
+        self.calls = []
+
+    def run(self, query, params=None):
+        name = getattr(query, "name", query)
+        params = dict(params or {})
+        self.calls.append((name, params))
+        rows = self.rows.get(name, [])
+        return FakeCursor(rows(**params) if callable(rows) else rows)
+
+    def names(self, since=0):
+        """第 since 次之后执行过的语句名"""
+        return [name for name, _ in self.calls[since:]]
+
+
+_sources = itertools.count()
+
+
+@pytest.fixture
+def make_qa(monkeypatch, tmp_path):
+    """创建连到 FakeGraph 的 KnowledgeQA：不加载 jieba 和意图分类模型，问题只按正则模式识别"""
+    import intent_classifier
+    import segmenter
+    from intent_classifier import OTHER
+    from qa_sys import KnowledgeQA
+    from query_metrics import QueryMetrics
+    from result_cache import ResultCache
+
+    monkeypatch.setattr(segmenter, "preload", lambda *args: None)
+    monkeypatch.setattr(intent_classifier, "preload", lambda *args: None)
+
+    def make(rows=None, **kwargs):
+        graph = FakeGraph(dict({"graph_version": [{"version": 1}]}, **(rows or {})))
+        # 进程内共享的词典、链接器等按数据源地址区分，每个实例用不同的地址
+        qa = KnowledgeQA(uri=f"bolt://fake-{next(_sources)}", metrics=QueryMetrics(slow_log=None),
+                         result_cache=ResultCache(), snapshot_file=str(tmp_path / "snapshot.json"), **kwargs)
+        qa._graph = graph
+        qa._analyze = lambda questions: [([], [], question, (OTHER, 0.0)) for question in questions]
+        return qa, graph
+
+    return make
@@ -0,0 +1,88 @@
+import pytest
+
+import benchmark
+import qa_sys
+
+
+class _QA:
+    """不连数据库、直接返回问题的假问答系统"""
+
+    def __init__(self, **config):
+        self.context = None
+
+    def answer(self, question):
+        return question
+
+
+@pytest.fixture
+def fake_qa(monkeypatch):
+    sessions = [[("a", "q1"), ("b", "q2")], [("a", "q3")]]
+    monkeypatch.setattr(benchmark, "QUESTION_SESSIONS", sessions)
+    monkeypatch.setattr(qa_sys, "KnowledgeQA", _QA)
+    # 每次读取时钟前进 1/64 秒，每个问题的延迟都是 15.625ms（二进制下精确）
+    ticks = iter(range(10 ** 6))
+    monkeypatch.setattr(benchmark.time, "perf_counter", lambda: next(ticks) / 64)
+    return sessions
+
+
+@pytest.mark.parametrize("pct, expected", [(0, 1), (10, 1), (50, 5), (95, 10), (99, 10), (100, 10)])
+def test_percentile_is_nearest_rank(pct, expected):
+    assert benchmark.percentile([float(v) for v in range(10, 0, -1)], pct) == expected
+
+
+def test_percentile_edge_cases():
+    assert benchmark.percentile([], 95) == 0.0
+    assert benchmark.percentile([3.5], 50) == 3.5
+    assert benchmark.percentile([1, 2], 50) == 1
+
+
+def test_latency_per_intent(fake_qa):
+    result = benchmark.benchmark_latency({}, rounds=3)
+    # 预热一轮不计入
+    assert result == {"a": {"count": 6, "p50": 15.625, "p95": 15.625, "p99": 15.625},
+                      "b": {"count": 3, "p50": 15.625, "p95": 15.625, "p99": 15.625}}
+
+
+def test_throughput(fake_qa, monkeypatch):
+    ticks = iter([0.0, 4.0])
+    monkeypatch.setattr(benchmark, "run_sessions",
+                        lambda qa, sessions, latencies, lock: latencies.setdefault("a", []).extend(
+                            [5.0] * sum(len(s) for s in sessions)))
+    monkeypatch.setattr(benchmark.time, "perf_counter", lambda: next(ticks))
+    result = benchmark.benchmark_throughput({}, concurrency=2, rounds=2)
+    # 2 个线程 × 2 轮 × 3 个问题，共 4 秒
+    assert result == {"concurrency": 2, "questions": 12, "seconds": 4.0, "qps": 3.0, "p95": 5.0}
+
+
+def test_compare_flags_p95_and_qps_regressions():
+    baseline = {"commit": "abc", "scale": 1, "latency": {"a": {"p95": 100.0}, "b": {"p95": 100.0}},
+                "throughput": {"qps": 10.0}}
+    current = {"scale": 1, "latency": {"a": {"p95": 119.0}, "b": {"p95": 80.0}, "new": {"p95": 5.0}},
+               "throughput": {"qps": 9.0}}
+    assert benchmark.compare(current, baseline, threshold=0.2)
+    current["latency"]["a"]["p95"] = 121.0
+    assert not benchmark.compare(current, baseline, threshold=0.2)
+    current["latency"]["a"]["p95"] = 100.0
+    current["throughput"]["qps"] = 7.9
+    assert not benchmark.compare(current, baseline, threshold=0.2)
+
+
+def test_scale_dataset_keeps_interests():
+    data = {"experts": [{"id": "1", "name": "Ehud Reiter", "interests": ["NLG"]}],
+            "publications": [{"id": "p", "title": "Paper", "authors": [{"id": "1", "name": "Ehud Reiter"},
+                                                                        {"id": "", "name": "Anon"}]}]}
+    scaled = benchmark.scale_dataset(data, 3)
+    assert [e["id"] for e in scaled["experts"]] == ["1", "1-1", "1-2"]
+    assert {tuple(e["interests"]) for e in scaled["experts"]} == {("NLG",)}
+    assert scaled["publications"][2]["title"] == "Paper #2"
+    assert scaled["publications"][1]["authors"] == [{"id": "1-1", "name": "Ehud Reiter #1"},
+                                                    {"id": "", "name": "Anon #1"}]
+    assert len(data["experts"]) == 1
+
+
+def test_cumulative_import_time_is_read_from_importtime_log():
+    log = ("import time: self [us] | cumulative | imported package\n"
+           "import time:       120 |        450 |   query_metrics\n"
+           "import time:       300 |       9000 | qa_sys\n")
+    assert benchmark._cumulative_import_us(log, "qa_sys") == 9000
+    assert benchmark._cumulative_import_us(log, "chat_view") == 0
@@ -0,0 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from blobstore import BlobStore
+
+
+def test_concurrent_puts_of_same_page(tmp_path):
+    store = BlobStore(str(tmp_path), codec="gzip")
+    page = "<html>" + "x" * 100000 + "</html>"
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        keys = set(executor.map(lambda i: store.put(page), range(64)))
+    assert keys == {store.key(page)}
+    assert store.get(store.key(page)) == page
+    assert not list(tmp_path.rglob("*.tmp"))
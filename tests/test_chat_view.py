@@ -0,0 +1,100 @@
+import pytest
+
+pytest.importorskip("streamlit")
+
+import chat_view  # noqa: E402
+from chat_view import ChatHistory, render_chat, stream_reply  # noqa: E402
+
+
+class _Streamlit:
+    """记录输出的 streamlit 替身，clicked 中的按钮键视为本轮被点击"""
+
+    def __init__(self, clicked=()):
+        self.session_state = {}
+        self.clicked = set(clicked)
+        self.buttons = []
+        self.markdowns = []
+
+    def button(self, label, key=None):
+        self.buttons.append(label)
+        return key in self.clicked
+
+    def markdown(self, body, unsafe_allow_html=False):
+        self.markdowns.append(body)
+
+    def empty(self):
+        return self
+
+
+def _history(messages, **kwargs):
+    history = ChatHistory("hello", **kwargs)
+    for i in range(messages):
+        history.append("user" if i % 2 == 0 else "assistant", f"message {i}")
+    return history
+
+
+def test_render_returns_only_the_latest_window():
+    history = _history(30)
+    window = history.render(5)
+    assert window.count("chat-message") == 5
+    assert "message 25" in window and "message 29" in window and "message 24" not in window
+
+
+def test_window_is_cached_until_a_new_message():
+    history = _history(30)
+    first = history.render(5)
+    assert history.render(5) is first
+    history.append("user", "message 30")
+    assert "message 30" in history.render(5)
+
+
+def test_history_is_capped_and_resettable():
+    history = _history(20, max_messages=10)
+    assert len(history) == 10 and "message 10" in history.render(10) and "hello" not in history.render(10)
+    history.reset()
+    assert len(history) == 1 and "hello" in history.render(20)
+
+
+def test_content_is_escaped_and_meta_kept():
+    history = ChatHistory("hello")
+    history.append("assistant", "<script>x</script>", {"timing": "⏱ 1ms", "trace": ("t", "s")})
+    history.append("user", "next")
+    assert "<script>" not in history.render(5) and "&lt;script&gt;" in history.render(5)
+    assert "⏱ 1ms" in history.render(5)
+    assert history.last_meta("trace") == ("t", "s") and history.last_meta("missing") is None
+
+
+def test_render_chat_pages_older_messages(monkeypatch):
+    fake = _Streamlit()
+    monkeypatch.setattr(chat_view, "st", fake)
+    history = _history(44)  # 加上问候共 45 条
+    render_chat(history, page_size=20)
+    assert fake.buttons == ["⬆ 加载更早的消息（还有 25 条）"]
+    assert fake.markdowns[-1].count("chat-message") == 20
+
+    fake.clicked.add("chat_load_earlier")
+    render_chat(history, page_size=20)
+    assert fake.markdowns[-1].count("chat-message") == 40
+    assert fake.session_state["chat_visible"] == 40
+
+    # 新对话后窗口回到一页
+    history.reset()
+    fake.buttons.clear()
+    render_chat(history, page_size=20)
+    assert fake.buttons == [] and fake.session_state["chat_visible"] == 20
+
+
+def test_stream_reply_throttles_updates(monkeypatch):
+    fake = _Streamlit()
+    monkeypatch.setattr(chat_view, "st", fake)
+    ticks = iter([1.0, 1.01, 1.02, 1.1])
+    monkeypatch.setattr(chat_view.time, "monotonic", lambda: next(ticks))
+    history = ChatHistory("hello")
+
+    assert stream_reply(history, ["a", "b", "c", "d"], interval=0.05) == "abcd"
+    # 第一块立即显示，之后 0.05 秒内的块合并，最后输出完整回答且不带光标
+    assert len(fake.markdowns) == 3
+    assert "a ▌" in fake.markdowns[0] and "abcd ▌" in fake.markdowns[1]
+    assert "abcd" in fake.markdowns[2] and "▌" not in fake.markdowns[2]
+    # 流式输出不写入记录，由调用方在结束后追加
+    assert len(history) == 1
@@ -0,0 +1,108 @@
+import random
+from collections import deque
+
+import pytest
+
+import coauthor_graph
+from coauthor_graph import MAX_HOPS, CoauthorGraph
+
+
+def _chain(length):
+    """e0 - e1 - ... - e{length}"""
+    return CoauthorGraph.from_rows({"authors": [f"e{i}", f"e{i + 1}"]} for i in range(length))
+
+
+def _plain_bfs(edges, sources, targets):
+    """不限步数的单向广度优先搜索，返回最短步数，联系不上时为 None"""
+    neighbors = {}
+    for a, b in edges:
+        neighbors.setdefault(a, set()).add(b)
+        neighbors.setdefault(b, set()).add(a)
+    distance = {s: 0 for s in sources if s in neighbors}
+    queue = deque(distance)
+    while queue:
+        node = queue.popleft()
+        if node in targets:
+            return distance[node]
+        for neighbor in neighbors[node]:
+            if neighbor not in distance:
+                distance[neighbor] = distance[node] + 1
+                queue.append(neighbor)
+    return None
+
+
+def _assert_valid_path(graph, path, sources, targets):
+    assert path[0] in sources and path[-1] in targets
+    for a, b in zip(path, path[1:]):
+        assert graph._index[b] in graph._neighbors[graph._index[a]]
+
+
+def test_adjacent_experts():
+    graph = _chain(1)
+    assert graph.shortest_path(["e0"], ["e1"]) == ["e0", "e1"]
+    assert graph.shortest_path(["e1"], ["e0"]) == ["e1", "e0"]
+
+
+@pytest.mark.parametrize("hops", range(2, MAX_HOPS + 1))
+def test_paths_up_to_max_hops(hops):
+    graph = _chain(hops)
+    assert graph.shortest_path(["e0"], [f"e{hops}"]) == [f"e{i}" for i in range(hops + 1)]
+
+
+def test_beyond_max_hops():
+    graph = _chain(MAX_HOPS + 1)
+    assert graph.shortest_path(["e0"], [f"e{MAX_HOPS + 1}"]) is None
+    assert graph.shortest_path(["e0"], [f"e{MAX_HOPS + 1}"], max_hops=MAX_HOPS + 1) is not None
+    assert graph.shortest_path(["e0"], ["e3"], max_hops=2) is None
+
+
+def test_disconnected_and_unknown():
+    graph = CoauthorGraph.from_rows([{"authors": ["a", "b"]}, {"authors": ["c", "d"]}])
+    assert graph.shortest_path(["a"], ["d"]) is None
+    assert graph.shortest_path(["a"], ["nobody"]) is None
+    assert graph.shortest_path([], ["a"]) is None
+
+
+def test_multiple_source_and_target_ids():
+    # 同名专家 x1/x2、y1/y2，只有 x2 与 y1 之间有两步的链
+    graph = CoauthorGraph.from_rows([
+        {"authors": ["x1", "m1"]}, {"authors": ["m1", "m2"]}, {"authors": ["m2", "m3"]}, {"authors": ["m3", "y2"]},
+        {"authors": ["x2", "k"]}, {"authors": ["k", "y1"]},
+    ])
+    assert graph.shortest_path(["x1", "x2"], ["y1", "y2"]) == ["x2", "k", "y1"]
+
+
+def test_source_equals_target():
+    graph = _chain(2)
+    assert graph.shortest_path(["e1"], ["e1"]) == ["e1"]
+    assert graph.shortest_path(["e0", "e1"], ["e1", "e2"]) == ["e1"]
+
+
+def test_matches_plain_bfs_on_random_graphs():
+    rng = random.Random(11)
+    for _ in range(300):
+        nodes = [f"n{i}" for i in range(rng.randint(2, 30))]
+        edges = [tuple(rng.sample(nodes, 2)) for _ in range(rng.randint(0, 40))]
+        graph = CoauthorGraph.from_rows({"authors": list(edge)} for edge in edges)
+        sources = set(rng.sample(nodes, rng.randint(1, 2)))
+        targets = set(rng.sample(nodes, rng.randint(1, 2)))
+        expected = _plain_bfs(edges, sources, targets)
+        path = graph.shortest_path(sources, targets)
+        if expected is None or expected > MAX_HOPS:
+            assert path is None, (edges, sources, targets)
+        else:
+            assert path is not None and len(path) - 1 == expected, (edges, sources, targets, path)
+            _assert_valid_path(graph, path, sources, targets)
+
+
+def test_shared_graph_rebuilds_on_version_change():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return [{"authors": ["a", "b"]}]
+
+    first = coauthor_graph.shared_graph("test-source", 1, loader)
+    assert coauthor_graph.shared_graph("test-source", 1, loader) is first
+    assert coauthor_graph.shared_graph("test-source", 2, loader) is not first
+    assert len(calls) == 2
@@ -0,0 +1,99 @@
+"""用本地静态HTML替身测试 src/data-pre/crawler.py"""
+import csv
+import functools
+import os
+import shutil
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from blobstore import BlobStore
+from crawler import CrawlCheckpoint, ScholarCrawler, UrllibFetcher
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "scholar")
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def scholar_site(tmp_path):
+    """在本地端口上提供谷歌学术结果页的静态替身，返回站点地址"""
+    site = tmp_path / "site"
+    site.mkdir()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=str(site)))
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+    for name in os.listdir(FIXTURES):
+        with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+            (site / name).write_text(f.read().replace("{host}", host), encoding="utf-8")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield host
+    server.shutdown()
+    server.server_close()
+
+
+def _crawler(host, tmp_path, mode="link", **kwargs):
+    return ScholarCrawler(
+        query="Privacy+Preserving+Computing", mode=mode, pages=2,
+        output=str(tmp_path / f"output_{mode}.csv"), workers=2, min_interval=0,
+        base_url=host + "/search_{}.html?q={}", fetcher_factory=UrllibFetcher,
+        blob_store=BlobStore(str(tmp_path / "blobs"), codec="gzip"), **kwargs)
+
+
+def _rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_link_mode_writes_search_results(scholar_site, tmp_path):
+    crawler = _crawler(scholar_site, tmp_path)
+    assert crawler.run() == 3
+
+    header, *rows = _rows(crawler.output)
+    assert header[:4] == ["Page", "Result", "Title", "Link"]
+    # 第二页中重复的链接只写一次
+    assert sorted(row[2] for row in rows) == ["Federated Learning", "Privacy Preserving Computing",
+                                              "Secure Multi-Party Computation"]
+    smc = next(row for row in rows if row[2] == "Secure Multi-Party Computation")
+    assert smc[4] == "Secure computation between parties."
+    assert smc[6] == "Carol"
+    # 完成后删除断点
+    assert not os.path.exists(crawler.checkpoint.path)
+    assert not os.path.exists(crawler.checkpoint.links_path)
+
+
+def test_raw_mode_stores_pages_in_blob_store(scholar_site, tmp_path):
+    crawler = _crawler(scholar_site, tmp_path, mode="raw")
+    assert crawler.run() == 3
+
+    _, *rows = _rows(crawler.output)
+    pages = {row[2]: crawler.blob_store.get(row[4]) for row in rows}
+    assert "Full text of paper 3." in pages["Federated Learning"]
+
+
+def test_rerun_after_completion_crawls_again(scholar_site, tmp_path):
+    _crawler(scholar_site, tmp_path).run()
+    crawler = _crawler(scholar_site, tmp_path)
+    assert crawler.run() == 3
+    assert len(_rows(crawler.output)) == 4
+
+
+def test_resume_runs_only_remaining_tasks(scholar_site, tmp_path):
+    crawler = _crawler(scholar_site, tmp_path)
+    # 模拟第一页已完成、第二页未完成时中断
+    checkpoint = CrawlCheckpoint(crawler.checkpoint.path)
+    checkpoint.query = crawler.query
+    checkpoint.add({"kind": "search", "page": 1, "attempts": 0})
+    checkpoint.save()
+    checkpoint.add_link(scholar_site + "/paper_1.html")
+    checkpoint.close()
+    with open(crawler.output, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerow(["Page", "Result", "Title", "Link", "Abstract", "Keywords", "Authors"])
+
+    assert crawler.run() == 1
+    _, *rows = _rows(crawler.output)
+    assert [row[2] for row in rows] == ["Federated Learning"]
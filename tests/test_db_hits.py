@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from conftest import ROOT_DIR
+
+import benchmark
+
+NEO4J_URI = os.environ.get("QA_TEST_NEO4J_URI")
+
+
+def test_db_hits_bounded_compares_raw_hits():
+    base = {"field_publications": 100, "expert_by_interest": 40}
+    assert benchmark.db_hits_bounded(base, {"field_publications": 120, "expert_by_interest": 40}) == {
+        "field_publications": True, "expert_by_interest": True}
+    # 十倍数据下 dbHits 也变成十倍，不能因为按倍数归一化而通过
+    assert benchmark.db_hits_bounded(base, {"field_publications": 1000, "expert_by_interest": 40}) == {
+        "field_publications": False, "expert_by_interest": True}
+
+
+@pytest.mark.skipif(not NEO4J_URI, reason="设置 QA_TEST_NEO4J_URI 后运行，会清空该数据库")
+def test_served_queries_db_hits_do_not_grow_with_scale():
+    pytest.importorskip("py2neo")
+    config = {
+        "uri": NEO4J_URI,
+        "user": os.environ.get("QA_TEST_NEO4J_USER", "neo4j"),
+        "password": os.environ.get("QA_TEST_NEO4J_PASSWORD", "password"),
+    }
+    data_file = os.path.join(ROOT_DIR, "data", "demo-time.json")
+    hits = benchmark.benchmark_db_hits_scaling(config, data_file, [1, 10])
+
+    assert set(hits[1]) == {name for name, _, _ in benchmark.PROFILED_QUERIES}
+    assert all(hits[1].values())
+    assert benchmark.db_hits_bounded(hits[1], hits[10]) == {name: True for name in hits[1]}, hits
@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+import entity_linker
+from entity_linker import AhoCorasick, EntityLinker
+
+
+def _naive(patterns, text):
+    folded = text.lower()
+    return {(start, start + len(p), index)
+            for index, p in enumerate(patterns)
+            for start in range(len(text) - len(p) + 1)
+            if folded.startswith(p.lower(), start)}
+
+
+def test_automaton_matches_naive_scan():
+    rng = random.Random(7)
+    for _ in range(200):
+        patterns = list({"".join(rng.choice("abAB") for _ in range(rng.randint(1, 5)))
+                         for _ in range(rng.randint(1, 8))})
+        automaton = AhoCorasick()
+        indexes = [automaton.add(p) for p in patterns]
+        text = "".join(rng.choice("abAB c") for _ in range(rng.randint(0, 40)))
+        expected = {(s, e, indexes[i]) for s, e, i in _naive(patterns, text)}
+        assert set(automaton.iter_matches(text)) == expected, (patterns, text)
+
+
+def test_automaton_case_insensitive_duplicates():
+    automaton = AhoCorasick()
+    assert automaton.add("Ehud Reiter") == automaton.add("ehud reiter")
+    assert list(automaton.iter_matches("EHUD REITER")) == [(0, 11, 0)]
+
+
+@pytest.fixture
+def linker():
+    experts = [
+        {"id": "1", "name": "Ehud Reiter", "name_zh": ""},
+        {"id": "2", "name": "Robert Dale", "name_zh": "罗伯特"},
+        {"id": "3", "name": "Li", "name_zh": "李明"},
+        {"id": "4", "name": "Wei Wang", "name_zh": "王伟"},
+        {"id": "5", "name": "Wei Wang", "name_zh": "王伟"},
+        {"id": "6", "name": "Lisa", "name_zh": None},
+    ]
+    publications = [{"id": "p1", "title": "Building Natural Language Generation Systems"}]
+    return EntityLinker.from_rows(experts, publications)
+
+
+def _found(linker, text):
+    return [(m.text, m.kind, m.ids) for m in linker.find(text)]
+
+
+def test_mixed_chinese_and_latin(linker):
+    assert _found(linker, "Ehud Reiter和罗伯特有合作吗？") == [
+        ("Ehud Reiter", "expert", ["1"]), ("罗伯特", "expert", ["2"])]
+
+
+def test_case_insensitive_keeps_original_text(linker):
+    assert _found(linker, "ehud REITER的h指数是多少") == [("ehud REITER", "expert", ["1"])]
+
+
+def test_word_boundaries(linker):
+    # Lisa 不能命中 Lisanne，Ehud Reiter 不能命中 Ehud Reiters
+    assert _found(linker, "Lisanne和Ehud Reiters") == []
+    assert _found(linker, "Lisa的论文") == [("Lisa", "expert", ["6"])]
+
+
+def test_short_latin_names_are_suppressed(linker):
+    assert entity_linker.MIN_LATIN_LENGTH == 3
+    assert _found(linker, "Li的论文") == []
+    # 中文姓名不受长度限制
+    assert _found(linker, "李明的论文") == [("李明", "expert", ["3"])]
+
+
+def test_homonyms_return_every_id(linker):
+    assert _found(linker, "王伟的研究领域") == [("王伟", "expert", ["4", "5"])]
+    assert _found(linker, "Wei Wang的研究领域") == [("Wei Wang", "expert", ["4", "5"])]
+
+
+def test_leftmost_longest_publication(linker):
+    mentions = linker.find("Building Natural Language Generation Systems是哪年发表的？")
+    assert [(m.kind, m.ids, m.start) for m in mentions] == [("publication", ["p1"], 0)]
+
+
+def test_shared_linker_rebuilds_on_version_change():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return [{"id": str(len(calls)), "name": "Ehud Reiter"}], []
+
+    first = entity_linker.shared_linker("test-source", 1, loader)
+    assert entity_linker.shared_linker("test-source", 1, loader) is first
+    second = entity_linker.shared_linker("test-source", 2, loader)
+    assert second is not first and len(calls) == 2
+    assert second.find("Ehud Reiter")[0].ids == ["2"]
@@ -0,0 +1,106 @@
+import argparse
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from gen_synthetic import SyntheticGraph, ZipfSampler, build_interests, generate, shard_paths, split_count
+
+
+def _args(tmp_path, **overrides):
+    args = dict(experts=50, publications=120, interests=20, seed=7, zipf=1.1, attachment=0.75,
+                start_year=2000, end_year=2024, seed_data="", shards=1,
+                output=str(tmp_path / "synthetic.json"))
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def _graph(**kwargs):
+    graph = SyntheticGraph(**dict(dict(experts=500, publications=3000, interests=50, seed=3), **kwargs))
+    experts = list(graph.experts())
+    return graph, experts, list(graph.publications())
+
+
+def test_zipf_frequencies_follow_rank_power():
+    sampler = ZipfSampler(50, 1.0, random.Random(1))
+    counts = Counter(sampler.sample() for _ in range(50000))
+    assert set(counts) <= set(range(50))
+    # 第 1、2、4 名的频率约为 1 : 1/2 : 1/4
+    assert counts[0] / counts[1] == pytest.approx(2, rel=0.1)
+    assert counts[0] / counts[3] == pytest.approx(4, rel=0.15)
+
+
+def test_interests_are_unique_and_seeded_first():
+    interests = build_interests(30, ["NLG", "NLP", "NLG"], random.Random(0))
+    assert interests[:2] == ["NLG", "NLP"]
+    assert len(interests) == len(set(interests)) == 30
+
+
+def test_same_seed_gives_same_data():
+    assert _graph()[1:] == _graph()[1:]
+
+
+def test_publications_need_experts_first():
+    graph = SyntheticGraph(experts=5, publications=5, interests=3)
+    with pytest.raises(RuntimeError):
+        next(graph.publications())
+
+
+def test_publications_reference_generated_experts():
+    _, experts, publications = _graph()
+    ids = {e["id"]: e["name"] for e in experts}
+    for pub in publications:
+        authors = [a["id"] for a in pub["authors"]]
+        assert authors and len(authors) == len(set(authors))
+        assert all(ids[a["id"]] == a["name"] for a in pub["authors"])
+        assert 1950 <= pub["year"] <= 2024
+
+
+def test_preferential_attachment_concentrates_authorship():
+    def top_share(attachment):
+        _, _, publications = _graph(attachment=attachment)
+        counts = Counter(a["id"] for pub in publications for a in pub["authors"])
+        top = sum(count for _, count in counts.most_common(5))
+        return top / sum(counts.values())
+
+    # 不做优先连接时作者均匀抽取，前 1% 的作者只占约 1% 的署名
+    assert top_share(0.0) < 0.03
+    assert top_share(0.9) > 3 * top_share(0.0)
+
+
+def test_split_count_and_shard_paths():
+    assert split_count(10, 3) == [4, 3, 3]
+    assert split_count(2, 3) == [1, 1, 0]
+    assert shard_paths("data/synthetic.json", 1) == ["data/synthetic.json"]
+    assert shard_paths("data/synthetic.json", 2) == ["data/synthetic-000.json", "data/synthetic-001.json"]
+    assert shard_paths("data/synthetic", 2)[1] == "data/synthetic-001.json"
+
+
+def test_shards_are_valid_topic_dumps(tmp_path):
+    paths = generate(_args(tmp_path, shards=3))
+    assert paths == [str(tmp_path / f"synthetic-00{i}.json") for i in range(3)]
+    shards = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            shards.append(json.load(f))
+    assert all(shard["name"] == "General and reference" for shard in shards)
+    assert [len(s["experts"]) for s in shards] == [17, 17, 16]
+    assert [len(s["publications"]) for s in shards] == [40, 40, 40]
+
+    expert_ids = [e["id"] for s in shards for e in s["experts"]]
+    assert len(set(expert_ids)) == 50
+    # 论文可以引用其他分片中的专家，全部分片导入后都能连上
+    assert {a["id"] for s in shards for p in s["publications"] for a in p["authors"]} <= set(expert_ids)
+
+
+def test_single_file_matches_sharded_content(tmp_path):
+    (path,) = generate(_args(tmp_path))
+    with open(path, encoding="utf-8") as f:
+        single = json.load(f)
+    shards = []
+    for shard_path in generate(_args(tmp_path, shards=3, output=str(tmp_path / "sharded.json"))):
+        with open(shard_path, encoding="utf-8") as f:
+            shards.append(json.load(f))
+    assert single["experts"] == [e for s in shards for e in s["experts"]]
+    assert single["publications"] == [p for s in shards for p in s["publications"]]
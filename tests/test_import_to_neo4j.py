@@ -0,0 +1,56 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class _Graph:
+    def __init__(self, *args, **kwargs):
+        self.calls = []
+
+    def run(self, query, **params):
+        self.calls.append((query, params))
+
+
+@pytest.fixture
+def importer(monkeypatch):
+    # 只记录执行的语句，不需要安装 py2neo 和 Neo4j
+    monkeypatch.setitem(sys.modules, "py2neo", types.SimpleNamespace(Graph=_Graph))
+    monkeypatch.delitem(sys.modules, "import_to_neo4j", raising=False)
+    module = importlib.import_module("import_to_neo4j")
+    yield module.Neo4jImporter(batch_size=2)
+    sys.modules.pop("import_to_neo4j", None)
+
+
+def _ids(importer, query):
+    return [i for q, params in importer.graph.calls if q == query for i in params["ids"]]
+
+
+def _publication(pid, *authors):
+    return {"id": pid, "title": pid, "year": 2020, "authors": [{"id": a, "name": a} for a in authors]}
+
+
+def test_profiles_and_rankings_are_updated_once_per_expert(importer):
+    experts = [{"id": eid, "name": eid, "interests": ["NLG"]} for eid in ("a", "b", "c")]
+    publications = [_publication("p1", "a", "d"), _publication("p2", "a", "b"), _publication("p3", "d", "e")]
+    importer.import_batch(experts, publications)
+
+    assert sorted(_ids(importer, importer.PROFILE_BATCH_QUERY)) == ["a", "b", "c", "d", "e"]
+    assert sorted(_ids(importer, importer.EXPERT_RANKING_QUERY)) == ["a", "b", "c", "d", "e"]
+    # 新关联领域的专家按全部论文并入排名，其余作者只并入新论文
+    assert sorted(_ids(importer, importer.PAPER_RANKING_BY_EXPERT_QUERY)) == ["a", "b", "c"]
+    assert sorted(_ids(importer, importer.PAPER_RANKING_BY_PUBLICATION_QUERY)) == ["p1", "p2", "p3"]
+
+
+def test_deferred_flush(importer):
+    importer.import_batch([], [_publication("p1", "a", "b")], flush=False)
+    importer.import_batch([], [_publication("p2", "a", "c")], flush=False)
+    assert _ids(importer, importer.PROFILE_BATCH_QUERY) == []
+
+    importer.flush_updates()
+    assert sorted(_ids(importer, importer.PROFILE_BATCH_QUERY)) == ["a", "b", "c"]
+    calls = len(importer.graph.calls)
+    # 没有新导入时不再重算
+    importer.flush_updates()
+    assert len(importer.graph.calls) == calls
@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+import intent_classifier
+from conftest import ROOT_DIR
+
+
+def test_import_does_not_load_numpy():
+    code = "import sys, qa_sys; print('numpy' in sys.modules)"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=os.path.join(ROOT_DIR, "src"),
+                          capture_output=True, text=True, check=True)
+    assert proc.stdout.strip() == "False"
+
+
+def test_shipped_model_matches_templates():
+    classifier = intent_classifier.IntentClassifier.load(intent_classifier.DEFAULT_MODEL)
+    assert classifier.labels == list(intent_classifier.TEMPLATES)
+    texts, labels = intent_classifier.template_samples()
+    assert classifier.accuracy(texts, labels) > 0.95
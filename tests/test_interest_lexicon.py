@@ -0,0 +1,56 @@
+import pytest
+
+from interest_lexicon import InterestLexicon, abbreviation, build_aliases
+
+INTERESTS = [
+    "Natural Language Generation", "Natural Language Processing", "Text Generation", "Code Generation",
+    "Machine Learning", "Deep Learning", "Reinforcement Learning", "Game Semantics", "Computer Vision",
+]
+
+
+@pytest.fixture(scope="module")
+def lexicon():
+    topics = [{"name": "Natural Language Generation", "name_zh": "自然语言生成"}]
+    return InterestLexicon(build_aliases(INTERESTS, topics, extra={"机器学习": "Machine Learning"}))
+
+
+def test_abbreviation():
+    assert abbreviation("Natural Language Generation") == "NLG"
+    assert abbreviation("Generation Of Referring Expressions") == "GRE"
+    assert abbreviation("Semantics") is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Natural Language Generation", ["Natural Language Generation"]),
+    ("natural  language generation", ["Natural Language Generation"]),
+    ("自然语言生成", ["Natural Language Generation"]),
+    ("机器学习", ["Machine Learning"]),
+])
+def test_exact(lexicon, text, expected):
+    assert lexicon.resolve(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("NLG", "Natural Language Generation"),
+    ("nlp", "Natural Language Processing"),
+    ("CV", "Computer Vision"),
+])
+def test_abbreviation_alias(lexicon, text, expected):
+    assert lexicon.resolve(text) == [expected]
+
+
+def test_substring_returns_every_matching_field(lexicon):
+    assert set(lexicon.resolve("Generation")) >= {
+        "Natural Language Generation", "Text Generation", "Code Generation"}
+    assert set(lexicon.resolve("Learning")) >= {"Machine Learning", "Deep Learning", "Reinforcement Learning"}
+    assert "Game Semantics" in lexicon.resolve("Semantics")
+
+
+def test_typo(lexicon):
+    assert lexicon.resolve("Natural Languge Generation")[0] == "Natural Language Generation"
+    assert lexicon.resolve("Machine Lerning")[0] == "Machine Learning"
+
+
+def test_unrelated_text(lexicon):
+    assert lexicon.resolve("Quantum Chromodynamics") == []
+    assert lexicon.resolve("x") == []
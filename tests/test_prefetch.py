@@ -0,0 +1,143 @@
+import itertools
+import threading
+import time
+
+from prefetch import Prefetcher
+
+EXPERTS = [
+    {"e.id": "10", "e.name": "Robert Dale", "e.name_zh": None, "e.h_index": 25, "e.position": "Prof"},
+    {"e.id": "12", "e.name": "Ehud Reiter", "e.name_zh": None, "e.h_index": 30, "e.position": None},
+]
+
+
+def _prefetched(ids, pair_ids, papers, round_=1):
+    return [{"id": eid, "interests": ["NLG", f"interest-{eid}", f"round-{round_}"] if eid in ids else None,
+             "publication_count": 1 if eid in ids else 0, "publications": [f"paper-{eid}"] if eid in ids else None,
+             "pairs": [{"expert1": "Robert Dale", "expert2": "Ehud Reiter", "first_year": 1995, "last_year": 2010,
+                        "count": 2, "papers": [{"id": "a", "title": "Old", "year": 1995},
+                                               {"id": "b", "title": "New", "year": 2010}]}] if eid == "10" else []}
+            for eid in pair_ids]
+
+
+def _rows(gate=None):
+    rounds = itertools.count(1)
+
+    def follow_up_prefetch(ids, pair_ids, papers):
+        round_ = next(rounds)
+        if gate is not None:
+            gate.wait(5)
+        return _prefetched(ids, pair_ids, papers, round_)
+
+    return {
+        "interest_names": [{"name": "Natural Language Generation"}],
+        "ranked_experts_by_interest": EXPERTS,
+        "follow_up_prefetch": follow_up_prefetch,
+    }
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+# ---- Prefetcher ----
+
+def test_schedule_applies_result():
+    prefetcher, applied = Prefetcher(entities=5, budget_ms=1000), []
+    prefetcher.schedule(lambda: 42, applied.append)
+    prefetcher.wait()
+    assert applied == [42]
+
+
+def test_cancel_discards_result():
+    prefetcher, applied, gate = Prefetcher(entities=5, budget_ms=1000), [], threading.Event()
+    prefetcher.schedule(lambda: gate.wait(5) and 1, applied.append)
+    prefetcher.cancel()
+    gate.set()
+    time.sleep(0.05)
+    prefetcher.wait()
+    assert applied == []
+
+
+def test_new_schedule_cancels_previous():
+    prefetcher, applied, gate = Prefetcher(entities=5, budget_ms=1000), [], threading.Event()
+    prefetcher.schedule(lambda: gate.wait(5) and "old", applied.append)
+    prefetcher.schedule(lambda: "new", applied.append)
+    prefetcher.wait()
+    gate.set()
+    time.sleep(0.05)
+    assert applied == ["new"]
+
+
+def test_wait_stops_at_deadline_and_late_result_is_dropped():
+    prefetcher, applied, gate = Prefetcher(entities=5, budget_ms=50), [], threading.Event()
+    prefetcher.schedule(lambda: gate.wait(5) and "late", applied.append)
+    started = time.monotonic()
+    prefetcher.wait()
+    assert time.monotonic() - started < 1
+    gate.set()
+    time.sleep(0.05)
+    assert applied == []
+
+
+def test_failed_fetch_does_not_block_wait():
+    prefetcher, applied = Prefetcher(entities=5, budget_ms=1000), []
+    prefetcher.schedule(lambda: 1 / 0, applied.append)
+    started = time.monotonic()
+    prefetcher.wait()
+    assert applied == [] and time.monotonic() - started < 0.5
+
+
+# ---- KnowledgeQA ----
+
+def test_follow_ups_are_answered_from_prefetch(make_qa):
+    qa, graph = make_qa(_rows(), prefetcher=Prefetcher(entities=5, budget_ms=1000))
+    assert "Robert Dale" in qa.answer("谁研究NLG？")
+
+    since = len(graph.calls)
+    assert qa.answer("他的研究领域是什么？").count("interest-12") == 1
+    assert qa.answer("他的论文有哪些？") == "Ehud Reiter发表的论文包括:\n- paper-12\n"
+    # 合作论文按年份从新到旧列出
+    assert qa.answer("他们之间有合作吗？").splitlines()[1:3] == ["- New", "- Old"]
+    assert graph.names(since) == []
+
+
+def test_new_question_cancels_prefetch(make_qa):
+    gate = threading.Event()
+    qa, graph = make_qa(_rows(gate), prefetcher=Prefetcher(entities=5, budget_ms=1000))
+    qa.answer("谁研究NLG？")
+    refs = qa.context.last_refs
+    assert "Robert Dale" in qa.answer("谁研究Natural Language Generation？")
+    gate.set()
+    _wait_for(lambda: graph.names().count("follow_up_prefetch") == 2)
+    time.sleep(0.05)
+    # 第一轮的预取被取消，不写入旧的实体
+    assert all("interests" not in ref.properties for ref in refs)
+
+
+def test_follow_up_after_deadline_queries_live(make_qa):
+    gate = threading.Event()
+    rows = _rows(gate)
+    rows["expert_profiles"] = [{"id": "12", "name": "Ehud Reiter", "name_zh": None, "position": None,
+                                "h_index": 30, "interests": ["Live"], "publication_count": 0,
+                                "recent_papers": [], "top_coauthors": []}]
+    qa, graph = make_qa(rows, prefetcher=Prefetcher(entities=5, budget_ms=50))
+    qa.answer("谁研究NLG？")
+    refs = qa.context.last_refs
+    since = len(graph.calls)
+    assert "Live" in qa.answer("他的研究领域是什么？")
+    assert "expert_profiles" in graph.names(since)
+
+    # 第一轮超时后才返回的预取结果不再写入上下文（之后一轮的预取照常写入）
+    gate.set()
+    _wait_for(lambda: graph.names().count("follow_up_prefetch") == 2)
+    time.sleep(0.1)
+    assert not any("round-1" in (ref.properties.get("interests") or ()) for ref in refs)
+
+
+def test_disabled_prefetch(make_qa):
+    qa, graph = make_qa(_rows(), prefetcher=Prefetcher(entities=0))
+    qa.answer("谁研究NLG？")
+    time.sleep(0.05)
+    assert "follow_up_prefetch" not in graph.names()
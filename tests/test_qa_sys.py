@@ -0,0 +1,154 @@
+import os
+
+import pytest
+
+import queries
+from prefetch import Prefetcher
+
+NEO4J_URI = os.environ.get("QA_TEST_NEO4J_URI")
+
+EXPERT_NAMES = [
+    {"id": "10", "name": "Robert Dale", "name_zh": None},
+    {"id": "12", "name": "Ehud Reiter", "name_zh": None},
+    {"id": "21", "name": "Wei Wang", "name_zh": "王伟"},
+    {"id": "22", "name": "Wei Wang", "name_zh": "王伟"},
+]
+RANKED = [
+    {"e.id": "10", "e.name": "Robert Dale", "e.name_zh": None, "e.h_index": 25, "e.position": "Prof"},
+    {"e.id": "12", "e.name": "Ehud Reiter", "e.name_zh": None, "e.h_index": 30, "e.position": None},
+]
+
+
+def _profile(eid, name, interests=("NLG",), coauthors=()):
+    return {"id": eid, "name": name, "name_zh": None, "position": None, "h_index": 30,
+            "interests": list(interests) if interests is not None else None, "publication_count": 0,
+            "recent_papers": [], "top_coauthors": list(coauthors)}
+
+
+def _qa(make_qa, **rows):
+    base = {"interest_names": [{"name": "Natural Language Generation"}, {"name": "Text Generation"}],
+            "expert_names": EXPERT_NAMES}
+    return make_qa(dict(base, **rows), prefetcher=Prefetcher(entities=0))
+
+
+# ---- 追问读取上一轮的实体 ----
+
+def test_follow_up_reuses_previous_turn(make_qa):
+    qa, graph = _qa(make_qa, ranked_experts_by_interest=RANKED)
+    qa.answer("谁研究NLG？")
+    since = len(graph.calls)
+    # h 指数在上一轮的专家列表中已经查到
+    assert qa.answer("他的h指数是多少？") == "Ehud Reiter 的h指数为: 30"
+    assert graph.names(since) == []
+
+
+def test_follow_up_queries_by_linked_id(make_qa):
+    qa, graph = _qa(make_qa, ranked_experts_by_interest=RANKED,
+                    expert_profiles=lambda ids: [_profile("12", "Ehud Reiter", ["NLG", "Dialogue"])])
+    qa.answer("谁研究NLG？")
+    since = len(graph.calls)
+    assert "Dialogue" in qa.answer("他的研究领域是什么？")
+    assert graph.calls[since:] == [("expert_profiles", {"ids": ["12"]})]
+
+
+# ---- 专家资料 ----
+
+def test_interests_read_from_profile(make_qa):
+    qa, graph = _qa(make_qa, expert_profiles=[_profile("12", "Ehud Reiter", ["NLG", "Dialogue"])])
+    assert "Dialogue" in qa.answer("Ehud Reiter的研究领域是什么")
+    assert "expert_interests" not in graph.names()
+
+
+def test_missing_profile_falls_back_to_relationships(make_qa):
+    qa, graph = _qa(make_qa, expert_profiles=[_profile("12", "Ehud Reiter", interests=None)],
+                    expert_interests=[{"id": "12", "name": "Ehud Reiter", "name_zh": None, "position": None,
+                                       "interests": ["Live"]}])
+    assert "Live" in qa.answer("Ehud Reiter的研究领域是什么")
+    assert graph.names()[-2:] == ["expert_profiles", "expert_interests"]
+
+
+def test_homonyms_show_main_coauthors(make_qa):
+    qa, graph = _qa(make_qa, expert_profiles=[_profile("21", "Wei Wang", coauthors=["Ehud Reiter"]),
+                                              _profile("22", "Wei Wang", coauthors=["Robert Dale"])])
+    answer = qa.answer("王伟的研究领域是什么")
+    assert "主要合作者：Ehud Reiter" in answer and "主要合作者：Robert Dale" in answer
+    assert ("expert_profiles", {"ids": ["21", "22"]}) in graph.calls
+
+
+# ---- 合作时间线 ----
+
+PAIR = {"expert1": "Robert Dale", "expert2": "Ehud Reiter", "first_year": 1995, "last_year": 2010, "count": 4,
+        "papers": [{"id": "b", "title": "New"}, {"id": "a", "title": "Old"}]}
+
+
+def test_coauthor_timeline(make_qa):
+    qa, graph = _qa(make_qa, ranked_experts_by_interest=RANKED, coauthor_timeline=[PAIR])
+    qa.answer("谁研究NLG？")
+    assert qa.answer("他们是什么时候开始合作的？") == "Robert Dale 和 Ehud Reiter 于 1995 年开始合作，最近一次合作在 2010 年"
+    assert "coauthor_timeline_from_papers" not in graph.names()
+
+
+def test_coauthor_timeline_falls_back_to_papers(make_qa):
+    qa, graph = _qa(make_qa, ranked_experts_by_interest=RANKED, coauthor_timeline_from_papers=[PAIR])
+    qa.answer("谁研究NLG？")
+    answer = qa.answer("他们之间有合作吗？")
+    assert answer.splitlines()[:3] == ["Robert Dale 和 Ehud Reiter 有 4 篇合作论文：", "- New", "- Old"]
+    assert graph.names()[-2:] == ["coauthor_timeline", "coauthor_timeline_from_papers"]
+
+
+# ---- 领域排名 ----
+
+def test_ranked_experts(make_qa):
+    qa, graph = _qa(make_qa, ranked_experts_by_interest=RANKED)
+    answer = qa.answer("谁研究NLG？")
+    assert "Robert Dale" in answer and "前20位" not in answer
+    assert "expert_by_interest" not in graph.names()
+    assert ("ranked_experts_by_interest", {"limit": queries.RANKING_SIZE,
+                                           "i_names": ["Natural Language Generation"]}) in graph.calls
+
+
+def test_full_ranking_says_it_is_the_top_20(make_qa):
+    ranked = [dict(RANKED[0], **{"e.id": str(i), "e.name": f"Expert {i}"}) for i in range(queries.RANKING_SIZE)]
+    qa, graph = _qa(make_qa, ranked_experts_by_interest=ranked)
+    assert qa.answer("谁研究NLG？").endswith(f"(按h指数列出前{queries.RANKING_SIZE}位)\n")
+
+
+def test_missing_ranking_falls_back(make_qa):
+    qa, graph = _qa(make_qa, expert_by_interest=RANKED)
+    answer = qa.answer("谁研究Generation？")
+    assert "Ehud Reiter" in answer and "前20位" not in answer
+    assert graph.calls[-1] == ("expert_by_interest", {"i_names": ["Natural Language Generation", "Text Generation"]})
+
+
+def test_field_publications_fall_back_without_ranking(make_qa):
+    paper = {"title": "Building NLG Systems", "year": 2000, "authors": [{"name": "Ehud Reiter", "name_zh": None}]}
+    qa, graph = _qa(make_qa, field_publications=[paper])
+    assert "Building NLG Systems" in qa.answer("NLG领域的论文有哪些？")
+    assert graph.names()[-2:] == ["ranked_field_publications", "field_publications"]
+
+
+@pytest.mark.skipif(not NEO4J_URI, reason="设置 QA_TEST_NEO4J_URI 后运行，会清空该数据库")
+def test_ranked_queries_require_every_interest_ranked():
+    py2neo = pytest.importorskip("py2neo")
+    graph = py2neo.Graph(NEO4J_URI, auth=(os.environ.get("QA_TEST_NEO4J_USER", "neo4j"),
+                                          os.environ.get("QA_TEST_NEO4J_PASSWORD", "password")))
+    graph.run("MATCH (n) DETACH DELETE n")
+    graph.run("""
+    CREATE (a:Expert {id: '1', name: 'A', h_index: 5}), (b:Expert {id: '2', name: 'B', h_index: 3}),
+           (p:Publication {id: 'p1', title: 'T1', year: 2020}), (q:Publication {id: 'p2', title: 'T2', year: 2021}),
+           (i:Interest {name: 'Ranked', top_expert_ids: ['1'], recent_paper_ids: ['p1']}),
+           (j:Interest {name: 'Unranked'}),
+           (a)-[:AUTHORED]->(p), (b)-[:AUTHORED]->(q), (a)-[:INTERESTED_IN]->(i), (b)-[:INTERESTED_IN]->(j)
+    """)
+
+    def run(query, **params):
+        return graph.run(query, params).data()
+
+    statement = queries.RANKED_EXPERTS_BY_INTEREST
+    experts = statement.render(i=statement.slots["i"][0])
+    assert [r["e.id"] for r in run(experts, i_names=["Ranked"], limit=20)] == ["1"]
+    assert run(experts, i_names=["Ranked", "Unranked"], limit=20) == []
+    publications = queries.RANKED_FIELD_PUBLICATIONS
+    assert [r["title"] for r in run(publications, names=["Ranked"], dated=False, limit=10)] == ["T1"]
+    assert run(publications, names=["Ranked", "Unranked"], dated=False, limit=10) == []
+    assert run(queries.RANKED_TOP_EXPERTS_BY_FIELD, k=10) == []
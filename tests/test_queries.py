@@ -0,0 +1,35 @@
+import pytest
+
+import queries
+
+
+def test_validate_once_caches_failure(monkeypatch):
+    calls = []
+
+    def failing_validate(graph):
+        calls.append(graph)
+        raise ValueError("以下查询无法编译:\nbroken: syntax error")
+
+    monkeypatch.setattr(queries, "validate", failing_validate)
+    monkeypatch.setattr(queries, "_validated", {})
+    for _ in range(3):
+        with pytest.raises(ValueError, match="broken"):
+            queries.validate_once("bolt://test", object())
+    assert len(calls) == 1
+
+
+def test_validate_once_retries_after_connection_error(monkeypatch):
+    results = [ConnectionError("refused"), ["MATCH (n) RETURN n"]]
+
+    def flaky_validate(graph):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(queries, "validate", flaky_validate)
+    monkeypatch.setattr(queries, "_validated", {})
+    with pytest.raises(ConnectionError):
+        queries.validate_once("bolt://test", object())
+    assert queries.validate_once("bolt://test", object()) == ["MATCH (n) RETURN n"]
+    assert queries.validate_once("bolt://test", object()) == ["MATCH (n) RETURN n"]
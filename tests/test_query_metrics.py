@@ -0,0 +1,54 @@
+import queries
+from conftest import FakeGraph
+from query_metrics import QueryMetrics, current_handler, query_handler
+
+RANKED = [{"e.id": "12", "e.name": "Ehud Reiter", "e.name_zh": None, "e.h_index": 30, "e.position": None}]
+
+
+class _Handlers:
+    @query_handler()
+    def outer(self):
+        return current_handler(), self.inner()
+
+    @query_handler("_handle_items")
+    def inner(self):
+        return current_handler()
+
+    @query_handler("_handle_items")
+    def items(self):
+        yield current_handler()
+        yield current_handler()
+
+
+def test_query_handler_labels_calls():
+    handlers = _Handlers()
+    assert handlers.outer() == ("outer", "_handle_items")
+    assert current_handler() == ""
+
+
+def test_query_handler_on_generator_only_covers_its_own_steps():
+    items = _Handlers().items()
+    assert next(items) == "_handle_items"
+    # 两项之间调用方的代码不计入生成器
+    assert current_handler() == ""
+    assert list(items) == ["_handle_items"]
+
+
+def test_knowledge_qa_labels_queries_by_handler(make_qa):
+    qa, graph = make_qa({"interest_names": [{"name": "Natural Language Generation"}],
+                         "ranked_experts_by_interest": RANKED})
+    qa.answer("谁研究NLG？")
+    qa.run_query(queries.EXPERT_NAMES)
+    handlers = {handler for handler, _ in qa.metrics.snapshot()}
+    assert "_handle_expert_by_interest" in handlers
+    # 不经处理方法直接执行时按语句名统计
+    assert "expert_names" in handlers
+
+
+def test_plan_cache_metrics_are_labelled_as_estimates():
+    metrics = QueryMetrics(slow_log=None)
+    metrics.execute(FakeGraph(), "RETURN 1", {}, handler="h", intent="i")
+    metrics.execute(FakeGraph(), "RETURN 1", {}, handler="h", intent="i")
+    text = metrics.render_prometheus()
+    assert 'qa_query_plan_cache_hits_estimated_total{handler="h",intent="i"} 1' in text
+    assert 'qa_query_plan_cache_misses_estimated_total{handler="h",intent="i"} 1' in text
@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, cached_by_graph_version
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(result_cache.time, "monotonic", clock)
+    return clock
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+
+def test_hit_and_expiry(clock):
+    cache, calls = ResultCache(ttl=10, refresh_ahead=1.0), []
+    compute = lambda: calls.append(1) or len(calls)  # noqa: E731
+    assert cache.get_or_compute("k", compute) == 1
+    clock.now += 9
+    assert cache.get_or_compute("k", compute) == 1
+    clock.now += 1
+    assert cache.get_or_compute("k", compute) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_single_flight():
+    cache, calls = ResultCache(ttl=60), []
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    # 8 个并发请求只计算一次
+    assert calls == [1] and results == ["value"] * 8
+
+
+def test_refresh_ahead_serves_stale_value_while_refreshing(clock):
+    cache = ResultCache(ttl=10, refresh_ahead=0.8)
+    release, values = threading.Event(), iter(["old", "new"])
+
+    def compute():
+        value = next(values)
+        if value == "new":
+            release.wait(5)
+        return value
+
+    assert cache.get_or_compute("k", compute) == "old"
+    clock.now += 8
+    # 超过 ttl 的 80% 后仍立即返回旧值，后台只启动一次刷新
+    assert cache.get_or_compute("k", compute) == "old"
+    assert cache.get_or_compute("k", compute) == "old"
+    release.set()
+    _wait_for(lambda: cache._entries["k"].value == "new")
+    assert cache.get_or_compute("k", lambda: pytest.fail("不应同步重算")) == "new"
+
+
+def test_failed_refresh_keeps_old_value(clock):
+    cache = ResultCache(ttl=10, refresh_ahead=0.5)
+    cache.get_or_compute("k", lambda: "old")
+    clock.now += 6
+    assert cache.get_or_compute("k", lambda: 1 / 0) == "old"
+    _wait_for(lambda: not cache._entries["k"].refreshing)
+    assert cache.get_or_compute("k", lambda: "new") == "old"
+    _wait_for(lambda: cache._entries["k"].value == "new")
+
+
+def test_version_is_cached_for_version_ttl(clock):
+    cache, versions = ResultCache(version_ttl=5), iter([1, 2])
+    fetch = lambda: next(versions)  # noqa: E731
+    assert cache.version("bolt://a", fetch) == 1
+    clock.now += 4
+    assert cache.version("bolt://a", fetch) == 1
+    clock.now += 1
+    assert cache.version("bolt://a", fetch) == 2
+
+
+class _QA:
+    def __init__(self, cache, uri="bolt://test"):
+        self.result_cache = cache
+        self.uri = uri
+        self.version = 1
+        self.calls = 0
+
+    def graph_version(self):
+        return self.version
+
+    @cached_by_graph_version
+    def stats(self, field):
+        self.calls += 1
+        return {"field": field, "version": self.version}
+
+
+def test_new_graph_version_expires_cached_results(clock):
+    cache = ResultCache(ttl=600, version_ttl=5)
+    qa = _QA(cache)
+    assert qa.stats("NLG") == {"field": "NLG", "version": 1}
+    assert qa.stats("NLG") is qa.stats("NLG") and qa.calls == 1
+    # 参数不同是不同的键
+    qa.stats("NLP")
+    assert qa.calls == 2
+
+    # 导入器更新了版本号：版本号缓存过期后重新计算
+    qa.version = 2
+    assert qa.stats("NLG")["version"] == 1
+    clock.now += 5
+    assert qa.stats("NLG") == {"field": "NLG", "version": 2} and qa.calls == 3
+
+
+def test_instances_share_results_per_source(clock):
+    cache = ResultCache()
+    first, second, other = _QA(cache), _QA(cache), _QA(cache, uri="bolt://other")
+    first.stats("NLG")
+    second.stats("NLG")
+    other.stats("NLG")
+    assert (first.calls, second.calls, other.calls) == (1, 0, 1)
@@ -0,0 +1,105 @@
+import csv
+import json
+
+from scholar_pipeline import TransformState, run_pipeline
+
+HEADER = ["Page", "Result", "Title", "Link", "Abstract", "Keywords", "Authors"]
+
+
+class _Importer:
+    def __init__(self):
+        self.titles = []
+        self.pending = []
+        self.flushed = []
+
+    def ensure_indexes(self):
+        pass
+
+    def import_batch(self, experts, publications, flush=True):
+        self.titles.extend(p["title"] for p in publications)
+        self.pending.extend(p["title"] for p in publications)
+
+    def flush_updates(self):
+        self.flushed.append(self.pending)
+        self.pending = []
+
+
+def _write(path, titles, mode="w"):
+    with open(path, mode, newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if mode == "w":
+            writer.writerow(HEADER)
+        for title in titles:
+            writer.writerow([1, 1, title, "", "", "隐私计算", "张三, A Smith"])
+
+
+def test_appended_rows_are_imported_once(tmp_path):
+    path, state_path = str(tmp_path / "output.csv"), str(tmp_path / "state.json")
+    _write(path, ["Paper A", "Paper B"])
+    importer = _Importer()
+    run_pipeline([path], importer, TransformState.load(state_path))
+    _write(path, ["Paper C"], mode="a")
+    run_pipeline([path], importer, TransformState.load(state_path))
+    assert importer.titles == ["Paper A", "Paper B", "Paper C"]
+
+
+def test_rewritten_file_is_read_from_the_start(tmp_path):
+    path, state_path = str(tmp_path / "output.csv"), str(tmp_path / "state.json")
+    _write(path, ["Paper A", "Paper B"])
+    importer = _Importer()
+    run_pipeline([path], importer, TransformState.load(state_path))
+    # 换了检索词，爬虫从头重写 output.csv
+    _write(path, ["Paper X", "Paper Y", "Paper Z"])
+    run_pipeline([path], importer, TransformState.load(state_path))
+    assert importer.titles == ["Paper A", "Paper B", "Paper X", "Paper Y", "Paper Z"]
+
+
+def test_updates_are_flushed_every_few_batches(tmp_path):
+    path, state_path = str(tmp_path / "output.csv"), str(tmp_path / "state.json")
+    _write(path, [f"Paper {i}" for i in range(5)])
+    importer = _Importer()
+    run_pipeline([path], importer, TransformState.load(state_path), batch_size=1, flush_every=2)
+    assert importer.flushed == [["Paper 0", "Paper 1"], ["Paper 2", "Paper 3"], ["Paper 4"]]
+    assert TransformState.load(state_path).rows_done == {path: 5}
+
+
+def test_seen_titles_are_appended_as_hashes(tmp_path):
+    path, state_path = str(tmp_path / "output.csv"), str(tmp_path / "state.json")
+    _write(path, ["Paper A", "Paper B"])
+    run_pipeline([path], _Importer(), TransformState.load(state_path))
+    titles_path = state_path + ".titles"
+    with open(titles_path, encoding="ascii") as f:
+        first = f.read()
+    assert len(first.split()) == 2 and "paper" not in first
+
+    # 只追加新标题，已写入的部分不重写
+    _write(path, ["Paper C", "Paper A"], mode="a")
+    run_pipeline([path], _Importer(), TransformState.load(state_path))
+    with open(titles_path, encoding="ascii") as f:
+        second = f.read()
+    assert second.startswith(first) and len(second.split()) == 3
+
+
+def test_unconfirmed_titles_are_dropped(tmp_path):
+    state_path = str(tmp_path / "state.json")
+    state = TransformState.load(state_path)
+    state.add_title("paper a")
+    state.save()
+    # 上次保存时写入了 .titles、但没来得及更新状态文件
+    with open(state_path + ".titles", "a", encoding="ascii") as f:
+        f.write("0123456789abcdef0123\n")
+    state = TransformState.load(state_path)
+    assert state.has_title("paper a") and len(state.seen_titles) == 1
+    state.add_title("paper b")
+    state.save()
+    assert TransformState.load(state_path).seen_titles == state.seen_titles
+
+
+def test_legacy_title_list_is_migrated(tmp_path):
+    state_path = str(tmp_path / "state.json")
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump({"rows_done": {}, "fingerprints": {}, "seen_titles": ["paper a"]}, f)
+    state = TransformState.load(state_path)
+    state.save()
+    state = TransformState.load(state_path)
+    assert state.has_title("paper a") and not state.has_title("paper b")
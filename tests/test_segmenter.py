@@ -0,0 +1,131 @@
+import os
+import sys
+import threading
+import types
+
+import pytest
+
+import segmenter
+from entity_linker import Mention
+from segmenter import Segmenter, Token, build_entries, load_segmenter
+
+
+def _tokens(*pairs):
+    tokens, position = [], 0
+    for word, tag in pairs:
+        tokens.append(Token(word, tag, position, position + len(word)))
+        position += len(word)
+    return tokens
+
+
+@pytest.mark.parametrize("pairs, expected", [
+    # 谁研究自然语言生成？
+    ((("谁", "who"), ("研究", "x"), ("自然语言生成", "field"), ("？", "x")),
+     ("expert_by_interest", "自然语言生成")),
+    # Albert Gatt的h指数是多少
+    ((("Albert Gatt", "expert"), ("的", "x"), ("h指数", "h_index"), ("是", "x"), ("多少", "x")),
+     ("expert_h_index", "Albert Gatt")),
+    # Ehud Reiter发表了哪些论文
+    ((("Ehud Reiter", "expert"), ("发表了", "publish"), ("哪些", "x"), ("论文", "paper")),
+     ("expert_publications", "Ehud Reiter")),
+    # 王伟的研究领域
+    ((("王伟", "expert"), ("的", "x"), ("研究领域", "interests")), ("expert_interests", "王伟")),
+    # NLP最近的论文
+    ((("NLP", "field"), ("最近", "recent"), ("的", "x"), ("论文", "paper")),
+     ("recent_field_publications", "NLP")),
+    ((("NLP", "field"), ("领域", "field_word"), ("的", "x"), ("论文", "paper")), ("field_publications", "NLP")),
+    ((("机器学习", "field"), ("最强", "top"), ("的", "x"), ("专家", "top")), ("top_experts_in_field", "机器学习")),
+    # Ehud Reiter和Robert Dale有合作吗 / 怎么联系上
+    ((("Ehud Reiter", "expert"), ("和", "x"), ("Robert Dale", "expert"), ("有", "x"), ("合作", "cooperate")),
+     ("cooperation", ("Ehud Reiter", "Robert Dale"))),
+    ((("Ehud Reiter", "expert"), ("和", "x"), ("Robert Dale", "expert"), ("合作", "cooperate"),
+      ("联系上", "connect")),
+     ("collaboration_path", ("Ehud Reiter", "Robert Dale"))),
+    ((("Building NLG Systems", "publication"), ("的", "x"), ("作者", "author")),
+     ("publication_authors", "Building NLG Systems")),
+    ((("Building NLG Systems", "publication"), ("哪年", "year"), ("发表", "publish")),
+     ("publication_year", "Building NLG Systems")),
+    ((("你好", "x"),), None),
+])
+def test_parse(pairs, expected):
+    assert Segmenter.parse(_tokens(*pairs)) == expected
+
+
+def test_fill_slot():
+    tokens = _tokens(("Ehud Reiter", "expert"), ("和", "x"), ("Robert Dale", "expert"), ("NLG", "field"))
+    assert Segmenter.fill_slot("cooperation", tokens) == ("Ehud Reiter", "Robert Dale")
+    assert Segmenter.fill_slot("expert_h_index", tokens) == "Ehud Reiter"
+    assert Segmenter.fill_slot("field_publications", tokens) == "NLG"
+    assert Segmenter.fill_slot("publication_year", tokens) is None
+    assert Segmenter.fill_slot("unknown", tokens) is None
+
+
+def test_field_spans_respect_word_boundaries():
+    seg = Segmenter({"ML": "field", "Natural Language Generation": "field", "自然语言生成": "field"})
+    assert seg._field_spans("HTML和ML") == [(5, 7, "field")]
+    assert seg._field_spans("natural language generation的论文") == [(0, 27, "field")]
+    assert seg._field_spans("谁研究自然语言生成") == [(3, 9, "field")]
+
+
+def test_segment_with_jieba():
+    pytest.importorskip("jieba")
+    seg = Segmenter(build_entries(["自然语言生成", "Natural Language Generation"], [{"name": "Albert Gatt"}]))
+    tokens = seg.segment("谁研究自然语言生成？")
+    assert Segmenter.parse(tokens) == ("expert_by_interest", "自然语言生成")
+    question = "Albert Gatt的h指数是多少"
+    tokens = seg.segment(question, [Mention("Albert Gatt", 0, 11, "expert", ["1"])])
+    assert Segmenter.parse(tokens) == ("expert_h_index", "Albert Gatt")
+
+
+def test_user_dict_is_rebuilt_when_graph_version_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(segmenter, "_init_jieba", lambda path: None)
+    monkeypatch.setattr(segmenter, "_segmenters", {})
+    calls = []
+
+    def loader(name):
+        def load():
+            calls.append(name)
+            return build_entries([name], [{"name": "Albert Gatt", "name_zh": "阿尔伯特"}])
+        return load
+
+    cache_dir = str(tmp_path)
+    first = load_segmenter("bolt://test", 1, loader("NLG"), cache_dir)
+    assert load_segmenter("bolt://test", 1, loader("unused"), cache_dir) is first
+    assert first.entries == {"NLG": "field", "Albert Gatt": "expert", "阿尔伯特": "expert"}
+
+    # 进程重启后直接读取缓存的词典文件，不再调用 loader
+    monkeypatch.setattr(segmenter, "_segmenters", {})
+    assert load_segmenter("bolt://test", 1, loader("unused"), cache_dir).entries == first.entries
+    assert calls == ["NLG"]
+
+    second = load_segmenter("bolt://test", 2, loader("Machine Learning"), cache_dir)
+    assert calls == ["NLG", "Machine Learning"]
+    assert "Machine Learning" in second.entries and "NLG" not in second.entries
+    # 旧图版本的词典文件被删除
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_jieba_is_loaded_once_in_the_background(monkeypatch, tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+    fake = types.SimpleNamespace(dt=types.SimpleNamespace(tmp_dir=None), initializations=0)
+
+    def initialize():
+        started.set()
+        release.wait(5)
+        fake.initializations += 1
+
+    fake.initialize = initialize
+    monkeypatch.setitem(sys.modules, "jieba", fake)
+    monkeypatch.setattr(segmenter, "DEFAULT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(segmenter, "_jieba", None)
+    monkeypatch.setattr(segmenter, "_jieba_ready", threading.Event())
+    monkeypatch.setattr(segmenter, "_jieba_started", False)
+
+    segmenter.preload()
+    segmenter.preload()
+    # preload 不阻塞调用方，主词典在后台线程加载
+    assert started.wait(5) and not segmenter._jieba_ready.is_set()
+    release.set()
+    assert segmenter.get_jieba() is fake
+    assert fake.initializations == 1 and fake.dt.tmp_dir == str(tmp_path)
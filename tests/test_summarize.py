@@ -0,0 +1,100 @@
+import csv
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import summarize
+from summarize import Summarizer, SummaryCache, html_to_text, summarize_csv
+
+PAGE = """<html><head><title>Neural Text Generation</title><style>p {color: red}</style></head>
+<body><nav>Home | About</nav><script>var x = 1;</script>
+<article><h1>Neural Text Generation</h1><p>We study   data-to-text &amp; dialogue.</p></article>
+<footer>Copyright</footer></body></html>"""
+
+
+class _Client:
+    """前 failures 次调用失败的摘要桩函数"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.texts = []
+
+    def __call__(self, text):
+        self.texts.append(text)
+        if len(self.texts) <= self.failures:
+            raise RuntimeError("rate limited")
+        return f"summary of {text.splitlines()[0]}"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(summarize.time, "sleep", delays.append)
+    return delays
+
+
+def test_html_to_text_keeps_main_text():
+    assert html_to_text(PAGE) == "Neural Text Generation\nWe study data-to-text & dialogue."
+    assert html_to_text("<title>Only title</title><p>Body</p>") == "Only title\nBody"
+    assert html_to_text("<p>" + "x" * 100 + "</p>", max_chars=10) == "x" * 10
+    assert html_to_text("") == ""
+
+
+def test_retry_with_exponential_backoff(sleeps):
+    client = _Client(failures=2)
+    summarizer = Summarizer(client, max_retries=3, backoff=0.5)
+    assert summarizer.summarize(PAGE) == "summary of Neural Text Generation"
+    assert len(client.texts) == 3 and sleeps == [0.5, 1.0]
+
+
+def test_gives_up_after_max_retries(sleeps):
+    client = _Client(failures=10)
+    with pytest.raises(RuntimeError):
+        Summarizer(client, max_retries=2, backoff=1).summarize(PAGE)
+    assert len(client.texts) == 3 and sleeps == [1, 2]
+
+
+def test_cache_hit_skips_client(tmp_path):
+    client = _Client()
+    summarizer = Summarizer(client, cache=SummaryCache(str(tmp_path)))
+    first = summarizer.summarize(PAGE)
+    # 页面外壳不同、正文相同时同样命中缓存
+    assert summarizer.summarize(PAGE.replace("Copyright", "All rights reserved")) == first
+    assert len(client.texts) == 1
+
+
+def test_failed_summaries_are_logged_and_retried_on_next_run(tmp_path, sleeps, caplog):
+    input_path, output_path = str(tmp_path / "raw.csv"), str(tmp_path / "llm.csv")
+    with open(input_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Page", "Result", "Title", "Link", "HTML"])
+        writer.writerow([1, 1, "隐私计算综述", "http://a", "<p>隐私计算</p>"])
+        writer.writerow([1, 2, "Broken", "http://b", "<p>broken</p>"])
+
+    def client(text):
+        if text == "broken":
+            raise RuntimeError("bad page")
+        return f"摘要：{text}"
+
+    cache = SummaryCache(str(tmp_path / "cache"))
+    with caplog.at_level(logging.ERROR, logger=summarize.__name__):
+        assert summarize_csv(input_path, output_path, Summarizer(client, cache=cache, max_retries=0)) == 2
+    with open(output_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["Abstract_With_LLM"] for row in rows] == ["摘要：隐私计算", ""]
+    assert "http://b" in caplog.text
+
+    # 失败的摘要没有写入缓存，重新运行时只重试这一行
+    calls = []
+    summarize_csv(input_path, output_path, Summarizer(lambda text: calls.append(text) or "ok", cache=cache))
+    assert calls == ["broken"]
+
+
+def test_concurrent_puts_of_same_key(tmp_path):
+    cache = SummaryCache(str(tmp_path))
+    key = cache.key("page text")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: cache.put(key, "summary " * 1000), range(64)))
+    assert cache.get(key) == "summary " * 1000
+    assert not list(tmp_path.rglob("*.tmp"))
@@ -0,0 +1,114 @@
+import json
+import threading
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "traces" / "trace.jsonl"
+    tracing.configure(str(path))
+    yield path
+    tracing.configure(None)
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_spans_nest_under_the_current_span():
+    with tracing.span("qa.answer") as root:
+        with tracing.span("qa.handler") as handler:
+            with tracing.span("db.query") as query:
+                assert tracing.current_span() is query
+            assert tracing.current_span() is handler
+    assert tracing.current_span() is None
+
+    assert {s.trace_id for s in (root, handler, query)} == {root.trace_id}
+    assert (root.parent_id, handler.parent_id, query.parent_id) == (None, root.span_id, handler.span_id)
+    # 子 span 先结束
+    assert root.finished == [query, handler, root]
+
+
+def test_explicit_parent_links_a_later_span():
+    with tracing.span("qa.answer") as answer:
+        pass
+    with tracing.span("ui.render", parent=answer.context) as render:
+        pass
+    assert render.trace_id == answer.trace_id and render.parent_id == answer.span_id
+
+
+def test_threads_do_not_share_the_current_span():
+    seen = []
+    with tracing.span("qa.answer"):
+        thread = threading.Thread(target=lambda: seen.append(tracing.current_span()))
+        thread.start()
+        thread.join()
+    assert seen == [None]
+
+
+def test_error_is_recorded_and_raised():
+    with pytest.raises(ValueError):
+        with tracing.span("qa.answer") as root:
+            raise ValueError("bad")
+    assert root.error == "ValueError: bad" and root.end_ns is not None
+
+
+def test_root_span_exports_one_otlp_line(trace_file):
+    with tracing.span("qa.answer", **{"qa.intent": "expert_h_index", "qa.cached": False}) as root:
+        with tracing.span("db.query", **{"db.rows": 3, "db.ratio": 0.5}):
+            pass
+    with pytest.raises(RuntimeError):
+        with tracing.span("qa.answer"):
+            raise RuntimeError("down")
+
+    first, second = _lines(trace_file)
+    resource = first["resourceSpans"][0]
+    assert resource["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": tracing.SERVICE_NAME}}]
+    spans = resource["scopeSpans"][0]["spans"]
+    assert [s["name"] for s in spans] == ["db.query", "qa.answer"]
+
+    query, answer = spans
+    assert "parentSpanId" not in answer and query["parentSpanId"] == answer["spanId"] == root.span_id
+    assert query["traceId"] == answer["traceId"] == root.trace_id
+    assert len(answer["traceId"]) == 32 and len(answer["spanId"]) == 16
+    assert int(answer["startTimeUnixNano"]) <= int(answer["endTimeUnixNano"])
+    assert answer["attributes"] == [{"key": "qa.intent", "value": {"stringValue": "expert_h_index"}},
+                                    {"key": "qa.cached", "value": {"boolValue": False}}]
+    assert query["attributes"] == [{"key": "db.rows", "value": {"intValue": "3"}},
+                                   {"key": "db.ratio", "value": {"doubleValue": 0.5}}]
+    assert answer["status"] == {"code": 1}
+
+    (failed,) = second["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert failed["status"] == {"code": 2, "message": "RuntimeError: down"}
+
+
+def test_no_file_is_written_when_unconfigured(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tracing.configure(None)
+    with tracing.span("qa.answer"):
+        pass
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_timing_summary():
+    ms = 1_000_000
+    with tracing.span("qa.answer") as root:
+        with tracing.span("qa.route") as route:
+            pass
+        with tracing.span("qa.handler") as handler:
+            with tracing.span("db.query") as first:
+                pass
+            with tracing.span("db.query") as second:
+                pass
+    for s, start, end in [(root, 0, 100), (route, 0, 10), (handler, 10, 90), (first, 20, 40), (second, 50, 55)]:
+        s.start_ns, s.end_ns = start * ms, end * ms
+    assert tracing.timing_summary(root) == {"total": 100.0, "route": 10.0, "handler": 80.0,
+                                            "db": 25.0, "db_count": 2, "format": 55.0}
+    # 只统计给定 span 的子孙
+    assert tracing.timing_summary(handler)["db_count"] == 2
+    assert tracing.timing_summary(route)["db_count"] == 0